@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE API Stand-in
+
+A local server that answers the Messages API the way the hooks call it —
+POST /v1/messages, plain and streamed — so handoff generation can be timed
+end to end, and made to fail on purpose, without the network, a key or a
+bill. Standard library only.
+
+- Latency: --latency is the time to the first byte, --tokens-per-sec the
+  pace after it (a streamed body arrives in chunks at that rate; a plain
+  one all at once when it would have finished). --jitter varies both.
+- Faults, drawn per request (--seed to repeat a run):
+    --error-rate / --error-status   an API error (a 429 carries retry-after)
+    --hang-rate                     never answers: deadlines and hedging
+    --cut-rate                      a stream dies halfway: partial salvage
+    --fail-model NAME[:STATUS]      one model always fails: the fallback chain
+- Prompt caching: the prompt up to a cache_control breakpoint is cached per
+  model for 5 minutes if it is at least --cache-min-tokens long, and canned
+  answers report cache_creation/cache_read_input_tokens the way the API
+  does — so a caching change shows up in session_handoff.py --usage.
+- Record: --record DIR proxies every request to the real API (--upstream)
+  with the caller's key and saves each successful response in DIR, keyed
+  by a hash of the request, with its timing.
+- Replay: --replay DIR answers from those recordings, at their recorded
+  pace unless --latency/--tokens-per-sec say otherwise. A request with no
+  recording gets the canned answer (an error with --strict); --loose
+  answers it from another recording of the same model instead, since a
+  handoff prompt carries the date and never matches exactly again.
+  Otherwise the canned answer is a handoff-shaped document for a handoff
+  prompt and a short reply for anything else.
+
+GET /stats returns request and fault counts as JSON.
+
+Point the hooks at it with ANTHROPIC_BASE_URL_HOOKS — only the hooks;
+Claude Code itself reads ANTHROPIC_BASE_URL and keeps talking to the real
+API. Any key works unless recording. roundtable and other SDK clients
+outside Claude Code take ANTHROPIC_BASE_URL.
+
+CLI:
+    python api_standin.py                                  # http://127.0.0.1:8765
+    python api_standin.py --latency 800 --tokens-per-sec 60
+    python api_standin.py --error-rate 0.3 --error-status 529 --seed 1
+    python api_standin.py --fail-model claude-haiku-4-5-20251001
+    python api_standin.py --record ~/.claude/hooks/.state/recordings
+    python api_standin.py --replay ~/.claude/hooks/.state/recordings --loose
+
+    export ANTHROPIC_BASE_URL_HOOKS=http://127.0.0.1:8765
+    export ANTHROPIC_API_KEY_HOOKS=standin
+    MOTHER_CLAUDE_HOOK_METRICS=1 python session_handoff.py < precompact.json
+"""
+
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+DEFAULT_PORT = 8765
+DEFAULT_UPSTREAM = "https://api.anthropic.com"
+DEFAULT_LATENCY_MS = 400
+DEFAULT_TOKENS_PER_SEC = 150
+
+# Text per streamed delta, in estimated tokens
+CHUNK_TOKENS = 8
+# How long a hung request holds its connection
+HANG_SECONDS = 600
+# Prompt cache: entry lifetime (refreshed on each read), and the default
+# minimum prefix; the real minimum depends on the model (1024-4096)
+CACHE_TTL = 300
+DEFAULT_CACHE_MIN_TOKENS = 1024
+# Request fields that decide the response; a recording matches on these
+MATCH_FIELDS = ("model", "system", "messages", "max_tokens", "temperature", "stop_sequences")
+# Forwarded to the real API when recording
+FORWARD_HEADERS = ("x-api-key", "authorization", "anthropic-version", "anthropic-beta")
+
+ERROR_TYPES = {
+    400: "invalid_request_error",
+    401: "authentication_error",
+    403: "permission_error",
+    404: "not_found_error",
+    413: "request_too_large",
+    429: "rate_limit_error",
+    500: "api_error",
+    529: "overloaded_error",
+}
+
+CANNED_HANDOFF = """SHORT_TITLE: standin-handoff
+
+# Session Handoff - API Stand-in
+
+**Date**: {date}
+**Focus**: Canned handoff from the local API stand-in
+**Status**: Generated offline for testing; nothing here came from the session
+
+---
+
+## Quick Context
+
+**What's Working:**
+- The hook reached `api_standin.py` and got a response back
+- The request carried a {prompt_chars}-character prompt for `{model}`
+
+**What Needs Attention:**
+- This text is canned; record real responses with `--record` for realistic content
+
+---
+
+## Completed This Session
+
+| Phase | Ticket | Description | Status |
+|-------|--------|-------------|--------|
+| 1 | - | Stand-in response | Done |
+
+---
+
+## Key Decisions & Rationale
+
+- **Canned answer**: The stand-in returned its built-in handoff
+  - *Why*: No recording matched this request, or none was configured
+
+---
+
+## Next Steps
+
+1. [ ] Replace the stand-in with the real API, or replay recorded responses
+"""
+
+CANNED_REPLY = ("Stand-in reply from api_standin.py to a {prompt_chars}-character prompt for {model}. "
+                "Nothing here came from a model. ")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+
+def _prompt_text(body: dict) -> str:
+    """Everything the request asks, as plain text (system and messages)."""
+    parts = []
+    system = body.get("system")
+    for value in [system] + [m.get("content") for m in body.get("messages") or [] if isinstance(m, dict)]:
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, list):
+            parts.extend(b.get("text", "") for b in value if isinstance(b, dict))
+    return "\n".join(parts)
+
+
+def cache_prefix(body: dict) -> str | None:
+    """The prompt up to its last cache_control breakpoint, or None.
+
+    Blocks are taken in the API's order: system, then each message's content.
+    """
+    blocks = []
+    for value in [body.get("system")] + [m.get("content") for m in body.get("messages") or [] if isinstance(m, dict)]:
+        if isinstance(value, str):
+            blocks.append({"text": value})
+        elif isinstance(value, list):
+            blocks.extend(b for b in value if isinstance(b, dict))
+    parts = []
+    prefix = None
+    for block in blocks:
+        parts.append(block.get("text", ""))
+        if block.get("cache_control"):
+            prefix = "\n".join(parts)
+    return prefix
+
+
+def request_key(body: dict) -> str:
+    """The recording key for a request: a hash of what decides its answer."""
+    fields = {k: body.get(k) for k in MATCH_FIELDS if k in body}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _message(model: str, text: str, input_tokens: int, max_tokens: int | None) -> dict:
+    stop_reason = "end_turn"
+    if max_tokens and estimate_tokens(text) > max_tokens:
+        text = text[:max_tokens * 4]
+        stop_reason = "max_tokens"
+    return {
+        "id": f"msg_standin_{random.getrandbits(48):012x}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": stop_reason,
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": estimate_tokens(text),
+                  "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0},
+    }
+
+
+def canned_message(body: dict) -> dict:
+    """The built-in answer: a handoff for a handoff prompt, else a short reply."""
+    prompt = _prompt_text(body)
+    model = body.get("model", "unknown")
+    fields = dict(date=datetime.now().strftime("%Y-%m-%d"), prompt_chars=len(prompt), model=model)
+    if "SHORT_TITLE" in prompt:
+        text = CANNED_HANDOFF.format(**fields)
+    else:
+        text = (CANNED_REPLY.format(**fields) * 3).strip()
+    return _message(model, text, estimate_tokens(prompt), body.get("max_tokens"))
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def stream_events(message: dict):
+    """The SSE events that stream `message`, as (bytes, output tokens in them)."""
+    usage = message.get("usage") or {}
+    start = dict(message, content=[], stop_reason=None, stop_sequence=None,
+                 usage=dict(usage, output_tokens=1))
+    yield _sse("message_start", {"type": "message_start", "message": start}), 0
+    yield _sse("ping", {"type": "ping"}), 0
+    for index, block in enumerate(message.get("content") or []):
+        text = block.get("text", "") if isinstance(block, dict) else ""
+        yield _sse("content_block_start", {"type": "content_block_start", "index": index,
+                                           "content_block": {"type": "text", "text": ""}}), 0
+        step = CHUNK_TOKENS * 4
+        for i in range(0, len(text), step):
+            delta = {"type": "text_delta", "text": text[i:i + step]}
+            yield _sse("content_block_delta", {"type": "content_block_delta", "index": index,
+                                               "delta": delta}), CHUNK_TOKENS
+        yield _sse("content_block_stop", {"type": "content_block_stop", "index": index}), 0
+    yield _sse("message_delta", {"type": "message_delta",
+                                 "delta": {"stop_reason": message.get("stop_reason", "end_turn"),
+                                           "stop_sequence": message.get("stop_sequence")},
+                                 "usage": {"output_tokens": usage.get("output_tokens", 0)}}), 0
+    yield _sse("message_stop", {"type": "message_stop"}), 0
+
+
+def message_from_events(lines) -> dict | None:
+    """Rebuild the final message from a stream's `data:` lines (for recording)."""
+    message = None
+    texts = {}
+    for line in lines:
+        if not line.startswith("data:"):
+            continue
+        try:
+            event = json.loads(line[5:])
+        except json.JSONDecodeError:
+            continue
+        kind = event.get("type")
+        if kind == "message_start":
+            message = event.get("message") or {}
+        elif kind == "content_block_delta" and event.get("delta", {}).get("type") == "text_delta":
+            texts[event.get("index", 0)] = texts.get(event.get("index", 0), "") + event["delta"].get("text", "")
+        elif kind == "message_delta" and message is not None:
+            message.update(event.get("delta") or {})
+            message.setdefault("usage", {}).update(event.get("usage") or {})
+    if message is None:
+        return None
+    message["content"] = [{"type": "text", "text": texts[i]} for i in sorted(texts)]
+    return message
+
+
+class Recordings:
+    """Recorded responses in a directory, one JSON file per request key."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._next = Counter()
+
+    def save(self, key: str, body: dict, message: dict, ttft_ms: float, ms: float):
+        self.path.mkdir(parents=True, exist_ok=True)
+        prompt = _prompt_text(body)
+        record = {
+            "recorded": datetime.now().isoformat(timespec="seconds"),
+            "model": body.get("model"),
+            "prompt_chars": len(prompt),
+            "prompt_head": prompt[:200],
+            "ttft_ms": round(ttft_ms, 1),
+            "ms": round(ms, 1),
+            "message": message,
+        }
+        tmp = self.path / f".{key}.tmp"
+        tmp.write_text(json.dumps(record, indent=1), encoding="utf-8")
+        tmp.replace(self.path / f"{key}.json")
+
+    def _load(self, path: Path) -> dict | None:
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+            return None
+        return record if isinstance(record, dict) and isinstance(record.get("message"), dict) else None
+
+    def find(self, key: str, model: str | None, loose: bool) -> dict | None:
+        """The recording for `key`; with `loose`, else the next one (round
+        robin) recorded for the same model."""
+        record = self._load(self.path / f"{key}.json")
+        if record is not None or not loose:
+            return record
+        candidates = sorted(self.path.glob("*.json"))
+        with self._lock:
+            for _ in range(len(candidates)):
+                path = candidates[self._next[model] % len(candidates)]
+                self._next[model] += 1
+                record = self._load(path)
+                if record is not None and record.get("model") == model:
+                    return record
+        return None
+
+
+class Standin:
+    """What the server does with a request; set up once from the CLI."""
+
+    def __init__(self, args):
+        self.latency_ms = args.latency
+        self.tokens_per_sec = args.tokens_per_sec
+        self.jitter = args.jitter
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.hang_rate = args.hang_rate
+        self.cut_rate = args.cut_rate
+        self.fail_models = {}
+        for spec in args.fail_model or []:
+            name, _, status = spec.partition(":")
+            self.fail_models[name] = int(status) if status.isdigit() else 404
+        self.upstream = args.upstream.rstrip("/")
+        self.record = Recordings(Path(args.record).expanduser()) if args.record else None
+        self.replay = Recordings(Path(args.replay).expanduser()) if args.replay else None
+        self.loose = args.loose
+        self.strict = args.strict
+        self.random = random.Random(args.seed)
+        self.stats = Counter()
+        self.cache_min_tokens = args.cache_min_tokens
+        self._cache = {}  # (model, prefix hash) -> expiry
+        self._lock = threading.Lock()
+
+    def cache_usage(self, body: dict, model: str) -> tuple[int, int]:
+        """(tokens read from the prompt cache, tokens written to it) for a request."""
+        prefix = cache_prefix(body)
+        if prefix is None or estimate_tokens(prefix) < self.cache_min_tokens:
+            return 0, 0
+        key = (model, hashlib.sha1(prefix.encode("utf-8")).hexdigest())
+        now = time.monotonic()
+        with self._lock:
+            hit = self._cache.get(key, 0) > now
+            self._cache[key] = now + CACHE_TTL
+        self.count("cache read" if hit else "cache write")
+        tokens = estimate_tokens(prefix)
+        return (tokens, 0) if hit else (0, tokens)
+
+    def count(self, *names: str):
+        with self._lock:
+            self.stats.update(names)
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self.random.random() < rate
+
+    def vary(self, value: float) -> float:
+        if not self.jitter:
+            return value
+        with self._lock:
+            return max(value * (1 + self.random.uniform(-self.jitter, self.jitter)), 0)
+
+    def pace(self, record: dict | None) -> tuple[float, float]:
+        """(seconds to first byte, output tokens per second) for a response;
+        a replayed one keeps its recorded pace unless the CLI set one."""
+        ttft_ms = self.latency_ms
+        tokens_per_sec = self.tokens_per_sec
+        if record is not None:
+            output = (record["message"].get("usage") or {}).get("output_tokens", 0)
+            if ttft_ms is None:
+                ttft_ms = record.get("ttft_ms")
+            if tokens_per_sec is None and output:
+                body_ms = record.get("ms", 0) - record.get("ttft_ms", 0)
+                # A plain response was recorded whole: its time is all ttft
+                tokens_per_sec = output / (body_ms / 1000) if body_ms > 0 else float("inf")
+        ttft_ms = DEFAULT_LATENCY_MS if ttft_ms is None else ttft_ms
+        tokens_per_sec = tokens_per_sec or DEFAULT_TOKENS_PER_SEC
+        return self.vary(ttft_ms) / 1000, self.vary(tokens_per_sec)
+
+
+class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so streams are chunked: a stream cut short is then a broken
+    # response to the client, as it would be from the real API, not an
+    # early but clean end
+    protocol_version = "HTTP/1.1"
+    server_version = "api-standin"
+    standin: Standin = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _log(self, model: str, stream: bool, outcome: str, started: float):
+        ms = (time.perf_counter() - started) * 1000
+        print(f"{datetime.now().strftime('%H:%M:%S')} {model or '-':<28} "
+              f"{'stream' if stream else 'plain ':<6} {outcome:<10} {ms:>7.0f} ms", file=sys.stderr, flush=True)
+
+    def _json(self, status: int, payload: dict, headers: dict | None = None):
+        self._json_bytes(status, json.dumps(payload).encode("utf-8"), headers)
+
+    def _json_bytes(self, status: int, data: bytes, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("request-id", f"req_standin_{random.getrandbits(48):012x}")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str):
+        headers = {"retry-after": "1"} if status == 429 else {}
+        if status in (429, 529):
+            headers["x-should-retry"] = "true"
+        self._json(status, {"type": "error", "error": {"type": ERROR_TYPES.get(status, "api_error"),
+                                                       "message": message}}, headers)
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("request-id", f"req_standin_{random.getrandbits(48):012x}")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.standin._lock:
+                self._json(200, dict(self.standin.stats))
+        else:
+            self._error(404, f"no route for GET {self.path}")
+
+    def do_POST(self):
+        started = time.perf_counter()
+        standin = self.standin
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._error(400, "request body is not JSON")
+            return
+        if self.path.split("?")[0].rstrip("/") != "/v1/messages":
+            self._error(404, f"no route for POST {self.path}")
+            return
+        if not isinstance(body, dict) or not body.get("model") or not isinstance(body.get("messages"), list):
+            self._error(400, "model and messages are required")
+            return
+
+        model = body["model"]
+        stream = bool(body.get("stream"))
+        standin.count("requests")
+        try:
+            outcome = self._respond(body, model, stream)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up: a deadline, or a hedge that lost the race
+            self.close_connection = True
+            outcome = "abandoned"
+        standin.count(outcome)
+        self._log(model, stream, outcome, started)
+
+    def _respond(self, body: dict, model: str, stream: bool) -> str:
+        """Answer one request; returns its outcome for the log and /stats."""
+        standin = self.standin
+        if model in standin.fail_models:
+            status = standin.fail_models[model]
+            time.sleep(standin.pace(None)[0])
+            self._error(status, f"model: {model}" if status == 404 else f"{model} is unavailable (stand-in)")
+            return f"error {status}"
+        # The prompt is read (and its prefix cached) before any answer, even one that never comes
+        cache_read, cache_write = standin.cache_usage(body, model)
+        if standin.roll(standin.hang_rate):
+            time.sleep(HANG_SECONDS)
+            self.close_connection = True
+            return "hung"
+        if standin.roll(standin.error_rate):
+            time.sleep(standin.pace(None)[0])
+            self._error(standin.error_status, f"injected {standin.error_status} (stand-in)")
+            return f"error {standin.error_status}"
+
+        if standin.record is not None:
+            return self._proxy(body, model, stream)
+
+        record = None
+        if standin.replay is not None:
+            record = standin.replay.find(request_key(body), model, standin.loose)
+            if record is None and standin.strict:
+                self._error(500, f"no recording for this {model} request (stand-in --strict)")
+                return "miss"
+        if record is not None:
+            message = dict(record["message"], model=model)
+        else:
+            message = canned_message(body)
+            usage = message["usage"]
+            usage["input_tokens"] = max(usage["input_tokens"] - cache_read - cache_write, 0)
+            usage["cache_read_input_tokens"] = cache_read
+            usage["cache_creation_input_tokens"] = cache_write
+        ttft, tokens_per_sec = standin.pace(record)
+        outcome = "replayed" if record is not None else ("miss" if standin.replay is not None else "canned")
+
+        if not stream:
+            output = (message.get("usage") or {}).get("output_tokens", 0)
+            time.sleep(ttft + output / tokens_per_sec)
+            self._json(200, message)
+            return outcome
+
+        time.sleep(ttft)
+        self._start_stream()
+        events = list(stream_events(message))
+        cut_at = len(events) // 2 if standin.roll(standin.cut_rate) else None
+        for i, (data, tokens) in enumerate(events):
+            if i == cut_at:
+                self.close_connection = True
+                return "cut"
+            if tokens:
+                time.sleep(tokens / tokens_per_sec)
+            self._chunk(data)
+        self.wfile.write(b"0\r\n\r\n")
+        return outcome
+
+    def _proxy(self, body: dict, model: str, stream: bool) -> str:
+        """Forward to the real API, relay its answer, and record it."""
+        standin = self.standin
+        headers = {"content-type": "application/json"}
+        headers.update({name: self.headers[name] for name in FORWARD_HEADERS if self.headers.get(name)})
+        request = urllib.request.Request(f"{standin.upstream}/v1/messages", method="POST",
+                                         data=json.dumps(body).encode("utf-8"), headers=headers)
+        started = time.perf_counter()
+        try:
+            response = urllib.request.urlopen(request, timeout=600)
+        except urllib.error.HTTPError as e:
+            data = e.read()
+            self.send_response(e.code)
+            for name in ("content-type", "retry-after", "request-id", "x-should-retry"):
+                if e.headers.get(name):
+                    self.send_header(name, e.headers[name])
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return f"error {e.code}"
+        except (urllib.error.URLError, OSError) as e:
+            self._error(500, f"upstream {standin.upstream} unreachable: {e}")
+            return "error 500"
+
+        with response:
+            if not stream:
+                data = response.read()
+                ms = (time.perf_counter() - started) * 1000
+                self._json_bytes(200, data)
+                try:
+                    standin.record.save(request_key(body), body, json.loads(data), ms, ms)
+                except (ValueError, OSError):
+                    return "unrecorded"
+                return "recorded"
+
+            self._start_stream()
+            lines = []
+            ttft_ms = None
+            event = b""
+            for raw in response:
+                line = raw.decode("utf-8", "replace").rstrip("\r\n")
+                lines.append(line)
+                if ttft_ms is None and '"content_block_delta"' in line:
+                    ttft_ms = (time.perf_counter() - started) * 1000
+                event += raw
+                if not line:
+                    self._chunk(event)
+                    event = b""
+            if event:
+                self._chunk(event)
+            self.wfile.write(b"0\r\n\r\n")
+        ms = (time.perf_counter() - started) * 1000
+        message = message_from_events(lines)
+        if message is None:
+            return "unrecorded"
+        try:
+            standin.record.save(request_key(body), body, message, ttft_ms or ms, ms)
+        except OSError:
+            return "unrecorded"
+        return "recorded"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic Messages API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"default {DEFAULT_PORT}")
+    parser.add_argument("--latency", type=float, help=f"ms to the first byte (default {DEFAULT_LATENCY_MS})")
+    parser.add_argument("--tokens-per-sec", type=float,
+                        help=f"output pace after the first byte (default {DEFAULT_TOKENS_PER_SEC})")
+    parser.add_argument("--jitter", type=float, default=0.0, help="vary latency and pace by up to this fraction")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that get an error")
+    parser.add_argument("--error-status", type=int, default=529, choices=sorted(ERROR_TYPES),
+                        help="status of injected errors (default 529)")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction of requests never answered")
+    parser.add_argument("--cut-rate", type=float, default=0.0, help="fraction of streams cut off halfway")
+    parser.add_argument("--fail-model", action="append", metavar="NAME[:STATUS]",
+                        help="always fail this model (default status 404; repeatable)")
+    parser.add_argument("--seed", type=int, help="seed the fault draws")
+    parser.add_argument("--cache-min-tokens", type=int, default=DEFAULT_CACHE_MIN_TOKENS,
+                        help=f"shortest prompt prefix the cache keeps (default {DEFAULT_CACHE_MIN_TOKENS})")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="DIR", help="proxy to the real API and save responses here")
+    mode.add_argument("--replay", metavar="DIR", help="answer from responses saved with --record")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM, help=f"real API for --record (default {DEFAULT_UPSTREAM})")
+    parser.add_argument("--loose", action="store_true", help="replay: answer a miss from another recording of the model")
+    parser.add_argument("--strict", action="store_true", help="replay: answer a miss with an error")
+    args = parser.parse_args()
+
+    Handler.standin = Standin(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    mode = f"recording to {args.record}" if args.record else (
+        f"replaying {args.replay}" if args.replay else "canned responses")
+    print(f"API stand-in on http://{args.host}:{server.server_address[1]} ({mode})", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Approval Decision Cache
+
+Agents issue the same Bash commands over and over (git status, git diff,
+ls, pytest ...). This caches auto_approve's verdict per command so repeats
+skip the lexer and regex work entirely.
+
+- Key: sha1 of the policy version + the command. The policy version is a
+  hash of the merged pattern lists (see approval_policy.py), so editing
+  approval_policy.json or a project's overrides invalidates every entry.
+  auto_approve.py adds its EVALUATOR_VERSION to it, so a fix to the lexer
+  does too.
+- The command is only stripped, never otherwise normalized: whitespace
+  inside a command can change its meaning (tab-indented heredoc
+  terminators), and a cache must never turn a "no" into a "yes".
+- Shared across hook processes through a small SQLite file in
+  ~/.claude/hooks/.state, bounded to MAX_ENTRIES with least-recently-used
+  eviction. Long-lived callers (approve_daemon.py) also keep an in-memory
+  copy in front of it.
+
+Set MOTHER_CLAUDE_APPROVE_CACHE=0 to disable. Any SQLite error just means
+a cache miss — the cache can slow a decision down, never change it.
+
+CLI:
+    python approval_cache.py           # hit rate and size
+    python approval_cache.py --clear   # drop all entries and counters
+"""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
+CACHE_PATH = HOOKS_STATE_DIR / "approval_cache.sqlite"
+
+MAX_ENTRIES = 2000
+MEMORY_ENTRIES = 512
+
+# Don't rewrite an entry's last-used time on every hit; this is plenty for LRU
+TOUCH_INTERVAL = 60.0
+
+
+def cache_key(policy_version: str, command: str) -> str:
+    return hashlib.sha1(f"{policy_version}\0{command.strip()}".encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """Bounded LRU of command -> safe/unsafe, backed by SQLite."""
+
+    def __init__(self, path: Path = CACHE_PATH, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS decisions ("
+                "key TEXT PRIMARY KEY, safe INTEGER NOT NULL, used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS decisions_used ON decisions(used)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, safe: bool):
+        self.memory[key] = safe
+        self.memory.move_to_end(key)
+        while len(self.memory) > MEMORY_ENTRIES:
+            self.memory.popitem(last=False)
+
+    def _count(self, conn, name: str):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, policy_version: str, command: str) -> bool | None:
+        """Cached verdict for the command, or None on a miss."""
+        key = cache_key(policy_version, command)
+        try:
+            conn = self._connect()
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self._count(conn, "hits")
+                return self.memory[key]
+
+            row = conn.execute("SELECT safe, used FROM decisions WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            with conn:
+                if row is None:
+                    self._count(conn, "misses")
+                    return None
+                self._count(conn, "hits")
+                if now - row[1] > TOUCH_INTERVAL:
+                    conn.execute("UPDATE decisions SET used = ? WHERE key = ?", (now, key))
+            self._remember(key, bool(row[0]))
+            return bool(row[0])
+        except sqlite3.Error:
+            return None
+
+    def put(self, policy_version: str, command: str, safe: bool):
+        key = cache_key(policy_version, command)
+        self._remember(key, safe)
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO decisions (key, safe, used) VALUES (?, ?, ?)",
+                    (key, int(safe), time.time()),
+                )
+                excess = conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    conn.execute(
+                        "DELETE FROM decisions WHERE key IN "
+                        "(SELECT key FROM decisions ORDER BY used LIMIT ?)",
+                        (excess,),
+                    )
+        except sqlite3.Error:
+            pass
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": conn.execute("SELECT COUNT(*) FROM decisions").fetchone()[0],
+            "max_entries": self.max_entries,
+        }
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM decisions")
+            conn.execute("DELETE FROM counters")
+        self.memory.clear()
+
+
+_cache = None
+
+
+def get_cache() -> DecisionCache | None:
+    """The process-wide cache, or None when disabled."""
+    global _cache
+    if os.environ.get("MOTHER_CLAUDE_APPROVE_CACHE", "1") == "0":
+        return None
+    if _cache is None:
+        _cache = DecisionCache()
+    return _cache
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Auto-approve decision cache")
+    parser.add_argument("--clear", action="store_true", help="drop all cached decisions and counters")
+    args = parser.parse_args()
+
+    cache = DecisionCache()
+    try:
+        if args.clear:
+            cache.clear()
+            print("Decision cache cleared")
+            return
+        stats = cache.stats()
+    except sqlite3.Error as e:
+        print(f"Error reading {CACHE_PATH}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Cache: {CACHE_PATH}")
+    print(f"Entries: {stats['entries']} / {stats['max_entries']}")
+    print(f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit rate: {stats['hit_rate']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Approval Policy
+
+Loads the auto-approve policy used by auto_approve.py and compiles it for
+fast matching.
+
+SOURCES (merged in this order):
+1. approval_policy.json next to this script (the global policy)
+2. "approval_policy" in <project>/.claude/project.json — patterns here are
+   APPENDED to the global lists:
+
+    {
+      "approval_policy": {
+        "safe_bash_patterns": ["^make\\\\s+test"],
+        "dangerous_patterns": ["\\\\bterraform\\\\s+apply"]
+      }
+    }
+
+A project can only make the policy stricter on its own. Its dangerous
+patterns always apply, but project.json ships with the repo, so its safe
+patterns would let any cloned repo auto-approve whatever it likes. They are
+ignored (with a warning) unless the project is listed in the user-level
+approval_policy.json:
+
+    "trusted_projects": ["~/code/my-service"]    # and directories below
+
+Either list may also be an object of named groups of patterns (the shipped
+approval_policy.json uses this for readability). Keys starting with "_" are
+ignored.
+
+COMPILATION:
+Each list is compiled into ONE case-insensitive alternation, so checking a
+segment is a single regex search instead of one search per pattern. Every
+alternative is a named group (s0, s1, ... / d0, d1, ...), which lets callers
+tell which pattern matched.
+
+Safe patterns that start with a literal command word (^git\\s, ^ls(\\s|$),
+^pwd$) are also bucketed by that word, so a segment whose first word is
+"git" is only searched against the git patterns plus the patterns with no
+literal head (^pytest, ^printenv, ...).
+
+The merged pattern lists are cached under ~/.claude/hooks/.state and reused
+until a source file's mtime changes.
+
+Because patterns are joined into one regex, they must not use inline global
+flags like (?i) or numbered backreferences — both change meaning once merged.
+
+CLI:
+    python approval_policy.py [--cwd PATH]    # show the merged policy summary
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
+GLOBAL_POLICY_PATH = Path(__file__).resolve().with_name("approval_policy.json")
+
+# Bump when the cache layout or merge rules change so old caches are ignored
+CACHE_FORMAT = 2
+
+
+class CompiledPolicy:
+    """A merged policy with each pattern list compiled into one alternation."""
+
+    def __init__(self, safe_patterns: list[str], dangerous_patterns: list[str], version: str):
+        self.safe_patterns = safe_patterns
+        self.dangerous_patterns = dangerous_patterns
+        self.version = version
+        self.dangerous_re = _combine(dangerous_patterns, "d")
+        self._safe_re = None
+
+        # First-word dispatch. Buckets are compiled on first use: a hook
+        # process usually sees one command, so compiling every bucket up
+        # front would cost more than it saves.
+        self._heads: dict[str, list[int]] = {}
+        self._generic: list[int] = []
+        for i, pattern in enumerate(safe_patterns):
+            head = _literal_head(pattern)
+            if head:
+                self._heads.setdefault(head, []).append(i)
+            else:
+                self._generic.append(i)
+        self._compiled_heads = {}
+
+    @property
+    def safe_re(self):
+        if self._safe_re is None:
+            self._safe_re = _combine(self.safe_patterns, "s")
+        return self._safe_re
+
+    def _safe_re_for(self, head: str):
+        head = head.lower()
+        if head not in self._heads:
+            head = ""  # only the patterns without a literal head can match
+        if head not in self._compiled_heads:
+            indexes = self._heads.get(head, []) + self._generic
+            self._compiled_heads[head] = _combine_indexed(self.safe_patterns, indexes, "s")
+        return self._compiled_heads[head]
+
+    def is_dangerous(self, command: str) -> bool:
+        return self.dangerous_re is not None and self.dangerous_re.search(command) is not None
+
+    def match_dangerous(self, command: str) -> int | None:
+        """Index into dangerous_patterns of the pattern that matched, or None."""
+        return _matched_index(self.dangerous_re, command)
+
+    def match_safe(self, segment: str, head: str | None = None) -> int | None:
+        """Index into safe_patterns of the pattern that matched, or None.
+
+        Pass the segment's first word as `head` to search only the patterns
+        that can possibly match it.
+        """
+        if head is None:
+            return _matched_index(self.safe_re, segment)
+        return _matched_index(self._safe_re_for(head), segment)
+
+
+def _combine(patterns: list[str], prefix: str):
+    return _combine_indexed(patterns, range(len(patterns)), prefix)
+
+
+def _combine_indexed(patterns: list[str], indexes, prefix: str):
+    """Join the chosen patterns into one alternation, keeping their list index in the group name."""
+    alternatives = [f"(?P<{prefix}{i}>{patterns[i]})" for i in sorted(indexes)]
+    if not alternatives:
+        return None
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
+# ^word followed by \s, (\s|$), (?:\s|$) or end of pattern: the pattern can
+# only match text whose first shell word is exactly `word`
+_LITERAL_HEAD = re.compile(r'^\^([A-Za-z0-9_-]+)(?:\\s|\(\?:\\s\|\$\)|\(\\s\|\$\)|\$$)')
+
+
+def _literal_head(pattern: str) -> str | None:
+    match = _LITERAL_HEAD.match(pattern)
+    return match.group(1).lower() if match else None
+
+
+def _matched_index(compiled, text: str) -> int | None:
+    if compiled is None:
+        return None
+    match = compiled.search(text)
+    if match is None:
+        return None
+    # The outer named group closes last, so lastgroup is the alternative
+    # that matched even when the pattern has groups of its own
+    return int(match.lastgroup[1:])
+
+
+def _flatten(patterns) -> list[str]:
+    """Accept a list of patterns or an object of named groups of patterns."""
+    if isinstance(patterns, dict):
+        flat = []
+        for key, group in patterns.items():
+            if not key.startswith("_"):
+                flat.extend(_flatten(group))
+        return flat
+    if isinstance(patterns, list):
+        return [p for p in patterns if isinstance(p, str)]
+    return []
+
+
+def _valid(patterns: list[str], source: str) -> list[str]:
+    """Drop patterns that don't compile, so one typo can't disable the policy."""
+    valid = []
+    for pattern in patterns:
+        try:
+            re.compile(pattern, re.IGNORECASE)
+            valid.append(pattern)
+        except re.error as e:
+            print(f"approval_policy: ignoring invalid pattern {pattern!r} from {source}: {e}", file=sys.stderr)
+    return valid
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError, IOError):
+        return {}
+
+
+def _source_paths(cwd: str | None) -> list[Path]:
+    paths = [GLOBAL_POLICY_PATH]
+    if cwd:
+        paths.append(Path(cwd) / ".claude" / "project.json")
+    return paths
+
+
+def _source_mtimes(paths: list[Path]) -> dict[str, int]:
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[str(path)] = path.stat().st_mtime_ns
+        except OSError:
+            mtimes[str(path)] = 0
+    return mtimes
+
+
+def _cache_path(cwd: str | None) -> Path:
+    key = hashlib.md5((cwd or "").encode()).hexdigest()[:16]
+    return HOOKS_STATE_DIR / f"approval_policy_{key}.json"
+
+
+def _merge(cwd: str | None) -> tuple[list[str], list[str]]:
+    global_policy = _read_json(GLOBAL_POLICY_PATH)
+    if not global_policy:
+        print(f"approval_policy: no global policy at {GLOBAL_POLICY_PATH} — nothing will be auto-approved",
+              file=sys.stderr)
+    safe = _valid(_flatten(global_policy.get("safe_bash_patterns", [])), GLOBAL_POLICY_PATH.name)
+    dangerous = _valid(_flatten(global_policy.get("dangerous_patterns", [])), GLOBAL_POLICY_PATH.name)
+
+    if cwd:
+        project_path = Path(cwd) / ".claude" / "project.json"
+        overrides = _read_json(project_path).get("approval_policy", {})
+        if isinstance(overrides, dict):
+            dangerous += _valid(_flatten(overrides.get("dangerous_patterns", [])), str(project_path))
+            project_safe = _flatten(overrides.get("safe_bash_patterns", []))
+            if project_safe and _trusted(cwd, global_policy.get("trusted_projects")):
+                safe += _valid(project_safe, str(project_path))
+            elif project_safe:
+                print(f"approval_policy: ignoring {len(project_safe)} safe pattern(s) from {project_path} — "
+                      f"add the project to \"trusted_projects\" in {GLOBAL_POLICY_PATH.name} to allow them",
+                      file=sys.stderr)
+
+    return safe, dangerous
+
+
+def _trusted(cwd: str, trusted_projects) -> bool:
+    """Whether cwd is, or is inside, a directory in the user's trusted_projects."""
+    if not isinstance(trusted_projects, list):
+        return False
+    project = Path(cwd).resolve()
+    for entry in trusted_projects:
+        if not isinstance(entry, str) or not entry:
+            continue
+        trusted = Path(entry).expanduser().resolve()
+        if project == trusted or trusted in project.parents:
+            return True
+    return False
+
+
+def _policy_version(safe: list[str], dangerous: list[str]) -> str:
+    blob = json.dumps([safe, dangerous]).encode()
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+
+def _load_cached(cache_path: Path, mtimes: dict[str, int]):
+    cached = _read_json(cache_path)
+    if cached.get("format") != CACHE_FORMAT or cached.get("sources") != mtimes:
+        return None
+    safe = cached.get("safe_bash_patterns")
+    dangerous = cached.get("dangerous_patterns")
+    if not isinstance(safe, list) or not isinstance(dangerous, list):
+        return None
+    return safe, dangerous, cached.get("version") or _policy_version(safe, dangerous)
+
+
+def _save_cached(cache_path: Path, mtimes: dict[str, int], policy: CompiledPolicy):
+    payload = {
+        "format": CACHE_FORMAT,
+        "sources": mtimes,
+        "version": policy.version,
+        "safe_bash_patterns": policy.safe_patterns,
+        "dangerous_patterns": policy.dangerous_patterns,
+    }
+    try:
+        HOOKS_STATE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def load_policy_file(path: str | Path) -> CompiledPolicy:
+    """Compile a standalone policy file (same format as approval_policy.json), uncached.
+
+    For tooling that compares policy versions, e.g. approve_replay.py.
+    """
+    data = _read_json(Path(path))
+    if not data:
+        raise ValueError(f"no policy found in {path}")
+    safe = _valid(_flatten(data.get("safe_bash_patterns", [])), str(path))
+    dangerous = _valid(_flatten(data.get("dangerous_patterns", [])), str(path))
+    return CompiledPolicy(safe, dangerous, _policy_version(safe, dangerous))
+
+
+# In-process memo for long-lived callers (approve_daemon.py): cwd -> (mtimes, policy)
+_loaded: dict[str, tuple[dict[str, int], CompiledPolicy]] = {}
+
+
+def load_policy(cwd: str | None = None) -> CompiledPolicy:
+    """Return the compiled policy for a project, reusing caches while sources are unchanged."""
+    paths = _source_paths(cwd)
+    mtimes = _source_mtimes(paths)
+
+    memo = _loaded.get(cwd or "")
+    if memo and memo[0] == mtimes:
+        return memo[1]
+
+    cache_path = _cache_path(cwd)
+    cached = _load_cached(cache_path, mtimes)
+    if cached:
+        policy = CompiledPolicy(*cached)
+    else:
+        safe, dangerous = _merge(cwd)
+        policy = CompiledPolicy(safe, dangerous, _policy_version(safe, dangerous))
+        _save_cached(cache_path, mtimes, policy)
+
+    _loaded[cwd or ""] = (mtimes, policy)
+    return policy
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show the merged auto-approve policy")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current)")
+    args = parser.parse_args()
+
+    policy = load_policy(args.cwd)
+    print(f"Policy version: {policy.version}")
+    print(f"Safe patterns: {len(policy.safe_patterns)}")
+    print(f"Dangerous patterns: {len(policy.dangerous_patterns)}")
+    print(f"Sources: {', '.join(str(p) for p in _source_paths(args.cwd))}")
+
+
+if __name__ == "__main__":
+    main()
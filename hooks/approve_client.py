@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Auto-Approve Client
+
+Drop-in replacement for auto_approve.py as the PermissionRequest hook
+command. Forwards the hook payload to approve_daemon.py over a Unix socket
+and prints its answer, so the hook never imports or compiles the policy.
+
+If no daemon is answering (first call, idle exit, Windows), the payload is
+evaluated in-process with auto_approve.decide() — same answer, just slower —
+and a daemon is started in the background for the next call.
+
+SETUP:
+    "command": "python -S ~/.claude/hooks/approve_client.py"
+
+(-S skips site-packages setup; this script only needs the standard library.)
+Set MOTHER_CLAUDE_APPROVE_DAEMON=0 to never spawn the daemon.
+"""
+
+import os
+import socket
+import sys
+
+SOCKET_PATH = os.path.join(os.path.expanduser("~"), ".claude", "hooks", ".state", "auto_approve.sock")
+
+# Well inside the hook's 5s budget, with room left for the in-process fallback
+CONNECT_TIMEOUT = 1.0
+
+
+def ask_daemon(payload: bytes) -> bytes:
+    """Send the payload to the daemon and return its raw response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(SOCKET_PATH)
+        sock.sendall(payload)
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+
+def spawn_daemon():
+    """Start approve_daemon.py detached from this hook process."""
+    import subprocess
+
+    daemon = os.path.join(os.path.dirname(os.path.abspath(__file__)), "approve_daemon.py")
+    try:
+        subprocess.Popen(
+            [sys.executable, daemon],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def evaluate_in_process(payload: bytes):
+    import json
+    import hook_metrics
+    from auto_approve import decide
+
+    try:
+        hook_input = json.loads(payload)
+    except json.JSONDecodeError:
+        sys.exit(1)
+    hook_metrics.start("auto_approve", tool=hook_input.get("tool_name", ""), via="fallback")
+    return decide(hook_input)
+
+
+def main():
+    payload = sys.stdin.buffer.read()
+
+    if hasattr(socket, "AF_UNIX"):
+        try:
+            response = ask_daemon(payload)
+            if response:
+                sys.stdout.write(response.decode("utf-8") + "\n")
+            sys.exit(0)
+        except OSError:
+            if os.environ.get("MOTHER_CLAUDE_APPROVE_DAEMON", "1") != "0":
+                spawn_daemon()
+
+    response = evaluate_in_process(payload)
+    if response:
+        print(response)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
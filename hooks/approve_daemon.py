@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Auto-Approve Daemon
+
+Long-lived evaluator for auto_approve.py. Every PermissionRequest otherwise
+starts a fresh Python, imports re, and recompiles the whole pattern list
+before answering — all inside the hook's 5s timeout, once per tool call, per
+worker session. The daemon pays that cost once and answers over a Unix domain
+socket; approve_client.py is the hook-side shim.
+
+USAGE:
+    python approve_daemon.py            # run in the foreground
+    python approve_daemon.py --status   # is a daemon answering?
+    python approve_daemon.py --stop     # ask the running daemon to exit
+
+You normally never start it by hand: approve_client.py evaluates in-process
+when no daemon is answering and spawns one in the background for next time.
+The daemon exits on its own after IDLE_TIMEOUT seconds without a request.
+
+Edits to auto_approve.py and its policy/cache modules are picked up without a
+restart (the modules are reloaded when their mtime changes), and
+approval_policy.json edits are picked up by load_policy() itself.
+
+Unix/macOS only — Python has no AF_UNIX on Windows, where approve_client.py
+simply always evaluates in-process.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+from pathlib import Path
+
+HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
+SOCKET_PATH = HOOKS_STATE_DIR / "auto_approve.sock"
+LOCK_PATH = HOOKS_STATE_DIR / "auto_approve.lock"
+
+# Exit after this long without a request so a forgotten daemon doesn't linger
+IDLE_TIMEOUT = 30 * 60
+
+# Per-connection read timeout — a client that never finishes sending must not
+# wedge the (single-threaded) server for everyone else
+CLIENT_TIMEOUT = 1.0
+
+# Largest payload we'll read; hook input is a small JSON object
+MAX_REQUEST_BYTES = 1024 * 1024
+
+STOP_REQUEST = b'{"__daemon__": "stop"}'
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import approval_cache  # noqa: E402
+import hook_metrics  # noqa: E402
+import approval_policy  # noqa: E402
+import auto_approve  # noqa: E402
+
+
+class _Policy:
+    """Holds the loaded policy modules, reloading them when their files change.
+
+    Policy *data* (approval_policy.json, project overrides) is re-validated by
+    approval_policy.load_policy() on every call; this only covers code edits.
+    """
+
+    def __init__(self):
+        self.modules = [approval_cache, approval_policy, auto_approve]  # dependency order
+        self.mtimes = self._mtimes()
+
+    def _mtimes(self) -> list[float]:
+        mtimes = []
+        for module in self.modules:
+            try:
+                mtimes.append(Path(module.__file__).stat().st_mtime)
+            except OSError:
+                mtimes.append(0.0)
+        return mtimes
+
+    def decide(self, hook_input: dict) -> str | None:
+        mtimes = self._mtimes()
+        if mtimes != self.mtimes:
+            try:
+                for module in self.modules:
+                    importlib.reload(module)
+            except Exception as e:
+                # Keep answering with the last good policy
+                print(f"Reload of policy modules failed: {e}", file=sys.stderr)
+            self.mtimes = mtimes
+        return auto_approve.decide(hook_input)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.settimeout(CLIENT_TIMEOUT)
+        chunks = []
+        size = 0
+        try:
+            while size <= MAX_REQUEST_BYTES:
+                chunk = self.request.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        except OSError:
+            return
+        payload = b"".join(chunks)
+
+        if payload.strip() == STOP_REQUEST:
+            self.server.stopping = True
+            return
+
+        try:
+            hook_input = json.loads(payload)
+            hook_metrics.start("auto_approve", tool=hook_input.get("tool_name", ""), via="daemon")
+            response = self.server.policy.decide(hook_input)
+        except Exception:
+            # Malformed input or a policy bug: answer "no decision" and let the
+            # normal permission prompt handle it
+            response = None
+        finally:
+            hook_metrics.finish()
+
+        try:
+            self.request.sendall((response or "").encode("utf-8"))
+        except OSError:
+            pass
+
+
+class _Server(socketserver.UnixStreamServer):
+    timeout = IDLE_TIMEOUT
+
+    def __init__(self, path: str):
+        self.policy = _Policy()
+        self.stopping = False
+        self.idle = False
+        super().__init__(path, _Handler)
+
+    def handle_timeout(self):
+        self.idle = True
+
+
+def _acquire_lock():
+    """Take the single-instance lock, or return None if another daemon holds it."""
+    import fcntl
+
+    lock_file = open(LOCK_PATH, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+def _send(payload: bytes, timeout: float = CLIENT_TIMEOUT) -> bytes:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(SOCKET_PATH))
+        sock.sendall(payload)
+        sock.shutdown(socket.SHUT_WR)
+        return sock.recv(65536)
+
+
+def serve():
+    if not hasattr(socket, "AF_UNIX"):
+        print("approve_daemon: Unix domain sockets are not available on this platform", file=sys.stderr)
+        sys.exit(1)
+
+    HOOKS_STATE_DIR.mkdir(parents=True, exist_ok=True)
+    lock = _acquire_lock()
+    if lock is None:
+        # Another daemon is already serving — nothing to do
+        sys.exit(0)
+
+    # We hold the lock, so any socket file left behind is stale
+    try:
+        SOCKET_PATH.unlink()
+    except FileNotFoundError:
+        pass
+
+    server = _Server(str(SOCKET_PATH))
+    os.chmod(SOCKET_PATH, 0o600)
+    try:
+        while not (server.stopping or server.idle):
+            server.handle_request()
+    finally:
+        server.server_close()
+        try:
+            SOCKET_PATH.unlink()
+        except FileNotFoundError:
+            pass
+        lock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-approve policy daemon")
+    parser.add_argument("--status", action="store_true", help="report whether a daemon is answering")
+    parser.add_argument("--stop", action="store_true", help="stop the running daemon")
+    args = parser.parse_args()
+
+    if args.status or args.stop:
+        try:
+            if args.stop:
+                _send(STOP_REQUEST)
+                print("approve_daemon: stop requested")
+            else:
+                start = time.perf_counter()
+                _send(b'{"tool_name": "Read"}')
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"approve_daemon: running at {SOCKET_PATH} ({elapsed:.1f} ms round trip)")
+        except (OSError, AttributeError):
+            print("approve_daemon: not running")
+            sys.exit(1)
+        return
+
+    serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Approval Policy Replay
+
+Replays real Bash commands from Claude JSONL transcripts through the
+auto-approve policy, so you can see what a pattern change does to real
+traffic before shipping it.
+
+Reports:
+- throughput and p50/p99 evaluation latency (uncached — this measures the
+  policy, not approval_cache.py)
+- approval rate
+- hits per safe pattern and per dangerous pattern
+- with --compare: every command whose decision differs between two policies
+
+USAGE:
+    python approve_replay.py                              # all of ~/.claude/projects
+    python approve_replay.py path/to/session.jsonl dir/   # specific transcripts
+    python approve_replay.py --policy new_policy.json     # try a candidate policy
+    python approve_replay.py --compare new_policy.json    # current vs candidate
+    python approve_replay.py --cwd ~/code/app             # include app's project overrides
+
+Transcripts use the same JSONL format session_handoff.parse_transcript reads;
+commands come from assistant "tool_use" blocks whose name is "Bash".
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from approval_policy import load_policy, load_policy_file
+from auto_approve import ShellSyntaxError, evaluate_bash_command, split_command
+from hook_metrics import percentile
+
+DEFAULT_TRANSCRIPTS_DIR = Path.home() / ".claude" / "projects"
+
+
+def iter_transcripts(paths: list[str]):
+    for raw in paths:
+        path = Path(raw).expanduser()
+        if path.is_dir():
+            yield from sorted(path.rglob("*.jsonl"))
+        elif path.exists():
+            yield path
+        else:
+            print(f"Warning: {path} not found", file=sys.stderr)
+
+
+def extract_bash_commands(transcript_path: Path):
+    """Yield the command of every Bash tool_use block in a transcript."""
+    try:
+        with open(transcript_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if '"tool_use"' not in line:
+                    continue  # cheap pre-filter; most lines are text or tool results
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if entry.get("type") != "assistant":
+                    continue
+                content = entry.get("message", {}).get("content", "")
+                if not isinstance(content, list):
+                    continue
+                for block in content:
+                    if block.get("type") == "tool_use" and block.get("name") == "Bash":
+                        command = block.get("input", {}).get("command", "")
+                        if isinstance(command, str) and command.strip():
+                            yield command
+    except (IOError, UnicodeDecodeError) as e:
+        print(f"Warning: could not read {transcript_path}: {e}", file=sys.stderr)
+
+
+def run_policy(policy, commands: list[str]) -> dict:
+    """Evaluate every command, timing each decision."""
+    decisions = []
+    latencies = []
+    start = time.perf_counter()
+    for command in commands:
+        t0 = time.perf_counter_ns()
+        decisions.append(evaluate_bash_command(command, policy))
+        latencies.append((time.perf_counter_ns() - t0) / 1000)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "decisions": decisions,
+        "elapsed": elapsed,
+        "p50_us": percentile(latencies, 50),
+        "p99_us": percentile(latencies, 99),
+        "approved": sum(decisions),
+    }
+
+
+def pattern_hits(policy, commands: list[str]) -> tuple[Counter, Counter]:
+    """Count which safe pattern matched each segment and which dangerous pattern blocked each command."""
+    safe_hits = Counter()
+    dangerous_hits = Counter()
+    for command in commands:
+        command = command.strip()
+        blocked = policy.match_dangerous(command)
+        if blocked is not None:
+            dangerous_hits[policy.dangerous_patterns[blocked]] += 1
+            continue
+        try:
+            segments = split_command(command)
+        except ShellSyntaxError:
+            continue
+        for segment in segments:
+            matched = policy.match_safe(segment.text, segment.head)
+            if matched is not None:
+                safe_hits[policy.safe_patterns[matched]] += 1
+    return safe_hits, dangerous_hits
+
+
+def print_run(label: str, policy, result: dict, total: int):
+    rate = result["approved"] / total if total else 0.0
+    throughput = total / result["elapsed"] if result["elapsed"] else 0.0
+    print(f"\n{label} (version {policy.version}, {len(policy.safe_patterns)} safe / "
+          f"{len(policy.dangerous_patterns)} dangerous patterns)")
+    print(f"  Throughput:    {throughput:,.0f} commands/s")
+    print(f"  Latency:       p50 {result['p50_us']:.1f} us, p99 {result['p99_us']:.1f} us")
+    print(f"  Approval rate: {rate:.1%} ({result['approved']}/{total})")
+
+
+def print_hits(title: str, hits: Counter, patterns: list[str], top: int):
+    print(f"\n  {title}:")
+    for pattern, count in hits.most_common(top):
+        print(f"    {count:>7}  {pattern}")
+    unused = [p for p in patterns if p not in hits]
+    if unused:
+        print(f"    ({len(unused)} pattern(s) never matched)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay transcript Bash commands through the approval policy")
+    parser.add_argument("paths", nargs="*", help=f"transcripts or directories (default: {DEFAULT_TRANSCRIPTS_DIR})")
+    parser.add_argument("--policy", help="policy file to test instead of the installed one")
+    parser.add_argument("--compare", help="second policy file; print decision diffs against the first")
+    parser.add_argument("--cwd", help="apply this project's .claude/project.json overrides to the installed policy")
+    parser.add_argument("--top", type=int, default=15, help="pattern hit counts to show (default 15)")
+    parser.add_argument("--max-diffs", type=int, default=50, help="decision diffs to list (default 50)")
+    args = parser.parse_args()
+
+    commands = []
+    transcript_count = 0
+    for transcript in iter_transcripts(args.paths or [str(DEFAULT_TRANSCRIPTS_DIR)]):
+        transcript_count += 1
+        commands.extend(extract_bash_commands(transcript))
+
+    if not commands:
+        print("No Bash commands found")
+        sys.exit(0)
+
+    print(f"Replaying {len(commands)} Bash commands ({len(set(commands))} unique) "
+          f"from {transcript_count} transcript(s)")
+
+    policy_a = load_policy_file(args.policy) if args.policy else load_policy(args.cwd)
+    result_a = run_policy(policy_a, commands)
+    print_run(args.policy or "Installed policy", policy_a, result_a, len(commands))
+    safe_hits, dangerous_hits = pattern_hits(policy_a, commands)
+    print_hits("Safe pattern hits (per segment)", safe_hits, policy_a.safe_patterns, args.top)
+    print_hits("Dangerous pattern hits (per command)", dangerous_hits, policy_a.dangerous_patterns, args.top)
+
+    if not args.compare:
+        return
+
+    policy_b = load_policy_file(args.compare)
+    result_b = run_policy(policy_b, commands)
+    print_run(args.compare, policy_b, result_b, len(commands))
+
+    diffs = {}
+    for command, a, b in zip(commands, result_a["decisions"], result_b["decisions"]):
+        if a != b:
+            diffs.setdefault((command, a, b), 0)
+            diffs[(command, a, b)] += 1
+
+    print(f"\nDecision diffs: {sum(diffs.values())} commands ({len(diffs)} unique)")
+    newly_approved = sum(1 for (_, a, b) in diffs if b and not a)
+    print(f"  Newly approved: {newly_approved} unique, newly prompted: {len(diffs) - newly_approved} unique")
+    for (command, a, b), count in sorted(diffs.items(), key=lambda d: -d[1])[:args.max_diffs]:
+        change = "prompt -> APPROVE" if b else "approve -> PROMPT"
+        shown = command if len(command) <= 100 else command[:97] + "..."
+        print(f"  [{change}] x{count}  {shown!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,158 +10,409 @@ SETUP:
 2. No additional dependencies required
 
 CUSTOMIZATION:
-- Add/remove patterns in SAFE_BASH_PATTERNS for your workflow
+- Add/remove patterns in approval_policy.json ("safe_bash_patterns") for your workflow
+- Add patterns to "dangerous_patterns" in approval_policy.json to block specific commands
+- Per-project additions go under "approval_policy" in .claude/project.json
+  (see approval_policy.py); a project's safe patterns only apply once it is
+  listed in "trusted_projects" in approval_policy.json
 - Add/remove tools in always_safe list
-- Add patterns to DANGEROUS_PATTERNS to block specific commands
 """
 
 import json
-import re
 import sys
+from collections import namedtuple
+
+import hook_metrics
+from approval_cache import get_cache
+from approval_policy import load_policy
+
+Segment = namedtuple("Segment", ["text", "head"])
+
+# Part of every cached verdict's key (see approval_cache.py). Bump it with
+# any change to how commands are lexed or evaluated, so verdicts reached by
+# the old logic aren't served after the fix
+EVALUATOR_VERSION = 3
+
+
+class ShellSyntaxError(ValueError):
+    """The command can't be tokenized (unbalanced quote, paren or backtick)."""
+
+
+class _Command:
+    """A simple command being accumulated by the lexer."""
+
+    def __init__(self, start: int):
+        self.start = start
+        self.words = []
+        self.word = None  # chars of the word in progress, None between words
+
+    def add(self, text: str):
+        if self.word is None:
+            self.word = []
+        self.word.append(text)
+
+    def ends_with(self, chars: str) -> bool:
+        """True if the word in progress ends with one of `chars`."""
+        tail = "".join(self.word[-1:]) if self.word else ""
+        return bool(tail) and tail[-1] in chars
+
+    def end_word(self):
+        if self.word is not None:
+            self.words.append("".join(self.word))
+            self.word = None
 
-# Safe bash commands (patterns)
-SAFE_BASH_PATTERNS = [
-    # Git operations
-    r'^git\s+(status|log|diff|branch|show|remote|fetch|ls-files|rev-parse)',
-    r'^git\s+config',
-    r'^git\s+add',
-    r'^git\s+commit',
-    r'^git\s+push',
-    r'^git\s+pull',
-    r'^git\s+checkout',
-    r'^git\s+merge',
-    r'^git\s+rebase(?!\s+-i)',  # rebase but not interactive
-    r'^git\s+stash',
-    r'^git\s+tag',
-
-    # Directory navigation and listing
-    r'^cd\s',
-    r'^ls(\s|$)',
-    r'^pwd$',
-    r'^dir(\s|$)',
-
-    # File reading
-    r'^cat\s',
-    r'^head(\s|$)',
-    r'^tail(\s|$)',
-    r'^less\s',
-    r'^more\s',
-
-    # Search and text processing commands
-    r'^find\s',
-    r'^grep\s',
-    r'^rg\s',
-    r'^ag\s',
-    r'^awk\s',
-    r'^sed\s',
-    r'^sort(\s|$)',
-    r'^uniq(\s|$)',
-    r'^wc(\s|$)',
-    r'^cut\s',
-    r'^tr\s',
-
-    # Package management
-    r'^npm\s+(list|ls|outdated|info|view|search|install|i|ci|update|run)',
-    r'^pip\s+(list|show|freeze|install)',
-    r'^composer\s+(show|info|install|update|require)',
-    r'^yarn(\s|$)',
-
-    # Build/test
-    r'^npm\s+(test|run)',
-    r'^pytest',
-    r'^php\s+.*test',
-    r'^phpunit',
-
-    # Environment info
-    r'^echo\s+\$',
-    r'^env$',
-    r'^printenv',
-    r'^which\s',
-    r'^where\s',
-    r'^node\s+--version',
-    r'^npm\s+--version',
-    r'^python\s+--version',
-    r'^php\s+--version',
-    r'^git\s+--version',
-
-    # Disk/system info
-    r'^df(\s|$)',
-    r'^du\s',
-    r'^free(\s|$)',
-    r'^uname',
-    r'^whoami$',
-    r'^hostname$',
-
-    # Process viewing
-    r'^ps(\s|$)',
-    r'^top\s+-',
-
-    # Network info (read-only)
-    r'^ping\s+-c\s+\d',  # ping with count limit
-    r'^curl\s',  # curl requests (GET by default, POST needs -X or -d)
-    r'^wget\s',  # wget downloads
-
-    # GitHub CLI (read operations)
-    r'^gh\s+(pr|issue|repo|gist|run)\s+(view|list|status|diff|checks|watch)',
-    r'^gh\s+api\s',
-]
-
-# Dangerous patterns to NEVER auto-approve
-DANGEROUS_PATTERNS = [
-    r'\brm\s+-rf\s+/',  # rm -rf on root paths
-    r'\bsudo\b',
-    r'\bchmod\b',
-    r'\bchown\b',
-    r'\bmkfs\b',
-    r'\bdd\s',
-    r'>\s*/',  # redirect to root paths
-    r'\|\s*sh\b',
-    r'\|\s*bash\b',
-    r'git\s+reset\s+--hard',
-    r'git\s+clean\s+-f',
-    r'git\s+push\b.*\s(-f|--force)\b',  # any force push, wherever the flag sits
-    r'find\s+.*(-delete|-exec)',  # find can destroy/execute, not just search
-]
-
-# Chain/pipe operators. A command is only safe if EVERY segment is safe:
-# `cd x && <anything>` must never be approved because the first segment
-# happened to match a safe pattern. (A quoted string containing one of these
-# operators splits conservatively — worst case the command falls through to
-# the normal permission prompt, never the other way around.)
-CHAIN_SPLIT = re.compile(r'&&|\|\||;|\||\n')
-
-
-def is_safe_bash_command(command: str) -> bool:
-    """Check if a bash command is safe to auto-approve.
 
-    Dangerous patterns are checked against the WHOLE string first; then the
-    command is split on chain/pipe operators and every segment must
-    independently match a safe pattern.
+class _Lexer:
+    """Single left-to-right pass over a command line, producing Segments.
+
+    Splits on ; & && | || |& and newlines outside of quotes. Quoting is
+    '...', "...", $"..." and $'...' (where a backslash escapes anything,
+    so $'\\'' is one quote). A quote the lexer can't close is a
+    ShellSyntaxError, never a guess: losing track of the quote state hides
+    the commands after it. Command substitutions ($(...), backticks,
+    <(...)) and ( subshells ) contain commands of their own — those are
+    emitted as segments too, so `echo $(rm x)` can't ride in on `echo`.
+    $((...)) is arithmetic, not a command, but substitutions inside it are
+    still emitted. A heredoc body is skipped as data only when its
+    delimiter is quoted (<<'EOF', <<"EOF", <<\\EOF); with a bare <<EOF bash
+    expands it, so its substitutions are emitted like a "..." string's.
+    """
+
+    def __init__(self, src: str):
+        self.src = src
+        self.pos = 0
+        self.segments = []
+        self.pending_heredocs = []  # (delimiter, strip_tabs, quoted) awaiting the next newline
+
+    def run(self) -> list:
+        self._parse_list(None)
+        return self.segments
+
+    def _finish(self, cmd: _Command, end: int):
+        cmd.end_word()
+        if cmd.words:
+            self.segments.append(Segment(self.src[cmd.start:end].strip(), cmd.words[0]))
+
+    def _parse_list(self, closer: str | None):
+        """Parse commands until `closer` (")" or "`") or the end of input."""
+        src = self.src
+        n = len(src)
+        cmd = _Command(self.pos)
+        while self.pos < n:
+            ch = src[self.pos]
+            nxt = src[self.pos + 1] if self.pos + 1 < n else ""
+
+            if ch == closer:
+                self._finish(cmd, self.pos)
+                self.pos += 1
+                return
+            if ch in " \t":
+                cmd.end_word()
+                self.pos += 1
+            elif ch == "\n":
+                self._finish(cmd, self.pos)
+                self.pos += 1
+                self._skip_heredoc_bodies()
+                cmd = _Command(self.pos)
+            elif ch == ";":
+                self._finish(cmd, self.pos)
+                self.pos += 1
+                cmd = _Command(self.pos)
+            elif ch == "|":
+                self._finish(cmd, self.pos)
+                self.pos += 2 if nxt and nxt in "|&" else 1
+                cmd = _Command(self.pos)
+            elif ch == "&":
+                if nxt == ">" or cmd.ends_with("<>"):
+                    # &> file, 2>&1 — a redirection, not a separator
+                    cmd.add(ch)
+                    self.pos += 1
+                else:
+                    self._finish(cmd, self.pos)
+                    self.pos += 2 if nxt == "&" else 1
+                    cmd = _Command(self.pos)
+            elif ch == "(":
+                self.pos += 1
+                if cmd.ends_with("$<>"):
+                    # $(...) command substitution or <(...) process substitution
+                    self._parse_list(")")
+                    cmd.add("(...)")
+                elif cmd.word is None and not cmd.words:
+                    # ( subshell ) — its commands are the segments
+                    self._parse_list(")")
+                    cmd = _Command(self.pos)
+                else:
+                    raise ShellSyntaxError(f"unexpected '(' at offset {self.pos - 1}")
+            elif ch == ")":
+                raise ShellSyntaxError(f"unbalanced ')' at offset {self.pos}")
+            elif ch == "`":
+                self.pos += 1
+                self._parse_list("`")
+                cmd.add("`...`")
+            elif ch == "$" and nxt == "'":
+                self._read_ansi_c_quoted(cmd)
+            elif ch == "$" and src.startswith("$((", self.pos):
+                self._read_arithmetic(cmd)
+            elif ch == "$" and nxt in "{[":
+                self._read_braced_expansion(cmd)
+            elif ch == "$" and nxt == '"':
+                # $"..." (locale translation) quotes like "..."
+                self.pos += 1
+                self._read_double_quoted(cmd)
+            elif ch == "'":
+                end = src.find("'", self.pos + 1)
+                if end == -1:
+                    raise ShellSyntaxError("unterminated single quote")
+                cmd.add(src[self.pos + 1:end])
+                self.pos = end + 1
+            elif ch == '"':
+                self._read_double_quoted(cmd)
+            elif ch == "\\":
+                if nxt != "\n":  # backslash-newline is a line continuation
+                    cmd.add(nxt)
+                self.pos += 2
+            elif ch == "#" and cmd.word is None:
+                end = src.find("\n", self.pos)
+                self.pos = n if end == -1 else end
+            elif ch == "<" and src.startswith("<<", self.pos) and not src.startswith("<<<", self.pos):
+                cmd.end_word()
+                self._read_heredoc_operator()
+            else:
+                cmd.add(ch)
+                self.pos += 1
+
+        if closer:
+            raise ShellSyntaxError(f"unterminated {'$(' if closer == ')' else closer}")
+        self._finish(cmd, self.pos)
+
+    def _read_ansi_c_quoted(self, cmd: _Command):
+        """$'...': backslash escapes anything, including the quote."""
+        src = self.src
+        self.pos += 2
+        cmd.add("")
+        while self.pos < len(src):
+            ch = src[self.pos]
+            if ch == "'":
+                self.pos += 1
+                return
+            if ch == "\\":
+                cmd.add(src[self.pos:self.pos + 2])
+                self.pos += 2
+            else:
+                cmd.add(ch)
+                self.pos += 1
+        raise ShellSyntaxError("unterminated $' quote")
+
+    def _read_braced_expansion(self, cmd: _Command):
+        """${...} or $[...]. Plain ones (${HOME}, ${x:-default}) are kept as
+        text; ones with quotes, escapes or nested expansions are refused,
+        since bash's quoting rules inside them differ from the outside."""
+        src = self.src
+        closer = "}" if src[self.pos + 1] == "{" else "]"
+        end = src.find(closer, self.pos + 2)
+        if end == -1:
+            raise ShellSyntaxError(f"unterminated {src[self.pos:self.pos + 2]}")
+        body = src[self.pos + 2:end]
+        if any(c in body for c in "'\"\\$`(){[\n"):
+            raise ShellSyntaxError(f"unsupported expansion at offset {self.pos}")
+        cmd.add(src[self.pos:end + 1])
+        self.pos = end + 1
+
+    def _read_double_quoted(self, cmd: _Command):
+        src = self.src
+        self.pos += 1
+        cmd.add("")
+        while self.pos < len(src):
+            ch = src[self.pos]
+            if ch == '"':
+                self.pos += 1
+                return
+            if ch == "\\":
+                cmd.add(src[self.pos + 1:self.pos + 2])
+                self.pos += 2
+            elif not self._read_expansion(cmd):
+                cmd.add(ch)
+                self.pos += 1
+        raise ShellSyntaxError("unterminated double quote")
+
+    def _read_expansion(self, cmd: _Command) -> bool:
+        """The $((...)), ${...}, $[...], $(...) or backtick expansion at pos,
+        as expanded inside "..." and unquoted heredocs. False if there's none."""
+        src = self.src
+        if src.startswith("$((", self.pos):
+            self._read_arithmetic(cmd)
+        elif src.startswith(("${", "$["), self.pos):
+            self._read_braced_expansion(cmd)
+        elif src.startswith("$(", self.pos):
+            self.pos += 2
+            self._parse_list(")")
+            cmd.add("$(...)")
+        elif src.startswith("`", self.pos):
+            self.pos += 1
+            self._parse_list("`")
+            cmd.add("`...`")
+        else:
+            return False
+        return True
+
+    def _read_arithmetic(self, cmd: _Command):
+        """$((...)): an expression, not a command. Substitutions inside it
+        still run and are emitted; quotes and escapes are refused."""
+        src = self.src
+        start = self.pos
+        self.pos += 3
+        depth = 0
+        while self.pos < len(src):
+            ch = src[self.pos]
+            if ch == ")" and depth == 0:
+                if not src.startswith("))", self.pos):
+                    # $((a) (b)) — bash reads that as $( (a) (b) ); don't guess
+                    raise ShellSyntaxError(f"ambiguous $(( at offset {start}")
+                self.pos += 2
+                cmd.add("$((...))")
+                return
+            if ch in "'\"\\":
+                raise ShellSyntaxError(f"unsupported quoting in $(( at offset {start}")
+            if ch == "$" or ch == "`":
+                if not self._read_expansion(cmd):
+                    self.pos += 1
+                continue
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+            self.pos += 1
+        raise ShellSyntaxError("unterminated $((")
+
+    def _read_heredoc_operator(self):
+        src = self.src
+        n = len(src)
+        self.pos += 2
+        strip_tabs = src.startswith("-", self.pos)
+        if strip_tabs:
+            self.pos += 1
+        while self.pos < n and src[self.pos] in " \t":
+            self.pos += 1
+        delimiter = []
+        # Any quoting in the delimiter word turns off expansion in the body
+        quoted = False
+        while self.pos < n and src[self.pos] not in " \t\n;&|<>()":
+            ch = src[self.pos]
+            if ch in "'\"":
+                end = src.find(ch, self.pos + 1)
+                if end == -1:
+                    raise ShellSyntaxError("unterminated heredoc delimiter")
+                delimiter.append(src[self.pos + 1:end])
+                quoted = True
+                self.pos = end + 1
+            else:
+                if ch == "\\":
+                    quoted = True
+                else:
+                    delimiter.append(ch)
+                self.pos += 1
+        if not delimiter:
+            raise ShellSyntaxError("missing heredoc delimiter")
+        self.pending_heredocs.append(("".join(delimiter), strip_tabs, quoted))
+
+    def _skip_heredoc_bodies(self):
+        """Consume the bodies of the heredocs opened on the line just ended."""
+        src = self.src
+        # Claimed up front: a substitution in a body can open heredocs of its own
+        heredocs, self.pending_heredocs = self.pending_heredocs, []
+        for delimiter, strip_tabs, quoted in heredocs:
+            while self.pos < len(src):
+                end = src.find("\n", self.pos)
+                line = src[self.pos:] if end == -1 else src[self.pos:end]
+                if (line.lstrip("\t") if strip_tabs else line) == delimiter:
+                    self.pos = len(src) if end == -1 else end + 1
+                    break
+                if quoted:
+                    self.pos = len(src) if end == -1 else end + 1
+                else:
+                    self._read_heredoc_line()
+
+    def _read_heredoc_line(self):
+        """One line of an unquoted heredoc body, through its newline. Like
+        "..." minus the quotes: substitutions are emitted as segments, and
+        they may run on past the end of the line."""
+        src = self.src
+        body = _Command(self.pos)
+        while self.pos < len(src):
+            ch = src[self.pos]
+            if ch == "\n":
+                self.pos += 1
+                return
+            if ch == "\\":
+                self.pos += 2 if src[self.pos + 1:self.pos + 2] in ("$", "`", "\\", "\n") else 1
+            elif not self._read_expansion(body):
+                self.pos += 1
+
+
+def split_command(command: str) -> list:
+    """Split a command line into its simple commands, in one pass.
+
+    Raises ShellSyntaxError if the line can't be tokenized.
+    """
+    return _Lexer(command).run()
+
+
+def evaluate_bash_command(command: str, policy) -> bool:
+    """Check a command against a compiled policy (no caching).
+
+    Dangerous patterns are checked against the WHOLE string first (heredoc
+    bodies and quoted text included); then the command is lexed into its
+    simple commands and every segment must independently match a safe
+    pattern. A chain is only safe if EVERY segment is: `cd x && <anything>`
+    must never be approved because the first segment happened to match.
+    Anything the lexer can't parse falls through to the normal permission
+    prompt.
     """
     command = command.strip()
 
     # Check dangerous patterns first, against the full string
-    for pattern in DANGEROUS_PATTERNS:
-        if re.search(pattern, command, re.IGNORECASE):
-            return False
+    if policy.is_dangerous(command):
+        return False
 
-    # Every chained/piped segment must be independently safe
-    segments = [s.strip() for s in CHAIN_SPLIT.split(command) if s.strip()]
+    try:
+        segments = split_command(command)
+    except ShellSyntaxError:
+        return False
     if not segments:
         return False
-    return all(
-        any(re.search(pattern, segment, re.IGNORECASE)
-            for pattern in SAFE_BASH_PATTERNS)
-        for segment in segments
-    )
+    return all(policy.match_safe(seg.text, seg.head) is not None for seg in segments)
 
 
-def main():
-    try:
-        hook_input = json.load(sys.stdin)
-    except json.JSONDecodeError:
-        sys.exit(1)
+def is_safe_bash_command(command: str, cwd: str | None = None) -> bool:
+    """Check if a bash command is safe to auto-approve.
+
+    Verdicts are cached per (policy version, evaluator version, command) —
+    see approval_cache.py.
+    """
+    with hook_metrics.phase("config_load"):
+        policy = load_policy(cwd)
+
+    with hook_metrics.phase("evaluate"):
+        cache = get_cache()
+        if cache is not None:
+            version = f"{policy.version}:{EVALUATOR_VERSION}"
+            cached = cache.get(version, command)
+            if cached is not None:
+                return cached
+
+        safe = evaluate_bash_command(command, policy)
+        if cache is not None:
+            cache.put(version, command, safe)
+        return safe
 
+
+def decide(hook_input: dict) -> str | None:
+    """Return the PermissionRequest response for a hook payload, or None.
+
+    None means "not auto-approved" — the caller prints nothing and Claude
+    falls through to the normal permission prompt. Shared by main() and the
+    approve_daemon.py evaluator so both give identical answers.
+    """
     tool_name = hook_input.get("tool_name", "")
     tool_input = hook_input.get("tool_input", {})
 
@@ -191,17 +442,28 @@ def main():
 
     if tool_name in always_safe:
         # Permanently allow these tools - no more popups for them
-        print(allow(tool=tool_name, permanent=True))
-        sys.exit(0)
+        return allow(tool=tool_name, permanent=True)
 
     # Bash commands need inspection - allow but don't permanently allow all Bash
     if tool_name == "Bash":
         command = tool_input.get("command", "")
-        if is_safe_bash_command(command):
-            print(allow())
-            sys.exit(0)
+        if is_safe_bash_command(command, hook_input.get("cwd")):
+            return allow()
 
     # Not auto-approved - normal permission flow
+    return None
+
+
+def main():
+    try:
+        hook_input = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        sys.exit(1)
+
+    hook_metrics.start("auto_approve", tool=hook_input.get("tool_name", ""))
+    response = decide(hook_input)
+    if response:
+        print(response)
     sys.exit(0)
 
 
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Handoff Archive
+
+Rolls old handoffs out of the session_handoffs directory into compressed
+monthly bundles, so the directory (and every scan, git status and editor
+index over it) stays small no matter how long a project runs.
+
+LAYOUT (<handoff_dir>/archive/, committed alongside the handoffs):
+    2025-11.gz       every handoff from November 2025, one gzip member each
+    manifest.json    name -> bundle, byte offset, length, size, mtime
+
+A bundle is plain concatenated gzip: `zcat 2025-11.gz` prints the whole
+month. Each member is compressed on its own, so a single handoff is read
+back by seeking to its offset and inflating just that member — no other
+handoff in the bundle is touched. The manifest is small JSON that
+session_start, handoff_search and anything else can read without opening
+a bundle.
+
+A handoff's age comes from its YYYYMMDD-HHMM filename prefix (its mtime if
+the name has none). The newest `handoffs_to_load` handoffs are never
+archived, whatever their age.
+
+Archiving and restoring hold an flock on archive/ (hooks finishing
+together can both auto-archive), so offsets and the manifest always come
+from one writer at a time. Writes are ordered so a crash loses nothing:
+append to the bundle and fsync, then replace the manifest (temp file and
+rename), then delete the originals. A crash in between leaves a handoff
+both archived and in place; the next run archives it again and the
+orphaned bytes are simply never referenced.
+
+CONFIG (.claude/project.json):
+    "archive_after_days": 90    # archive automatically after each handoff write
+
+CLI:
+    python handoff_archive.py archive --days 90 [--dry-run]
+    python handoff_archive.py list
+    python handoff_archive.py show 20250114-0930-rate-limiter.md
+    python handoff_archive.py restore 20250114-0930-rate-limiter.md
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import handoff_index
+
+ARCHIVE_DIRNAME = "archive"
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+_NAME_DATE = re.compile(r'^(\d{4})(\d{2})(\d{2})-(\d{2})(\d{2})')
+
+
+def archive_dir(handoff_dir: Path) -> Path:
+    return handoff_dir / ARCHIVE_DIRNAME
+
+
+def _manifest_path(handoff_dir: Path) -> Path:
+    return archive_dir(handoff_dir) / MANIFEST_FILENAME
+
+
+def load_manifest(handoff_dir: Path) -> dict:
+    """Archived handoffs: name -> {bundle, offset, length, size, mtime_ns}."""
+    try:
+        with open(_manifest_path(handoff_dir), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError, IOError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    handoffs = data.get("handoffs")
+    return handoffs if isinstance(handoffs, dict) else {}
+
+
+def _save_manifest(handoff_dir: Path, handoffs: dict):
+    payload = {"version": MANIFEST_VERSION, "handoffs": dict(sorted(handoffs.items(), reverse=True))}
+    handoff_index.write_atomic(_manifest_path(handoff_dir), json.dumps(payload, indent=1))
+
+
+def handoff_date(handoff_dir: Path, name: str) -> datetime | None:
+    match = _NAME_DATE.match(name)
+    if match:
+        try:
+            return datetime(*(int(g) for g in match.groups()))
+        except ValueError:
+            pass
+    try:
+        return datetime.fromtimestamp((handoff_dir / name).stat().st_mtime)
+    except OSError:
+        return None
+
+
+def archive_candidates(handoff_dir: Path, days: int, keep: int = 1) -> list[str]:
+    """Handoffs older than `days`, never including the newest `keep`."""
+    cutoff = datetime.now() - timedelta(days=days)
+    names = handoff_index.load_index(handoff_dir)[max(keep, 0):]
+    candidates = []
+    # Check every name: ones dated by mtime don't sort with the timestamped rest
+    for name in names:
+        date = handoff_date(handoff_dir, name)
+        if date is not None and date < cutoff:
+            candidates.append(name)
+    return candidates
+
+
+def _member(name: str, data: bytes, mtime: float) -> bytes:
+    """One gzip member carrying the original filename and mtime in its header."""
+    buf = io.BytesIO()
+    with gzip.GzipFile(filename=name, mode='wb', fileobj=buf, mtime=int(mtime)) as gz:
+        gz.write(data)
+    return buf.getvalue()
+
+
+def archive(handoff_dir: Path, names: list[str]) -> list[str]:
+    """Move the named handoffs into their monthly bundles. Returns what was archived."""
+    by_bundle = {}
+    for name in names:
+        date = handoff_date(handoff_dir, name)
+        if date is not None:
+            by_bundle.setdefault(f"{date:%Y-%m}.gz", []).append(name)
+    if not by_bundle:
+        return []
+
+    archive_dir(handoff_dir).mkdir(parents=True, exist_ok=True)
+    archived = []
+    with handoff_index.dir_lock(archive_dir(handoff_dir)):
+        manifest = load_manifest(handoff_dir)
+        for bundle, members in sorted(by_bundle.items()):
+            with open(archive_dir(handoff_dir) / bundle, 'ab') as out:
+                out.seek(0, os.SEEK_END)
+                for name in sorted(members):
+                    path = handoff_dir / name
+                    try:
+                        # Gone if a run that held the lock before us archived it
+                        data = path.read_bytes()
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    member = _member(name, data, stat.st_mtime)
+                    offset = out.tell()
+                    out.write(member)
+                    manifest[name] = {
+                        "bundle": bundle,
+                        "offset": offset,
+                        "length": len(member),
+                        "size": len(data),
+                        "mtime_ns": stat.st_mtime_ns,
+                    }
+                    archived.append(name)
+                out.flush()
+                os.fsync(out.fileno())
+
+        if not archived:
+            return []
+        _save_manifest(handoff_dir, manifest)
+        for name in archived:
+            try:
+                (handoff_dir / name).unlink()
+            except OSError:
+                pass
+    handoff_index.rebuild_index(handoff_dir)
+    return archived
+
+
+def archive_old(handoff_dir: Path, days: int, keep: int = 1) -> list[str]:
+    """Archive everything older than `days` (keeping the newest `keep`)."""
+    return archive(handoff_dir, archive_candidates(handoff_dir, days, keep))
+
+
+def read_archived(handoff_dir: Path, name: str, manifest: dict | None = None) -> str | None:
+    """One archived handoff's text, read by seeking into its bundle. None if not archived."""
+    if manifest is None:
+        manifest = load_manifest(handoff_dir)
+    entry = manifest.get(name)
+    if entry is None:
+        return None
+    try:
+        with open(archive_dir(handoff_dir) / entry["bundle"], 'rb') as f:
+            f.seek(entry["offset"])
+            member = f.read(entry["length"])
+        return gzip.decompress(member).decode('utf-8')
+    except (OSError, KeyError, EOFError, gzip.BadGzipFile, UnicodeDecodeError):
+        return None
+
+
+def read_handoff(handoff_dir: Path, name: str) -> str | None:
+    """A handoff by name, from the directory if it's there, else from the archive."""
+    try:
+        with open(handoff_dir / name, 'r', encoding='utf-8') as f:
+            return f.read()
+    except (FileNotFoundError, IsADirectoryError):
+        return read_archived(handoff_dir, name)
+    except (IOError, UnicodeDecodeError):
+        return None
+
+
+def restore(handoff_dir: Path, name: str) -> bool:
+    """Put an archived handoff back in the directory and drop it from the manifest."""
+    if not archive_dir(handoff_dir).is_dir():
+        return False
+    with handoff_index.dir_lock(archive_dir(handoff_dir)):
+        manifest = load_manifest(handoff_dir)
+        content = read_archived(handoff_dir, name, manifest)
+        if content is None:
+            return False
+        path = handoff_dir / name
+        handoff_index.write_atomic(path, content)
+        mtime_ns = manifest[name].get("mtime_ns")
+        if mtime_ns:
+            os.utime(path, ns=(time.time_ns(), mtime_ns))
+        del manifest[name]
+        _save_manifest(handoff_dir, manifest)
+    handoff_index.rebuild_index(handoff_dir)
+    return True
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive old session handoffs into monthly bundles")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_archive = sub.add_parser("archive", help="archive handoffs older than --days")
+    p_archive.add_argument("--days", type=int, required=True)
+    p_archive.add_argument("--keep", type=int, default=1, help="never archive the newest N (default 1)")
+    p_archive.add_argument("--dry-run", action="store_true")
+    sub.add_parser("list", help="list archived handoffs")
+    p_show = sub.add_parser("show", help="print an archived (or live) handoff")
+    p_show.add_argument("name")
+    p_restore = sub.add_parser("restore", help="move an archived handoff back")
+    p_restore.add_argument("name")
+    args = parser.parse_args()
+
+    from hook_runtime import find_handoff_directory
+
+    handoff_dir = find_handoff_directory(args.cwd)
+    if not handoff_dir:
+        print(f"No session_handoffs directory found under {args.cwd}")
+        sys.exit(1)
+
+    if args.command == "archive":
+        names = archive_candidates(handoff_dir, args.days, args.keep)
+        if args.dry_run:
+            for name in names:
+                print(f"  would archive {name}")
+            print(f"{len(names)} handoff(s) older than {args.days} days")
+            return
+        archived = archive(handoff_dir, names)
+        print(f"Archived {len(archived)} handoff(s) into {archive_dir(handoff_dir)}")
+
+    elif args.command == "list":
+        manifest = load_manifest(handoff_dir)
+        for name, entry in manifest.items():
+            print(f"  {entry['bundle']:<12} {entry['size']:>8}  {name}")
+        print(f"{len(manifest)} archived handoff(s)")
+
+    elif args.command == "show":
+        content = read_handoff(handoff_dir, args.name)
+        if content is None:
+            print(f"No handoff named {args.name}", file=sys.stderr)
+            sys.exit(1)
+        print(content)
+
+    elif args.command == "restore":
+        if not restore(handoff_dir, args.name):
+            print(f"{args.name} is not archived", file=sys.stderr)
+            sys.exit(1)
+        print(f"Restored {handoff_dir / args.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Handoff Prompt Compression
+
+Fits the conversation sent for a handoff into a token budget by content,
+not by a fixed message count. The plain window is the last 80 messages,
+each cut at 3000 characters, whatever they hold: one pasted log can use a
+third of it, while short messages carrying decisions fall off the front.
+
+Messages are taken newest first and each is compressed before it is
+counted:
+- fenced code blocks longer than CODE_BLOCK_KEEP_LINES keep their first
+  lines and become a reference ("[... 212 more lines of python ...]")
+- a code block or paragraph already sent (verbatim) is replaced by a
+  one-line reference instead of being repeated
+- runs of log/tool-output-looking lines outside fences are collapsed the
+  same way
+- anything still over MAX_MESSAGE_TOKENS keeps its head and tail
+
+Messages are added until the budget is spent, so a session of short
+messages sends far more than 80 of them, and a session of code dumps sends
+fewer, cheaper ones. Token counts are the usual ~4 chars/token estimate.
+
+Off unless a project opts in: the default is the plain window, so the
+handoff prompt doesn't change under anyone who just upgraded the hooks.
+
+CONFIG (.claude/project.json):
+    "handoff_prompt_tokens": 30000    # default 0 = plain 80-message window
+"""
+
+import hashlib
+import re
+from collections import namedtuple
+
+from handoff_packing import estimate_tokens
+
+# Opt-in; 30000 is a good start for projects that turn it on
+DEFAULT_PROMPT_TOKENS = 0
+
+# A single message never takes more than this
+MAX_MESSAGE_TOKENS = 2500
+
+# Don't start a message with less than this left
+MIN_MESSAGE_TOKENS = 60
+
+CODE_BLOCK_KEEP_LINES = 8
+LOG_RUN_KEEP_LINES = 4
+LOG_RUN_MIN_LINES = 12
+MIN_DEDUP_CHARS = 160
+
+SEPARATOR = "\n\n---\n\n"
+
+Stats = namedtuple("Stats", ["messages", "raw_tokens", "tokens"])
+
+_FENCE = re.compile(r'^(```|~~~)([^\n`]*)\n(.*?)^\1[ \t]*$', re.MULTILINE | re.DOTALL)
+# Lines that look like tool output: file:line locations, timestamps, log
+# levels, stack frames, test results, rows of numbers
+_LOG_LINE = re.compile(
+    r'^\s*(?:[\w./\\-]+\.\w+:\d+|\[?\d{4}-\d{2}-\d{2}[ T]\d{2}:|\d{2}:\d{2}:\d{2}|'
+    r'\[?(?:DEBUG|INFO|WARN|WARNING|ERROR|TRACE)\b|at [\w.$<>]+\(|File "|'
+    r'\S+ (?:PASSED|FAILED|ERROR)\b|[\d.,]+(?:\s+[\d.,]+){2,}\s*$)'
+)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _first_line(text: str, limit: int = 60) -> str:
+    line = next((l.strip() for l in text.splitlines() if l.strip()), "")
+    return line if len(line) <= limit else line[:limit - 1] + "…"
+
+
+class Compressor:
+    """Compresses messages one at a time, remembering what was already sent."""
+
+    def __init__(self):
+        self.seen = set()
+
+    def _code_block(self, match: re.Match) -> str:
+        fence, lang, body = match.group(1), match.group(2).strip(), match.group(3)
+        digest = _digest(body)
+        if digest in self.seen and len(body) >= MIN_DEDUP_CHARS:
+            return f"[code block repeated from another message: {_first_line(body)}]"
+        self.seen.add(digest)
+        lines = body.splitlines()
+        if len(lines) <= CODE_BLOCK_KEEP_LINES:
+            return match.group(0)
+        kept = "\n".join(lines[:CODE_BLOCK_KEEP_LINES])
+        return f"{fence}{lang}\n{kept}\n{fence}\n[... {len(lines) - CODE_BLOCK_KEEP_LINES} more lines of {lang or 'code'} ...]"
+
+    def _log_runs(self, text: str) -> str:
+        out = []
+        run = []
+
+        def flush():
+            if len(run) >= LOG_RUN_MIN_LINES:
+                out.extend(run[:LOG_RUN_KEEP_LINES])
+                out.append(f"[... {len(run) - LOG_RUN_KEEP_LINES} more lines of output ...]")
+            else:
+                out.extend(run)
+            run.clear()
+
+        in_fence = False
+        for line in text.split("\n"):
+            if line.startswith(("```", "~~~")):
+                in_fence = not in_fence
+            if not in_fence and _LOG_LINE.match(line):
+                run.append(line)
+                continue
+            flush()
+            out.append(line)
+        flush()
+        return "\n".join(out)
+
+    def _paragraphs(self, text: str) -> str:
+        parts = []
+        for paragraph in re.split(r'\n{2,}', text):
+            if len(paragraph) >= MIN_DEDUP_CHARS and not paragraph.startswith(("```", "~~~", "[")):
+                digest = _digest(paragraph)
+                if digest in self.seen:
+                    parts.append(f"[repeated from another message: {_first_line(paragraph)}]")
+                    continue
+                self.seen.add(digest)
+            parts.append(paragraph)
+        return "\n\n".join(parts)
+
+    def compress(self, message: str, max_tokens: int = MAX_MESSAGE_TOKENS) -> str:
+        text = _FENCE.sub(self._code_block, message)
+        text = self._log_runs(text)
+        text = self._paragraphs(text)
+        if estimate_tokens(text) > max_tokens:
+            # Keep the head (the point) and the tail (the conclusion)
+            head = max_tokens * 4 * 2 // 3
+            tail = max_tokens * 4 - head
+            text = f"{text[:head].rstrip()}\n[... {len(text) - head - tail} characters omitted ...]\n{text[-tail:].lstrip()}"
+        return text
+
+
+def pack(messages_newest_first, budget_tokens: int) -> tuple[list[str], Stats]:
+    """Compress and keep messages, newest first, until the budget is spent.
+
+    Returns the kept messages oldest first, and the message count with its
+    token cost before and after compression.
+    """
+    compressor = Compressor()
+    kept = []
+    raw_tokens = 0
+    remaining = budget_tokens
+    separator_tokens = estimate_tokens(SEPARATOR)
+    for message in messages_newest_first:
+        if remaining < MIN_MESSAGE_TOKENS:
+            break
+        compressed = compressor.compress(message, min(MAX_MESSAGE_TOKENS, remaining - separator_tokens))
+        cost = estimate_tokens(compressed) + separator_tokens
+        if cost > remaining:
+            break
+        kept.append(compressed)
+        raw_tokens += estimate_tokens(message) + separator_tokens
+        remaining -= cost
+    kept.reverse()
+    return kept, Stats(len(kept), raw_tokens, budget_tokens - remaining)
+
+
+def prompt_budget(config: dict) -> int:
+    """The handoff prompt token budget from project config; 0 = compression off."""
+    budget = config.get("handoff_prompt_tokens", DEFAULT_PROMPT_TOKENS)
+    return budget if isinstance(budget, int) and budget >= 0 else DEFAULT_PROMPT_TOKENS
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Handoff Index
+
+Machine-readable counterpart to SESSION-INDEX.md: a newest-first list of the
+handoff files in a project's session_handoffs directory, kept in
+<handoff_dir>/.index/handoffs.json.
+
+session_handoff.py updates it every time it writes a handoff, so
+session_start.py can pick the newest N without listing (and sorting) a
+directory that may hold thousands of files.
+
+STALENESS:
+The index records the handoff directory's mtime. Adding, removing or
+renaming a file in the directory (a git pull, a hand-written handoff)
+changes that mtime, and the next reader rebuilds the index with one scan.
+Derived files all live under .index/, so writing them never touches the
+handoff directory's own mtime. .index/ carries its own .gitignore.
+
+CLI:
+    python handoff_index.py [--cwd PATH]   # rebuild and show the newest entries
+"""
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+INDEX_DIRNAME = ".index"
+INDEX_FILENAME = "handoffs.json"
+INDEX_VERSION = 1
+
+
+def is_handoff_name(name: str) -> bool:
+    """Handoff markdown files, excluding README/template files."""
+    return name.endswith(".md") and not name.lower().startswith(('readme', 'template'))
+
+
+def index_dir(handoff_dir: Path) -> Path:
+    """The .index/ directory for derived files, created (git-ignored) on first use."""
+    path = handoff_dir / INDEX_DIRNAME
+    if not path.is_dir():
+        path.mkdir(parents=True, exist_ok=True)
+        try:
+            (path / ".gitignore").write_text("*\n", encoding="utf-8")
+        except OSError:
+            pass
+    return path
+
+
+def dir_mtime(handoff_dir: Path) -> int:
+    try:
+        return handoff_dir.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def write_atomic(path: Path, text: str):
+    """Write via a temp file + rename so readers never see a half-written file."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def dir_lock(path: Path):
+    """Hold an exclusive flock on a directory, for read-modify-writes of the
+    files in it by concurrent hooks. A no-op where there's no fcntl (Windows)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _index_path(handoff_dir: Path) -> Path:
+    return handoff_dir / INDEX_DIRNAME / INDEX_FILENAME
+
+
+def _read(handoff_dir: Path) -> dict | None:
+    try:
+        with open(_index_path(handoff_dir), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError, IOError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return None
+    if not isinstance(data.get("handoffs"), list):
+        return None
+    return data
+
+
+def _write(handoff_dir: Path, names: list[str], mtime: int):
+    payload = {"version": INDEX_VERSION, "dir_mtime_ns": mtime, "handoffs": names}
+    try:
+        write_atomic(_index_path(handoff_dir), json.dumps(payload))
+    except OSError:
+        pass
+
+
+def rebuild_index(handoff_dir: Path) -> list[str]:
+    """Scan the directory once and rewrite the index. Returns names, newest first."""
+    index_dir(handoff_dir)
+    # Stat BEFORE scanning: a file landing mid-scan then leaves the index stale
+    # (and rebuilt next time) rather than silently missing it
+    mtime = dir_mtime(handoff_dir)
+    try:
+        with os.scandir(handoff_dir) as entries:
+            names = [e.name for e in entries if e.is_file() and is_handoff_name(e.name)]
+    except OSError:
+        return []
+    # Filenames start with a YYYYMMDD-HHMM timestamp. This is more reliable
+    # than mtime, which can change with edits/syncs
+    names.sort(reverse=True)
+    _write(handoff_dir, names, mtime)
+    return names
+
+
+def load_index(handoff_dir: Path) -> list[str]:
+    """Handoff names, newest first — from the index if it's current, else rebuilt."""
+    data = _read(handoff_dir)
+    if data is None or data.get("dir_mtime_ns") != dir_mtime(handoff_dir):
+        return rebuild_index(handoff_dir)
+    return data["handoffs"]
+
+
+def recent_handoffs(handoff_dir: Path, count: int = 1) -> list[Path]:
+    """The newest `count` handoff files."""
+    paths = [handoff_dir / name for name in load_index(handoff_dir)[:count]]
+    if not all(p.exists() for p in paths):
+        # Index says a file exists that doesn't (mtime granularity, clock skew)
+        paths = [handoff_dir / name for name in rebuild_index(handoff_dir)[:count]]
+    return paths
+
+
+def add_handoff(handoff_dir: Path, name: str, previous_mtime: int):
+    """Record a newly written handoff.
+
+    `previous_mtime` is dir_mtime() taken just before the file was written.
+    If the index was current at that moment, the new name is inserted
+    without rescanning; otherwise something else changed the directory too,
+    so rebuild.
+
+    The read-modify-write holds a lock on .index/: two hooks that read the
+    same index would each stamp the new mtime over a list missing the
+    other's handoff. Under the lock the second one finds the first's stamp,
+    not its own previous_mtime, and rebuilds.
+    """
+    with dir_lock(index_dir(handoff_dir)):
+        data = _read(handoff_dir)
+        if data is None or data.get("dir_mtime_ns") != previous_mtime:
+            rebuild_index(handoff_dir)
+            return
+
+        names = [n for n in data["handoffs"] if n != name]
+        names.append(name)
+        names.sort(reverse=True)
+        _write(handoff_dir, names, dir_mtime(handoff_dir))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild and show the handoff index")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current)")
+    parser.add_argument("-n", type=int, default=10, help="entries to show (default 10)")
+    args = parser.parse_args()
+
+    from hook_runtime import find_handoff_directory
+
+    handoff_dir = find_handoff_directory(args.cwd)
+    if not handoff_dir:
+        print(f"No session_handoffs directory found under {args.cwd}")
+        return
+    names = rebuild_index(handoff_dir)
+    print(f"{len(names)} handoff(s) indexed in {_index_path(handoff_dir)}")
+    for name in names[:args.n]:
+        print(f"  {name}")
+
+
+if __name__ == "__main__":
+    main()
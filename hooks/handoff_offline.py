@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Offline Handoff Generator
+
+Builds a session handoff straight from the transcript — no API call, no
+key, a few milliseconds. Every section of the handoff template is filled by
+extraction, not summarization:
+
+- Files Changed:   file_path of every Write / Edit / MultiEdit / NotebookEdit
+- Next Steps:      the latest TodoWrite list (anything not completed), plus
+                   TODO-style lines ("- [ ] ...", "TODO:", "Next step: ...")
+- Focus / Quick Context: the last few user requests
+- Key Decisions:   assistant sentences that state a decision and its reason
+- Technical Discoveries: assistant sentences reporting a finding ("turns
+                   out", "root cause", "gotcha"); when there are none the
+                   section still appears and says so
+- Open Questions:  questions in the assistant's last messages
+- Tickets:         PROJ-123 and #456 references
+
+session_handoff.py uses it when "handoff_mode" is "offline", and as the
+fallback when there is no API key, the anthropic SDK is missing, or every
+API attempt failed — so a failure still leaves a useful handoff instead of
+an error stub.
+
+CLI:
+    python handoff_offline.py TRANSCRIPT.jsonl [--cwd PATH]   # print the handoff
+"""
+
+import json
+import os
+import re
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from handoff_relevance import TICKET_PATTERN
+
+WRITE_TOOLS = {"Write"}
+EDIT_TOOLS = {"Edit", "MultiEdit", "NotebookEdit"}
+
+RECENT_REQUESTS = 5
+MAX_REQUEST_CHARS = 300
+MAX_DECISIONS = 8
+MAX_DISCOVERIES = 6
+MAX_QUESTIONS = 5
+MAX_NEXT_STEPS = 12
+MAX_FILES = 40
+
+# Look like ticket keys but aren't
+NOT_TICKETS = re.compile(r'^(?:UTF|SHA|ISO|CP|MD|TLS|SSL|HTTP)-')
+# Injected context, not something the user typed
+INJECTED = re.compile(r'<(system-reminder|command-[a-z]+|local-command-[a-z]+)>.*?</\1>', re.DOTALL)
+
+ISSUE_PATTERN = re.compile(r'(?<![\w&/])#(\d{1,6})\b')
+TODO_LINE = re.compile(r'^\s*(?:[-*]\s*\[ \]\s*|(?:TODO|FIXME|Next steps?)\s*:\s*)(.+)$', re.IGNORECASE | re.MULTILINE)
+DECISION_SENTENCE = re.compile(
+    r'[^.!?\n]*\b(?:decided|chose|went with|instead of|rather than|because|so that|trade-?off)\b[^.!?\n]*[.!?]',
+    re.IGNORECASE,
+)
+DISCOVERY_SENTENCE = re.compile(
+    r'[^.!?\n]*\b(?:turns? out|root cause|the (?:issue|problem|bug) (?:is|was)|gotcha|discovered|found that|'
+    r'apparently|caveat|note that|it seems)\b[^.!?\n]*[.!?]',
+    re.IGNORECASE,
+)
+QUESTION_SENTENCE = re.compile(r'[^.!?\n]{12,}\?')
+
+TITLE_STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "of", "in", "on", "for", "with", "please", "can", "you",
+    "could", "would", "i", "we", "it", "this", "that", "is", "be", "me", "let", "lets", "let's", "now",
+}
+
+
+def _text(content) -> str:
+    """The text blocks of a message's content."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(b.get("text", "") for b in content if isinstance(b, dict) and b.get("type") == "text")
+    return ""
+
+
+def _tool_uses(content) -> list[dict]:
+    if not isinstance(content, list):
+        return []
+    return [b for b in content if isinstance(b, dict) and b.get("type") == "tool_use"]
+
+
+class _Extract:
+    """Everything pulled from the transcript entries, oldest first."""
+
+    def __init__(self, entries: list[dict], cwd: str):
+        self.cwd = cwd
+        self.requests = []
+        self.assistant_texts = []
+        self.created = set()
+        self.modified = Counter()
+        self.todos = None
+        self.tickets = Counter()
+
+        for entry in entries:
+            message = entry.get("message")
+            if not isinstance(message, dict):
+                continue
+            content = message.get("content", "")
+            text = INJECTED.sub("", _text(content))
+            if entry.get("type") in ("human", "user") and text.strip() and not entry.get("isMeta"):
+                self.requests.append(text.strip())
+            elif entry.get("type") == "assistant":
+                if text.strip():
+                    self.assistant_texts.append(text.strip())
+                for use in _tool_uses(content):
+                    self._tool_use(use)
+            for ticket in TICKET_PATTERN.findall(text):
+                if not NOT_TICKETS.match(ticket):
+                    self.tickets[ticket] += 1
+            for issue in ISSUE_PATTERN.findall(text):
+                self.tickets[f"#{issue}"] += 1
+
+    def _tool_use(self, use: dict):
+        name = use.get("name", "")
+        args = use.get("input") if isinstance(use.get("input"), dict) else {}
+        path = args.get("file_path") or args.get("notebook_path")
+        if path and (name in WRITE_TOOLS or name in EDIT_TOOLS):
+            path = self._relative(path)
+            if name in WRITE_TOOLS and path not in self.modified:
+                self.created.add(path)
+            else:
+                self.modified[path] += 1
+        elif name == "TodoWrite" and isinstance(args.get("todos"), list):
+            self.todos = args["todos"]
+
+    def _relative(self, path: str) -> str:
+        try:
+            if os.path.isabs(path) and os.path.commonpath([path, self.cwd]) == self.cwd:
+                return os.path.relpath(path, self.cwd)
+        except ValueError:
+            pass
+        return path
+
+    def next_steps(self) -> list[str]:
+        steps = []
+        for todo in self.todos or []:
+            if isinstance(todo, dict) and todo.get("status") != "completed" and todo.get("content"):
+                marker = " (in progress)" if todo.get("status") == "in_progress" else ""
+                steps.append(f"{todo['content']}{marker}")
+        for text in self.assistant_texts[-10:] + self.requests[-3:]:
+            for match in TODO_LINE.findall(text):
+                step = match.strip()
+                if step and step not in steps:
+                    steps.append(step)
+        return steps[:MAX_NEXT_STEPS]
+
+    def decisions(self) -> list[str]:
+        found = []
+        for text in self.assistant_texts:
+            for sentence in DECISION_SENTENCE.findall(text):
+                sentence = " ".join(sentence.split())
+                if 30 <= len(sentence) <= 400 and sentence not in found:
+                    found.append(sentence)
+        return found[-MAX_DECISIONS:]
+
+    def discoveries(self) -> list[str]:
+        found = []
+        for text in self.assistant_texts:
+            for sentence in DISCOVERY_SENTENCE.findall(text):
+                sentence = " ".join(sentence.split()).lstrip("-*> ")
+                if 30 <= len(sentence) <= 400 and sentence not in found:
+                    found.append(sentence)
+        return found[-MAX_DISCOVERIES:]
+
+    def questions(self) -> list[str]:
+        found = []
+        for text in self.assistant_texts[-3:]:
+            for question in QUESTION_SENTENCE.findall(text):
+                question = " ".join(question.split()).lstrip("-*> ")
+                if question not in found:
+                    found.append(question)
+        return found[-MAX_QUESTIONS:]
+
+
+def short_title(requests: list[str]) -> str:
+    """A 2-4 word hyphenated slug from the most recent request."""
+    for request in reversed(requests):
+        words = [w for w in re.findall(r'[a-z0-9]+', request.lower()) if w not in TITLE_STOPWORDS]
+        if len(words) >= 2:
+            return "-".join(words[:4])[:50]
+    return "offline-handoff"
+
+
+def _one_line(text: str, limit: int = MAX_REQUEST_CHARS) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def build_handoff(entries: list[dict], cwd: str, trigger: str, reason: str) -> tuple[str, str]:
+    """The handoff document and its short title, from transcript entries (oldest first)."""
+    ex = _Extract(entries, cwd)
+    title = short_title(ex.requests)
+    focus = _one_line(ex.requests[-1], 120) if ex.requests else "(no user messages found)"
+    files = sorted(set(ex.created) | set(ex.modified))
+
+    lines = [
+        f"# Session Handoff - {title.replace('-', ' ').title()}",
+        "",
+        f"**Date**: {datetime.now().strftime('%Y-%m-%d')}",
+        f"**Focus**: {focus}",
+        f"**Status**: Extracted offline from the transcript ({reason}) — no model summary; check the files below",
+        "",
+        "---",
+        "",
+        "## Quick Context",
+        "",
+        "**Recent requests:**",
+    ]
+    lines += [f"- {_one_line(r)}" for r in ex.requests[-RECENT_REQUESTS:]] or ["- (none found)"]
+    lines += ["", "**What Needs Attention:**"]
+    if ex.assistant_texts:
+        lines.append(f"- Last assistant message: {_one_line(ex.assistant_texts[-1])}")
+    if ex.tickets:
+        lines.append(f"- References: {', '.join(t for t, _ in ex.tickets.most_common(10))}")
+
+    lines += ["", "---", "", "## Completed This Session", ""]
+    if files:
+        lines += ["| File | Change | Edits |", "|------|--------|-------|"]
+        for path in files[:MAX_FILES]:
+            change = "created" if path in ex.created else "modified"
+            lines.append(f"| `{path}` | {change} | {ex.modified.get(path, 0) + (1 if path in ex.created else 0)} |")
+    else:
+        lines.append("- No file writes or edits found in the transcript")
+
+    lines += ["", "---", "", "## Key Decisions & Rationale", ""]
+    lines += [f"- {d}" for d in ex.decisions()] or ["- (none stated explicitly in the transcript)"]
+
+    lines += ["", "---", "", "## Technical Discoveries", ""]
+    lines += [f"- {d}" for d in ex.discoveries()] or ["- None recorded (offline handoff)"]
+
+    lines += ["", "---", "", "## Files Changed This Session", "", "### New Files"]
+    lines += [f"- `{p}`" for p in sorted(ex.created)[:MAX_FILES]] or ["- (none)"]
+    lines += ["", "### Modified Files"]
+    lines += [f"- `{p}`" for p in sorted(p for p in ex.modified if p not in ex.created)[:MAX_FILES]] or ["- (none)"]
+
+    lines += ["", "---", "", "## Next Steps", ""]
+    lines += [f"{i}. [ ] {s}" for i, s in enumerate(ex.next_steps(), 1)] or ["1. [ ] Review the last request above and continue"]
+
+    lines += ["", "---", "", "## Open Questions", ""]
+    lines += [f"- {q}" for q in ex.questions()] or ["- (none found)"]
+
+    lines += [
+        "", "---", "", "## Environment", "",
+        f"- **Platform**: {sys.platform}",
+        f"- **Working Directory**: {cwd}",
+        f"- **Trigger**: {trigger}",
+    ]
+    return "\n".join(lines) + "\n", title
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a session handoff from a transcript, offline")
+    parser.add_argument("transcript", help="path to a session transcript (.jsonl)")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current)")
+    args = parser.parse_args()
+
+    entries = []
+    with open(args.transcript, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+    content, title = build_handoff(entries, str(Path(args.cwd).resolve()), "manual", "CLI")
+    print(f"SHORT_TITLE: {title}\n")
+    print(content)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Handoff Packing
+
+Fits the last N handoffs into one token budget for SessionStart, section by
+section, instead of cutting each file at a fixed character count.
+
+A flat cut keeps the top of every handoff, and the top is mostly the
+"Completed This Session" tables. The bottom holds "Next Steps" and "Open
+Questions", which are what the next session needs first. Packing splits each
+handoff into its template sections ("## " headings) and spends the budget in
+priority order across all loaded handoffs:
+
+1. the header (title, Date, Focus, Status) of every handoff, newest first
+2. Quick Context, then Next Steps, Open Questions, Key Decisions, ...
+3. Completed This Session and Environment last
+
+Within a priority level, newer handoffs win. A section that doesn't fit is cut
+at a line boundary if enough budget is left, otherwise dropped and listed as
+omitted. Each handoff is rendered in its original section order. Files are only
+opened once the budget reaches them, so older handoffs are never read once the
+budget is spent.
+
+Token counts are estimated at ~4 characters per token; that is close enough
+for budgeting and needs no tokenizer.
+
+CONFIG (.claude/project.json):
+    "handoff_token_budget": 6000    # default: 2000 per handoff loaded
+"""
+
+import re
+from collections import namedtuple
+from pathlib import Path
+
+DEFAULT_TOKENS_PER_HANDOFF = 2000
+
+# Cap on what's read from any single file, in characters
+MAX_READ_CHARS = 200_000
+
+# Don't bother cutting a section down to less than this many tokens
+MIN_PARTIAL_TOKENS = 80
+
+# Lower number = packed first. Matched by heading prefix, case-insensitive.
+SECTION_PRIORITY = [
+    ("quick context", 1),
+    ("next steps", 2),
+    ("open questions", 3),
+    ("key decisions", 4),
+    ("technical discoveries", 5),
+    ("files changed", 7),
+    ("completed this session", 8),
+    ("environment", 9),
+]
+HEADER_PRIORITY = 0
+UNKNOWN_SECTION_PRIORITY = 6
+
+Section = namedtuple("Section", ["heading", "text", "priority"])
+
+_HEADING = re.compile(r'^## +(.+?)\s*$', re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def section_priority(heading: str) -> int:
+    lowered = heading.lower()
+    for prefix, priority in SECTION_PRIORITY:
+        if lowered.startswith(prefix):
+            return priority
+    return UNKNOWN_SECTION_PRIORITY
+
+
+def split_sections(content: str) -> list[Section]:
+    """Split a handoff into its header and "## " sections.
+
+    Joining the texts of the result reproduces `content` exactly.
+    """
+    sections = []
+    matches = list(_HEADING.finditer(content))
+    first = matches[0].start() if matches else len(content)
+    if first > 0:
+        sections.append(Section("", content[:first], HEADER_PRIORITY))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        heading = match.group(1)
+        sections.append(Section(heading, content[match.start():end], section_priority(heading)))
+    return sections
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens, at a line boundary."""
+    limit = max_tokens * 4
+    cut = text.rfind("\n", 0, limit)
+    if cut <= 0:
+        cut = limit
+    return text[:cut].rstrip() + "\n[... section truncated ...]\n"
+
+
+class _Handoff:
+    """A handoff file, read on first use."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._sections = None
+        self.error = None
+        self.chosen = {}  # section index -> text to print
+
+    @property
+    def sections(self) -> list[Section]:
+        if self._sections is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    content = f.read(MAX_READ_CHARS)
+            except IOError as e:
+                self.error = e
+                content = ""
+            self._sections = split_sections(content)
+        return self._sections
+
+    def render(self) -> str:
+        if self.error is not None:
+            return f"(Could not read: {self.error})"
+        if self._sections is None:
+            return "(Not loaded — session start token budget used up. Read the file if needed.)"
+        kept = [self.chosen[i] for i in range(len(self._sections)) if i in self.chosen]
+        omitted = [s.heading for i, s in enumerate(self._sections) if i not in self.chosen and s.heading]
+        text = "".join(kept).rstrip()
+        if omitted:
+            text += f"\n\n[... omitted for length: {', '.join(omitted)} ...]"
+        return text
+
+
+def pack(handoffs: list[Path], budget_tokens: int) -> list[str]:
+    """Pack handoffs (newest first) into the budget. Returns one text per handoff."""
+    loaded = [_Handoff(path) for path in handoffs]
+    remaining = budget_tokens
+
+    # Walk priority levels top-down; within a level, newest handoff first
+    for priority in sorted({HEADER_PRIORITY, UNKNOWN_SECTION_PRIORITY} | {p for _, p in SECTION_PRIORITY}):
+        for handoff in loaded:
+            if remaining < MIN_PARTIAL_TOKENS:
+                return [h.render() for h in loaded]
+            for i, section in enumerate(handoff.sections):
+                if section.priority != priority:
+                    continue
+                cost = estimate_tokens(section.text)
+                if cost <= remaining:
+                    handoff.chosen[i] = section.text
+                    remaining -= cost
+                elif remaining >= MIN_PARTIAL_TOKENS:
+                    handoff.chosen[i] = _truncate(section.text, remaining)
+                    remaining -= estimate_tokens(handoff.chosen[i])
+    return [h.render() for h in loaded]
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Handoff Generation Policy
+
+How session_handoff.py calls the API: which models, how long each request
+may take, how often to retry, and when to hedge. One slow or overloaded
+response used to hold the hook until its timeout and then leave an offline
+handoff behind; now it costs at most one attempt's deadline.
+
+For each model in order:
+- up to `attempts` tries, each with a `timeout` deadline
+- failed tries are retried after a jittered exponential backoff (or the
+  server's retry-after on a 429)
+- with `hedge_after` set, a try still unanswered after that many seconds
+  gets a second identical request; whichever answers first is used
+- when a model's tries are used up, or the model is rejected outright
+  (400/404), the next model is tried
+An auth error (401/403) stops at once, since no model or retry will fix
+it. With a time `budget` (the inline hook, whose own timeout is 120s) no
+new try starts once it is spent, and each try's deadline is cut to what
+is left.
+
+Every request is logged to ~/.claude/hooks/.state/handoff_requests.jsonl
+with its model, latency and outcome; `python session_handoff.py --usage`
+summarizes them per model.
+
+CONFIG (.claude/project.json):
+    "handoff_generation": {
+        "models": ["claude-haiku-4-5-20251001", "claude-sonnet-4-5"],
+        "timeout": 60,          # seconds per try
+        "attempts": 2,          # tries per model (default: 1 inline, 3 in the worker)
+        "hedge_after": 20,      # seconds; omit or 0 = no hedging
+        "backoff": 2.0          # first retry wait in seconds, doubling
+    }
+"""
+
+import json
+import queue
+import random
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from hook_metrics import percentile
+
+HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
+REQUEST_LOG = HOOKS_STATE_DIR / "handoff_requests.jsonl"
+
+DEFAULT_MODEL = "claude-haiku-4-5-20251001"
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_BACKOFF = 2.0
+MAX_BACKOFF = 30.0
+
+# Not worth starting a try with less time than this left in the budget
+MIN_ATTEMPT_SECONDS = 5.0
+
+# Retrying can't help these
+FATAL_STATUSES = {401, 403}
+# This model won't take the request; the next one might
+NEXT_MODEL_STATUSES = {400, 404, 413, 422}
+
+Policy = namedtuple("Policy", ["models", "attempts", "timeout", "hedge_after", "backoff"])
+
+_log_lock = threading.Lock()
+_info_lock = threading.Lock()
+
+
+class GenerationFailed(Exception):
+    """Every model and try failed; `errors` holds one message per request."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__(errors[-1] if errors else "no request was made")
+        self.errors = errors
+
+
+class _DeadlineExceeded(Exception):
+    pass
+
+
+def load_policy(config: dict, attempts: int = 1) -> Policy:
+    """The generation policy from project config; `attempts` is the caller's
+    default tries per model."""
+    settings = config.get("handoff_generation")
+    if not isinstance(settings, dict):
+        settings = {}
+
+    def number(name, default):
+        value = settings.get(name, default)
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0 else default
+
+    models = settings.get("models")
+    if not isinstance(models, list) or not all(isinstance(m, str) and m for m in models) or not models:
+        models = [DEFAULT_MODEL]
+    return Policy(
+        models=models,
+        attempts=max(int(number("attempts", attempts)), 1),
+        timeout=number("timeout", DEFAULT_TIMEOUT) or DEFAULT_TIMEOUT,
+        hedge_after=number("hedge_after", 0) or None,
+        backoff=number("backoff", DEFAULT_BACKOFF),
+    )
+
+
+def _status(error: Exception) -> int | None:
+    return getattr(error, "status_code", None)
+
+
+def _retry_after(error: Exception) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _describe(error: Exception) -> str:
+    status = _status(error)
+    return f"{type(error).__name__} {status}" if status else type(error).__name__
+
+
+def _log(record: dict):
+    record = dict(ts=datetime.now().isoformat(timespec="seconds"),
+                  **{k: v for k, v in record.items() if k != "logged"})
+    try:
+        HOOKS_STATE_DIR.mkdir(parents=True, exist_ok=True)
+        with _log_lock, open(REQUEST_LOG, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+
+
+def _create(client, kwargs: dict):
+    return client.messages.create(**kwargs)
+
+
+def _request(send, client, kwargs: dict, results: queue.Queue, info: dict):
+    """One API request on its own thread; posts (info, response or exception)."""
+    started = time.perf_counter()
+    try:
+        outcome = send(client, kwargs)
+    except Exception as e:
+        outcome = e
+    with _info_lock:
+        info["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        info["outcome"] = _describe(outcome) if isinstance(outcome, Exception) else "ok"
+        abandoned = info.get("abandoned")
+    if abandoned:
+        # A hedge that lost the race: logged when it finally finishes, if the
+        # process is still around
+        _log(info)
+    else:
+        results.put((info, outcome))
+
+
+def _attempt(client, kwargs: dict, model: str, timeout: float, hedge_after: float | None, base: dict, send):
+    """One try at a model, hedged if configured. Returns the response or
+    raises the last request's error (or _DeadlineExceeded)."""
+    results = queue.Queue()
+    kwargs = dict(kwargs, model=model, timeout=timeout)
+    started = time.monotonic()
+    deadline = started + timeout
+    hedge_at = started + hedge_after if hedge_after and hedge_after < timeout else None
+    running = []
+
+    def launch(hedge: bool):
+        info = dict(base, model=model, hedge=hedge)
+        running.append(info)
+        # Daemon threads: a request still in flight never holds the hook open
+        threading.Thread(target=_request, args=(send, client, kwargs, results, info), daemon=True).start()
+
+    def settle(winner: dict | None) -> int:
+        """Log the requests we stop waiting for: finished ones now, running
+        ones when they finish (after a win) or as deadline misses (returns
+        how many)."""
+        missed = 0
+        with _info_lock:
+            for info in running:
+                if info is winner or info.get("logged"):
+                    continue
+                if "outcome" not in info and winner is not None:
+                    info["abandoned"] = True
+                    continue
+                if "outcome" not in info:
+                    info.update(outcome="deadline", ms=round((time.monotonic() - started) * 1000, 1))
+                    missed += 1
+                info["logged"] = True
+                _log(info)
+        return missed
+
+    launch(hedge=False)
+    error = None
+    while not all(info.get("logged") for info in running):
+        wake = min(deadline, hedge_at) if hedge_at else deadline
+        try:
+            info, outcome = results.get(timeout=max(wake - time.monotonic(), 0))
+        except queue.Empty:
+            if hedge_at and time.monotonic() >= hedge_at:
+                hedge_at = None
+                launch(hedge=True)
+            elif time.monotonic() >= deadline:
+                break
+            continue
+        info["logged"] = True
+        if isinstance(outcome, Exception):
+            _log(info)
+            error = outcome
+            # Failed before the hedge was due: retry instead of hedging
+            hedge_at = None
+            continue
+        info["used"] = True
+        _log(info)
+        settle(winner=info)
+        return outcome
+
+    if not settle(winner=None) and error is not None:
+        raise error
+    raise _DeadlineExceeded(f"no response from {model} within {timeout:g}s")
+
+
+def call(client, kwargs: dict, policy: Policy, purpose: str, budget: float | None = None, send=None):
+    """Make the request (messages.create kwargs, without model) under the
+    policy. Returns (response, model). Raises GenerationFailed.
+
+    `send(client, kwargs)` makes one request and returns its response
+    (default: client.messages.create); session_handoff.py passes one that
+    streams.
+    """
+    send = send or _create
+    started = time.monotonic()
+    errors = []
+    for model in policy.models:
+        for attempt in range(policy.attempts):
+            timeout = policy.timeout
+            if budget is not None:
+                remaining = budget - (time.monotonic() - started)
+                if remaining < MIN_ATTEMPT_SECONDS:
+                    errors.append(f"time budget of {budget:.0f}s spent")
+                    raise GenerationFailed(errors)
+                timeout = min(timeout, remaining)
+
+            base = {"purpose": purpose, "attempt": attempt + 1}
+            try:
+                return _attempt(client, kwargs, model, timeout, policy.hedge_after, base, send), model
+            except _DeadlineExceeded as e:
+                errors.append(str(e))
+                retry_after = None
+            except Exception as e:
+                errors.append(f"{model}: {e}")
+                status = _status(e)
+                if status in FATAL_STATUSES:
+                    raise GenerationFailed(errors)
+                if status in NEXT_MODEL_STATUSES:
+                    break
+                retry_after = _retry_after(e)
+
+            if attempt + 1 < policy.attempts:
+                wait = policy.backoff * 2 ** attempt
+                # Jittered so hooks that failed together don't retry together
+                wait = min(retry_after or random.uniform(wait / 2, wait), MAX_BACKOFF)
+                if budget is not None:
+                    wait = min(wait, max(budget - (time.monotonic() - started) - MIN_ATTEMPT_SECONDS, 0))
+                time.sleep(wait)
+    raise GenerationFailed(errors)
+
+
+def report(days: int = 30):
+    """Print request latency and outcomes per model from REQUEST_LOG."""
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+    by_model = {}
+    try:
+        with open(REQUEST_LOG, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("ts", "") >= cutoff:
+                    by_model.setdefault(record.get("model", "?"), []).append(record)
+    except FileNotFoundError:
+        return
+
+    print(f"\nAPI requests, last {days} days")
+    print(f"{'model':<28} {'requests':>8} {'ok':>5} {'hedged':>6} {'deadline':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for model, records in sorted(by_model.items()):
+        ok = [r for r in records if r.get("outcome") == "ok"]
+        latencies = sorted(r["ms"] for r in ok if "ms" in r)
+        hedged = sum(1 for r in records if r.get("hedge"))
+        deadline = sum(1 for r in records if r.get("outcome") == "deadline")
+        p50 = f"{percentile(latencies, 50):.0f}" if latencies else "-"
+        p95 = f"{percentile(latencies, 95):.0f}" if latencies else "-"
+        print(f"{model[:28]:<28} {len(records):>8} {len(ok) / len(records):>5.0%} {hedged:>6} {deadline:>8} {p50:>8} {p95:>8}")
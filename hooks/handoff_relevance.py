@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Handoff Relevance
+
+Picks which handoffs session_start.py loads by relevance to the work in
+front of you, not just by date. When several workers share a repo on
+different branches, "the newest handoff" is often someone else's.
+
+Each handoff gets a small feature record when it is written (stored in
+<handoff_dir>/.index/features.json):
+- branch:  the git branch checked out when the handoff was written
+- tickets: ticket keys mentioned (PROJ-123)
+- files:   file paths mentioned
+
+At session start, the newest CANDIDATES handoffs are scored against the
+current git context:
+- same branch as now (ignoring main/master/develop)        +4
+- each ticket key shared with the branch name               +3
+- each file shared with uncommitted or recently committed
+  changes (up to 5)                                         +1
+
+The git context is cached in .index/git_context.json, keyed by HEAD, the
+reflog and the git index's mtime (all plain file stats), so a session start
+with nothing committed, checked out or staged since the last one runs no git
+at all. Git runs with optional locks off: `git status` would otherwise
+refresh and lock the index, racing the user's own git commands.
+
+The top N by score are loaded; ties (including "no signal at all") go to
+the newest, so a repo without git or without matches behaves exactly like
+plain recency. Handoffs written before this existed get their record
+extracted from the file the first time they're a candidate.
+
+CONFIG (.claude/project.json):
+    "handoff_selection": "relevance"   # default; "recent" = newest only
+"""
+
+import json
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+
+import handoff_index
+
+FEATURES_FILENAME = "features.json"
+GIT_CONTEXT_FILENAME = "git_context.json"
+
+# Unstaged edits don't touch anything the cache key stats; re-run git after this
+GIT_CONTEXT_MAX_AGE = 600
+
+# How many of the newest handoffs are considered
+CANDIDATES = 30
+
+# Each git call gets this long; session start must stay well inside its 10s
+GIT_TIMEOUT = 2.0
+
+# Branches everyone works on tell us nothing about which handoff is relevant
+SHARED_BRANCHES = {"main", "master", "develop", "dev", "trunk", "head"}
+
+BRANCH_SCORE = 4
+TICKET_SCORE = 3
+FILE_SCORE = 1
+MAX_FILE_MATCHES = 5
+
+TICKET_PATTERN = re.compile(r'\b([A-Z][A-Z0-9]{1,9}-\d+)\b')
+# Backticked or bare paths with a directory part or an extension
+PATH_PATTERN = re.compile(r'`([^`\s]+\.[A-Za-z0-9]{1,8})`|(?<![\w/.])((?:[\w.-]+/)+[\w.-]+\.[A-Za-z0-9]{1,8})\b')
+
+
+def extract_tickets(text: str) -> list[str]:
+    return sorted(set(TICKET_PATTERN.findall(text.upper())))
+
+
+def extract_files(text: str) -> list[str]:
+    files = set()
+    for backticked, bare in PATH_PATTERN.findall(text):
+        path = (backticked or bare).strip("./")
+        if path and "://" not in path:
+            files.add(path)
+    return sorted(files)
+
+
+def extract_features(content: str, branch: str | None) -> dict:
+    return {"branch": branch, "tickets": extract_tickets(content), "files": extract_files(content)}
+
+
+def _git(cwd: str, *args: str) -> str:
+    try:
+        result = subprocess.run(
+            ["git", "--no-optional-locks", *args], cwd=cwd, capture_output=True, text=True,
+            timeout=GIT_TIMEOUT, env=dict(os.environ, GIT_OPTIONAL_LOCKS="0"),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return result.stdout if result.returncode == 0 else ""
+
+
+def current_branch(cwd: str) -> str | None:
+    branch = _git(cwd, "rev-parse", "--abbrev-ref", "HEAD").strip()
+    return branch if branch and branch != "HEAD" else None
+
+
+def _git_dir(cwd: str) -> Path | None:
+    """The repository's git directory, found without running git."""
+    path = Path(cwd).resolve()
+    for directory in (path, *path.parents):
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            # A worktree or submodule: "gitdir: <path>"
+            try:
+                text = dot_git.read_text(encoding="utf-8").strip()
+            except (OSError, UnicodeDecodeError):
+                return None
+            if text.startswith("gitdir:"):
+                return (directory / text[len("gitdir:"):].strip()).resolve()
+            return None
+    return None
+
+
+def _git_stamp(git_dir: Path) -> list | None:
+    """What the git context depends on: HEAD, and the mtimes of the reflog
+    (moves on every commit, checkout and reset) and the index (staging)."""
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    stamp = [head]
+    for name in ("logs/HEAD", "index"):
+        try:
+            stamp.append((git_dir / name).stat().st_mtime_ns)
+        except OSError:
+            stamp.append(0)
+    return stamp
+
+
+def git_context(cwd: str, handoff_dir: Path | None = None) -> dict | None:
+    """Current branch, its ticket keys, and recently touched files; None outside
+    git. With `handoff_dir`, reused from its .index/ while the repo's HEAD,
+    reflog and index are unchanged."""
+    git_dir = _git_dir(cwd)
+    stamp = _git_stamp(git_dir) if git_dir else None
+    cache_path = handoff_dir / handoff_index.INDEX_DIRNAME / GIT_CONTEXT_FILENAME if handoff_dir else None
+    if stamp and cache_path:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if (cached.get("cwd") == cwd and cached.get("stamp") == stamp
+                    and time.time() - cached.get("at", 0) < GIT_CONTEXT_MAX_AGE):
+                branch = cached["branch"]
+                return {"branch": branch, "tickets": set(extract_tickets(branch)), "files": set(cached["files"])}
+        except (FileNotFoundError, json.JSONDecodeError, IOError, AttributeError, KeyError, TypeError):
+            pass
+
+    context = _run_git_context(cwd)
+    if context is not None and stamp and cache_path:
+        try:
+            handoff_index.index_dir(handoff_dir)
+            handoff_index.write_atomic(cache_path, json.dumps({
+                "cwd": cwd, "stamp": stamp, "at": time.time(),
+                "branch": context["branch"], "files": sorted(context["files"]),
+            }))
+        except OSError:
+            pass
+    return context
+
+
+def _run_git_context(cwd: str) -> dict | None:
+    branch = current_branch(cwd)
+    if branch is None:
+        return None
+    changed = set()
+    for line in _git(cwd, "status", "--porcelain").splitlines():
+        path = line[3:].split(" -> ")[-1].strip().strip('"')
+        if path:
+            changed.add(path)
+    for line in _git(cwd, "log", "-n", "5", "--name-only", "--format=").splitlines():
+        if line.strip():
+            changed.add(line.strip())
+    return {"branch": branch, "tickets": set(extract_tickets(branch)), "files": changed}
+
+
+def _features_path(handoff_dir: Path) -> Path:
+    return handoff_dir / handoff_index.INDEX_DIRNAME / FEATURES_FILENAME
+
+
+def load_features(handoff_dir: Path) -> dict:
+    try:
+        with open(_features_path(handoff_dir), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError, IOError):
+        return {}
+
+
+def save_features(handoff_dir: Path, features: dict):
+    try:
+        handoff_index.index_dir(handoff_dir)
+        handoff_index.write_atomic(_features_path(handoff_dir), json.dumps(features))
+    except OSError:
+        pass
+
+
+def update_features(handoff_dir: Path, records: dict):
+    """Add feature records to features.json.
+
+    Under the same .index/ lock as handoff_index.add_handoff: the inline
+    writer, the background worker and session start's backfill can all
+    read-modify-write the file at once, and would drop each other's records.
+    """
+    try:
+        with handoff_index.dir_lock(handoff_index.index_dir(handoff_dir)):
+            features = load_features(handoff_dir)
+            features.update(records)
+            save_features(handoff_dir, features)
+    except OSError:
+        pass
+
+
+def record_handoff(handoff_dir: Path, name: str, content: str, branch: str | None):
+    """Store the feature record for a handoff. Called by session_handoff.py at write time."""
+    update_features(handoff_dir, {name: extract_features(content, branch)})
+
+
+def _files_match(mentioned: str, changed: set[str]) -> bool:
+    # Handoffs often mention paths relative to a subdirectory, or bare names
+    return any(c == mentioned or c.endswith("/" + mentioned) or mentioned.endswith("/" + c) for c in changed)
+
+
+def score(record: dict, context: dict) -> int:
+    total = 0
+    branch = record.get("branch")
+    if branch and branch == context["branch"] and branch.lower() not in SHARED_BRANCHES:
+        total += BRANCH_SCORE
+    total += TICKET_SCORE * len(context["tickets"] & set(record.get("tickets", [])))
+    file_matches = sum(1 for f in record.get("files", []) if _files_match(f, context["files"]))
+    total += FILE_SCORE * min(file_matches, MAX_FILE_MATCHES)
+    return total
+
+
+def select(handoff_dir: Path, cwd: str, count: int) -> list[Path] | None:
+    """The `count` most relevant handoffs, best first.
+
+    None when relevance doesn't change the pick (no git, too few handoffs,
+    or the newest N win anyway) — callers then use plain recency.
+    """
+    names = handoff_index.load_index(handoff_dir)[:CANDIDATES]
+    if len(names) <= count:
+        return None
+    context = git_context(cwd, handoff_dir)
+    if context is None:
+        return None
+
+    features = load_features(handoff_dir)
+    missing = [n for n in names if n not in features]
+    for name in missing:
+        try:
+            with open(handoff_dir / name, 'r', encoding='utf-8') as f:
+                features[name] = extract_features(f.read(), None)
+        except (IOError, UnicodeDecodeError):
+            features[name] = extract_features("", None)
+    if missing:
+        update_features(handoff_dir, {n: features[n] for n in missing})
+
+    # names is newest first and sorted() is stable, so ties keep recency order
+    ranked = sorted(names, key=lambda n: -score(features[n], context))[:count]
+    if ranked == names[:count]:
+        return None
+    return [handoff_dir / n for n in ranked]
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Handoff Search
+
+Full-text search over every handoff in a project's session_handoffs
+directory, one row per template section, using SQLite FTS5. The database
+lives at <handoff_dir>/.index/search.sqlite.
+
+session_handoff.py indexes each handoff as it writes it. Anything else that
+changes the directory (git pull, hand-written handoffs, deletions) is caught
+up incrementally on the next query: only files whose mtime or size changed are
+re-read. Handoffs rolled into archive bundles (see handoff_archive.py) stay
+searchable: they're indexed from the bundle, located via its manifest.
+
+CLI:
+    python handoff_search.py "rate limiter"            # top 5 sections
+    python handoff_search.py PROJ-123 -k 10
+    python handoff_search.py hooks/session_start.py --cwd ~/code/app
+    python handoff_search.py --rebuild                 # reindex from scratch
+
+HOOK (UserPromptSubmit, see settings-template.json):
+    python handoff_search.py --hook
+
+Prompts like "load previous handoffs about the rate limiter" get the
+top-matching sections added as context, so Claude doesn't reread whole
+files blind. Every other prompt exits immediately without touching SQLite.
+The first prompt after a post-compact resume whose handoff was still being
+generated also gets that handoff, once written (see handoff_worker.py).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+import handoff_archive
+import handoff_index
+import hook_runtime
+from handoff_packing import split_sections
+
+DB_FILENAME = "search.sqlite"
+SCHEMA_VERSION = 1
+
+# Longest section body printed per result
+MAX_RESULT_CHARS = 2000
+
+# "load previous handoffs about X" / "search handoffs for X" / "load previous handoff on X"
+HOOK_PROMPT = re.compile(
+    r'\b(?:load|search|find)\s+(?:previous\s+|old\s+|past\s+)?handoffs?\s+(?:about|for|on|re:?|mentioning)\s+(.+)',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _db_path(handoff_dir: Path) -> Path:
+    return handoff_dir / handoff_index.INDEX_DIRNAME / DB_FILENAME
+
+
+def connect(handoff_dir: Path) -> sqlite3.Connection:
+    handoff_index.index_dir(handoff_dir)
+    conn = sqlite3.connect(str(_db_path(handoff_dir)), timeout=5.0)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        conn.executescript("""
+            DROP TABLE IF EXISTS sections;
+            DROP TABLE IF EXISTS files;
+            DROP TABLE IF EXISTS meta;
+            CREATE VIRTUAL TABLE sections USING fts5(name UNINDEXED, heading, body);
+            CREATE TABLE files (name TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER);
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER);
+        """)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+def _index_content(conn: sqlite3.Connection, name: str, content: str, mtime_ns: int, size: int):
+    conn.execute("DELETE FROM sections WHERE name = ?", (name,))
+    conn.executemany(
+        "INSERT INTO sections (name, heading, body) VALUES (?, ?, ?)",
+        [(name, s.heading or "(header)", s.text) for s in split_sections(content) if s.text.strip()],
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO files (name, mtime_ns, size) VALUES (?, ?, ?)",
+        (name, mtime_ns, size),
+    )
+
+
+def _index_file(conn: sqlite3.Connection, path: Path, stat: os.stat_result):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except (IOError, UnicodeDecodeError):
+        return
+    _index_content(conn, path.name, content, stat.st_mtime_ns, stat.st_size)
+
+
+def index_handoff(handoff_dir: Path, path: Path):
+    """Index (or re-index) one handoff. Called by session_handoff.py after each write."""
+    conn = connect(handoff_dir)
+    try:
+        with conn:
+            _index_file(conn, path, path.stat())
+    finally:
+        conn.close()
+
+
+def sync(conn: sqlite3.Connection, handoff_dir: Path):
+    """Bring the index up to date with the directory and the archive, re-reading only changed files."""
+    mtime = handoff_index.dir_mtime(handoff_dir)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'dir_mtime_ns'").fetchone()
+    known = dict((name, (m, s)) for name, m, s in conn.execute("SELECT name, mtime_ns, size FROM files"))
+    if row and row[0] == mtime and known:
+        # Nothing added or removed; in-place edits are caught by the per-file check below
+        names = list(known)
+    else:
+        names = handoff_index.load_index(handoff_dir)
+
+    # The manifest keeps each archived file's original mtime and size, so a
+    # handoff that moved into the archive unchanged is not re-read
+    archived = handoff_archive.load_manifest(handoff_dir)
+    live = set(names)
+
+    with conn:
+        for name in names:
+            path = handoff_dir / name
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if known.get(name) != (stat.st_mtime_ns, stat.st_size):
+                _index_file(conn, path, stat)
+        for name, entry in archived.items():
+            if name in live or known.get(name) == (entry.get("mtime_ns"), entry.get("size")):
+                continue
+            content = handoff_archive.read_archived(handoff_dir, name, archived)
+            if content is not None:
+                _index_content(conn, name, content, entry.get("mtime_ns"), entry.get("size"))
+        for name in set(known) - live - set(archived):
+            if not (handoff_dir / name).exists():
+                conn.execute("DELETE FROM sections WHERE name = ?", (name,))
+                conn.execute("DELETE FROM files WHERE name = ?", (name,))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dir_mtime_ns', ?)", (mtime,))
+
+
+def build_query(text: str) -> str:
+    """Turn free text into an FTS5 query: each term quoted (so PROJ-123 and
+    paths aren't parsed as operators), any term may match, bm25 ranks."""
+    terms = re.findall(r'[\w#./-]+', text)
+    terms = [t.strip(".-/") for t in terms]
+    return " OR ".join('"{}"'.format(t.replace('"', '""')) for t in terms if t)
+
+
+def search(handoff_dir: Path, query: str, k: int = 5) -> list[tuple[str, str, str]]:
+    """Top-k (handoff name, section heading, section text) for a query."""
+    fts_query = build_query(query)
+    if not fts_query:
+        return []
+    conn = connect(handoff_dir)
+    try:
+        sync(conn, handoff_dir)
+        rows = conn.execute(
+            "SELECT name, heading, body FROM sections WHERE sections MATCH ? "
+            "ORDER BY bm25(sections, 0.0, 2.0, 1.0), name DESC LIMIT ?",
+            (fts_query, k),
+        ).fetchall()
+    finally:
+        conn.close()
+    return rows
+
+
+def format_results(query: str, results: list[tuple[str, str, str]]) -> str:
+    if not results:
+        return f"No handoff sections match: {query}"
+    parts = [f"Handoff sections matching: {query}"]
+    for name, heading, body in results:
+        body = body.strip()
+        if len(body) > MAX_RESULT_CHARS:
+            body = body[:MAX_RESULT_CHARS] + "\n[... truncated — open the file for the rest ...]"
+        parts.append(f"{'-'*40}\n{name} — {heading}\n{'-'*40}\n{body}")
+    return "\n\n".join(parts)
+
+
+def format_resumed(path: Path, cwd: str) -> str:
+    """The handoff written for the compaction this session resumed from."""
+    import session_brief
+
+    budget = session_brief.token_budget(hook_runtime.project_config(cwd), 1)
+    return "\n".join([
+        "=" * 60,
+        "SESSION HANDOFF FROM THE LAST COMPACTION (finished after the resume)",
+        "=" * 60,
+        session_brief.render([path], budget),
+        "=" * 60,
+    ])
+
+
+def _find_dir(cwd: str) -> Path | None:
+    return hook_runtime.find_handoff_directory(cwd)
+
+
+def hook_main():
+    try:
+        hook_input = json.load(sys.stdin)
+    except json.JSONDecodeError:
+        sys.exit(0)
+
+    # A post-compact resume that started before its handoff was written
+    # gets the handoff with the first prompt after it lands
+    if hook_input.get("session_id"):
+        import handoff_worker
+
+        resumed = handoff_worker.resumed_handoff(hook_input["session_id"])
+        if resumed is not None:
+            print(format_resumed(resumed, hook_input.get("cwd", os.getcwd())))
+
+    match = HOOK_PROMPT.search(hook_input.get("prompt", ""))
+    if not match:
+        sys.exit(0)
+
+    query = match.group(1).strip()
+    handoff_dir = _find_dir(hook_input.get("cwd", os.getcwd()))
+    if not handoff_dir:
+        sys.exit(0)
+    try:
+        results = search(handoff_dir, query)
+    except sqlite3.Error as e:
+        print(f"Handoff search unavailable: {e}", file=sys.stderr)
+        sys.exit(0)
+    print(format_results(query, results))
+
+
+def main():
+    # Results are handoff text (dashes, arrows); cp1252 consoles can't print it
+    hook_runtime.utf8_stdout()
+    if "--hook" in sys.argv[1:]:
+        hook_main()
+        return
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Search session handoffs")
+    parser.add_argument("query", nargs="*", help="keywords, ticket IDs or file paths")
+    parser.add_argument("--cwd", default=os.getcwd(), help="project directory (default: current)")
+    parser.add_argument("-k", type=int, default=5, help="number of sections to return (default 5)")
+    parser.add_argument("--rebuild", action="store_true", help="drop and rebuild the search index")
+    args = parser.parse_args()
+
+    handoff_dir = _find_dir(args.cwd)
+    if not handoff_dir:
+        print(f"No session_handoffs directory found under {args.cwd}")
+        sys.exit(1)
+
+    try:
+        if args.rebuild:
+            _db_path(handoff_dir).unlink(missing_ok=True)
+            conn = connect(handoff_dir)
+            sync(conn, handoff_dir)
+            count = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            conn.close()
+            print(f"Indexed {count} handoff(s) into {_db_path(handoff_dir)}")
+            if not args.query:
+                return
+        query = " ".join(args.query)
+        if not query:
+            parser.error("a query is required")
+        print(format_results(query, search(handoff_dir, query, args.k)))
+    except sqlite3.Error as e:
+        print(f"Error: {e} (SQLite with FTS5 is required)", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Handoff Worker
+
+Takes handoff generation off the PreCompact/SessionEnd critical path. The
+API call behind a handoff can take most of the hook's 120s timeout, and the
+user waits through all of it. Instead session_handoff.py snapshots the
+conversation window into a spool file and returns at once; this worker,
+started detached, drains the spool — generating each handoff (with
+retries) and writing it atomically.
+
+SPOOL (~/.claude/hooks/.state/handoff_spool/):
+    <project key>-<session key>-<time_ns>.json    one pending handoff, oldest first
+    failed/                         jobs that crashed the worker MAX_JOB_ATTEMPTS times
+
+A single worker runs at a time (flock on handoff_worker.lock); it exits
+when the spool is empty. session_handoff.py spawns one after every enqueue,
+which is a no-op if one is already running.
+
+POST-COMPACT RESUME:
+A resume right after compaction usually starts before the handoff for it
+is written (an API handoff takes longer than SessionStart's 10s timeout).
+session_start.py doesn't wait: it loads the previous handoff, and if
+mark_resume() finds this session's job still spooled, says the new one is
+on its way. The marker lives in hook_state (namespace "resume", with a
+TTL); write_handoff records the file the session's job wrote in it
+(note_written). On the next prompt, handoff_search.py's UserPromptSubmit
+hook gets that file from resumed_handoff() and adds it to the context —
+the session's own handoff, not whichever is newest in the project.
+
+CLI:
+    python handoff_worker.py            # drain the spool in the foreground
+    python handoff_worker.py --status   # list pending and failed jobs
+
+Unix/macOS only (needs fcntl). On Windows, or with
+MOTHER_CLAUDE_HANDOFF_WORKER=0, session_handoff.py generates inline as before.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import hook_state
+
+HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
+SPOOL_DIR = HOOKS_STATE_DIR / "handoff_spool"
+FAILED_DIR = SPOOL_DIR / "failed"
+LOCK_PATH = HOOKS_STATE_DIR / "handoff_worker.lock"
+
+# A job is given up on (moved to failed/) after crashing the worker this often
+MAX_JOB_ATTEMPTS = 3
+
+# API tries per model before falling back to the next model, then to an
+# offline handoff ("attempts" in handoff_generation overrides it)
+API_ATTEMPTS = 3
+
+# hook_state namespace for sessions that resumed before their handoff was
+# written; a marker not picked up within the TTL expires
+RESUME_NAMESPACE = "resume"
+RESUME_MARKER_TTL = 3600
+
+
+def enabled() -> bool:
+    if os.environ.get("MOTHER_CLAUDE_HANDOFF_WORKER", "1") == "0":
+        return False
+    try:
+        import fcntl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def project_key(cwd: str) -> str:
+    return hashlib.md5(str(Path(cwd).resolve()).encode()).hexdigest()[:16]
+
+
+def session_key(session_id: str) -> str:
+    return hashlib.md5(session_id.encode()).hexdigest()[:16]
+
+
+def pending(cwd: str | None = None, session_id: str | None = None) -> list[Path]:
+    """Spooled jobs, oldest first — for one project (and session), or all of them."""
+    if cwd and session_id:
+        pattern = f"{project_key(cwd)}-{session_key(session_id)}-*.json"
+    else:
+        pattern = f"{project_key(cwd)}-*.json" if cwd else "*.json"
+    try:
+        return sorted(SPOOL_DIR.glob(pattern), key=lambda p: p.name.rsplit("-", 1)[-1])
+    except OSError:
+        return []
+
+
+def spawn_worker():
+    """Start this script detached from the hook process."""
+    import subprocess
+
+    try:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def enqueue(job: dict) -> Path | None:
+    """Spool a job and make sure a worker is running. None if the caller
+    should generate inline instead (worker disabled or unsupported, spool
+    not writable)."""
+    if not enabled():
+        return None
+    from handoff_index import write_atomic
+
+    path = SPOOL_DIR / f"{project_key(job['cwd'])}-{session_key(job['session_id'])}-{time.time_ns()}.json"
+    try:
+        SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(dict(job, attempts=0)))
+    except OSError:
+        return None
+    spawn_worker()
+    return path
+
+
+def mark_resume(session_id: str, cwd: str) -> bool:
+    """On a post-compact resume: True if this session's handoff is still
+    spooled, in which case a marker now waits for it (see note_written)."""
+    if not pending(cwd, session_id):
+        return False
+    key = session_key(session_id)
+    hook_state.put(RESUME_NAMESPACE, key, {"cwd": cwd}, ttl=RESUME_MARKER_TTL)
+    if pending(cwd, session_id):
+        return True
+    # Written between the two checks: kept only if note_written saw the marker
+    marker = hook_state.get(RESUME_NAMESPACE, key)
+    if marker and marker.get("written"):
+        return True
+    hook_state.delete(RESUME_NAMESPACE, key)
+    return False
+
+
+def note_written(session_id: str, path: Path):
+    """Record the handoff a session's job wrote, if the session is waiting for it."""
+    hook_state.update(RESUME_NAMESPACE, session_key(session_id),
+                      lambda marker: dict(marker, written=str(path)) if marker else None,
+                      ttl=RESUME_MARKER_TTL)
+
+
+def resumed_handoff(session_id: str) -> Path | None:
+    """The handoff this session resumed without, once it has been written.
+
+    Returned once (the marker is removed). None while it is still being
+    generated, if the job failed for good, and for sessions with no marker.
+    """
+    key = session_key(session_id)
+    marker = hook_state.get(RESUME_NAMESPACE, key)
+    if marker is None:
+        return None
+    written = marker.get("written")
+    if not written and pending(marker.get("cwd"), session_id):
+        return None
+    hook_state.delete(RESUME_NAMESPACE, key)
+    # No file recorded and nothing spooled: the job ended up in failed/
+    path = Path(written) if written else None
+    return path if path is not None and path.is_file() else None
+
+
+def _acquire_lock():
+    """Take the single-instance lock, or return None if another worker holds it."""
+    import fcntl
+
+    HOOKS_STATE_DIR.mkdir(parents=True, exist_ok=True)
+    lock_file = open(LOCK_PATH, "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+def process(path: Path):
+    """Generate and write the handoff for one spooled job, then remove it."""
+    from handoff_index import write_atomic
+    import hook_metrics
+    import session_handoff
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            job = json.load(f)
+    except FileNotFoundError:
+        return
+    except (json.JSONDecodeError, IOError):
+        job = None
+
+    if job is None or job.get("attempts", 0) >= MAX_JOB_ATTEMPTS:
+        FAILED_DIR.mkdir(parents=True, exist_ok=True)
+        os.replace(path, FAILED_DIR / path.name)
+        return
+
+    # Count the attempt first, so a job that kills the worker is eventually set aside
+    job["attempts"] = job.get("attempts", 0) + 1
+    write_atomic(path, json.dumps(job))
+
+    hook_metrics.start("handoff_worker", trigger=job.get("trigger", ""))
+    try:
+        written = session_handoff.write_handoff(job, session_handoff.get_api_key(), attempts=API_ATTEMPTS)
+    finally:
+        hook_metrics.finish()
+    if written is None:
+        raise OSError(f"handoff for {path.name} could not be saved")
+    path.unlink(missing_ok=True)
+
+
+def run():
+    """Drain the spool, then exit. Returns at once if another worker is running."""
+    while pending():
+        lock = _acquire_lock()
+        if lock is None:
+            return
+        try:
+            for path in pending():
+                try:
+                    process(path)
+                except Exception as e:
+                    # Left in the spool with its attempt counted; retried below
+                    print(f"handoff_worker: {path.name}: {e}", file=sys.stderr)
+        finally:
+            lock.close()
+        # Checked again after releasing the lock: a job spooled while we held
+        # it had its own worker spawn bounce off the lock
+
+
+def main():
+    if "--status" in sys.argv[1:]:
+        jobs = pending()
+        failed = sorted(FAILED_DIR.glob("*.json")) if FAILED_DIR.is_dir() else []
+        for path in jobs:
+            print(f"  pending  {path.name}")
+        for path in failed:
+            print(f"  failed   {path.name}")
+        print(f"{len(jobs)} pending, {len(failed)} failed handoff job(s) in {SPOOL_DIR}")
+        return
+
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Hook Startup Benchmark
+
+Times each hook's cold start as Claude Code sees it: a fresh interpreter,
+the hook's imports, and its common path, from spawn to exit. Hooks run on
+every session start, prompt and permission request, so an import added at
+module level is paid on every one of them. This fails when a hook's median
+goes over its budget.
+
+Every hook runs against a throwaway HOME and project (BENCH_HANDOFFS
+handoffs, a BENCH_MESSAGES-message transcript), with the JSON on stdin that
+Claude Code sends, once to warm up and then --runs times:
+
+    session_start      SessionStart, the pre-rendered brief
+    session_handoff    PreCompact with nothing new since the last handoff
+    handoff_search     UserPromptSubmit with an ordinary prompt
+    auto_approve       PermissionRequest for `git status`, in-process
+    approve_client     the same through approve_client.py -S and the daemon
+
+A bare `python -c pass` is timed too: budgets include interpreter startup,
+so on a much slower machine scale them with --scale rather than editing them.
+
+CLI:
+    python hook_bench.py                       # all hooks; exit 1 if any is over budget
+    python hook_bench.py --hook session_start --runs 30
+    python hook_bench.py --scale 2             # double every budget
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from hook_metrics import percentile
+
+HOOKS_DIR = Path(__file__).resolve().parent
+
+DEFAULT_RUNS = 15
+BENCH_HANDOFFS = 20
+BENCH_MESSAGES = 400
+
+# Median wall-clock budget per hook in milliseconds, interpreter start included
+BUDGETS_MS = {
+    "session_start": 150,
+    "session_handoff": 150,
+    "handoff_search": 120,
+    "auto_approve": 150,
+    "approve_client": 80,
+}
+
+HANDOFF_TEMPLATE = """# Session Handoff - Bench {i}
+
+**Date**: 2025-01-{day:02d}
+**Focus**: Benchmark handoff number {i}
+**Status**: In progress
+
+---
+
+## Quick Context
+
+Working on the rate limiter in `src/limiter.py` for PROJ-{i}.
+
+## Completed This Session
+
+- Added token bucket refill
+- Wrote tests in `tests/test_limiter.py`
+
+## Next Steps
+
+1. [ ] Wire the limiter into the API gateway
+2. [ ] Load-test at 2k rps
+"""
+
+
+def _setup(root: Path) -> dict:
+    """A HOME, a project with handoffs, and a transcript under `root`."""
+    home = root / "home"
+    project = root / "project"
+    handoffs = project / "docs" / "session_handoffs"
+    handoffs.mkdir(parents=True)
+    (home / ".claude" / "hooks").mkdir(parents=True)
+    for i in range(BENCH_HANDOFFS):
+        day = i % 28 + 1
+        (handoffs / f"202501{day:02d}-{1000 + i}-bench-{i}.md").write_text(
+            HANDOFF_TEMPLATE.format(i=i, day=day), encoding="utf-8")
+
+    transcript = root / "transcript.jsonl"
+    with open(transcript, "w", encoding="utf-8") as f:
+        for i in range(BENCH_MESSAGES):
+            role = "human" if i % 2 == 0 else "assistant"
+            text = f"Message {i}: " + "some discussion of the limiter design " * 10
+            f.write(json.dumps({"type": role, "message": {"role": role, "content": text}}) + "\n")
+
+    env = {k: v for k, v in os.environ.items()
+           if not k.startswith(("ANTHROPIC_API_KEY", "MOTHER_CLAUDE_"))}
+    env["HOME"] = str(home)
+    env["USERPROFILE"] = str(home)
+    env["MOTHER_CLAUDE_HANDOFF_WORKER"] = "0"
+    return {"home": home, "project": project, "transcript": transcript, "env": env}
+
+
+def _scenarios(fixture: dict) -> dict:
+    """name -> (argv, stdin payload, extra env)."""
+    cwd = str(fixture["project"])
+    python = sys.executable
+    permission = json.dumps({
+        "hook_event_name": "PermissionRequest", "cwd": cwd,
+        "tool_name": "Bash", "tool_input": {"command": "git status"},
+    })
+    return {
+        "session_start": (
+            [python, str(HOOKS_DIR / "session_start.py")],
+            json.dumps({"hook_event_name": "SessionStart", "cwd": cwd, "source": "startup"}), {},
+        ),
+        "session_handoff": (
+            [python, str(HOOKS_DIR / "session_handoff.py")],
+            json.dumps({"hook_event_name": "PreCompact", "trigger": "auto", "cwd": cwd,
+                        "session_id": "bench", "transcript_path": str(fixture["transcript"])}), {},
+        ),
+        "handoff_search": (
+            [python, str(HOOKS_DIR / "handoff_search.py"), "--hook"],
+            json.dumps({"hook_event_name": "UserPromptSubmit", "cwd": cwd,
+                        "prompt": "add retries to the limiter"}), {},
+        ),
+        "auto_approve": (
+            [python, str(HOOKS_DIR / "auto_approve.py")], permission, {},
+        ),
+        "approve_client": (
+            [python, "-S", str(HOOKS_DIR / "approve_client.py")], permission, {},
+        ),
+    }
+
+
+def _run(argv: list[str], payload: str, env: dict, cwd: str) -> float:
+    """Wall-clock milliseconds for one run; raises if the hook failed."""
+    started = time.perf_counter()
+    result = subprocess.run(argv, input=payload.encode("utf-8"), env=env, cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{Path(argv[-1]).name} exited {result.returncode}: "
+                           f"{result.stderr.decode('utf-8', 'replace').strip()[-300:]}")
+    return elapsed
+
+
+def bench(names: list[str], runs: int, scale: float) -> bool:
+    """Time the named hooks and print a table. True if all are within budget."""
+    root = Path(tempfile.mkdtemp(prefix="hook_bench-"))
+    fixture = _setup(root)
+    env = fixture["env"]
+    scenarios = _scenarios(fixture)
+    ok = True
+    try:
+        baseline = statistics.median(
+            _run([sys.executable, "-c", "pass"], "", env, str(root)) for _ in range(runs))
+        print(f"Interpreter startup (python -c pass): {baseline:.0f} ms median\n")
+        print(f"{'hook':<18} {'median':>8} {'p90':>8} {'max':>8} {'budget':>8}")
+        for name in names:
+            argv, payload, extra = scenarios[name]
+            run_env = dict(env, **extra)
+            # Warm-up: compiles bytecode, builds indexes and the brief, writes
+            # the handoff the skip path then finds, starts the approve daemon
+            _run(argv, payload, run_env, str(fixture["project"]))
+            if name == "approve_client":
+                time.sleep(0.5)
+            times = sorted(_run(argv, payload, run_env, str(fixture["project"])) for _ in range(runs))
+            median = statistics.median(times)
+            p90 = percentile(times, 90)
+            budget = BUDGETS_MS[name] * scale
+            status = "ok" if median <= budget else "OVER BUDGET"
+            ok = ok and median <= budget
+            print(f"{name:<18} {median:>6.0f}ms {p90:>6.0f}ms {times[-1]:>6.0f}ms {budget:>6.0f}ms  {status}")
+    finally:
+        if "approve_client" in names:
+            subprocess.run([sys.executable, str(HOOKS_DIR / "approve_daemon.py"), "--stop"],
+                           env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(root, ignore_errors=True)
+    return ok
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time each hook's cold start against its budget")
+    parser.add_argument("--hook", action="append", choices=sorted(BUDGETS_MS),
+                        help="only this hook (repeatable; default: all)")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help=f"timed runs per hook (default {DEFAULT_RUNS})")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slower machines)")
+    args = parser.parse_args()
+
+    names = args.hook or list(BUDGETS_MS)
+    if sys.platform == "win32" and "approve_client" in names:
+        names.remove("approve_client")
+    try:
+        ok = bench(names, max(args.runs, 1), args.scale)
+    except RuntimeError as e:
+        print(f"\nBenchmark run failed: {e}", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
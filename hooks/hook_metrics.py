@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Hook Metrics
+
+Opt-in per-phase timing for the hooks. A slow SessionStart presents as
+Claude "freezing", and a PreCompact hook that hits its 120s timeout just
+vanishes — this records where the time actually goes.
+
+ENABLE:
+    export MOTHER_CLAUDE_HOOK_METRICS=1
+
+Each hook run appends one JSON line to ~/.claude/hooks/.state/hook_metrics.jsonl:
+
+    {"hook": "session_start", "ts": "...", "total_ms": 41.2,
+     "phases": {"config_load": 0.4, "dir_scan": 2.1, "file_read": 1.3}}
+
+Phases used by the hooks: config_load, dir_scan, transcript_parse,
+api_call, file_read, file_write, evaluate.
+
+IN A HOOK:
+    import hook_metrics
+    hook_metrics.start("session_start")       # once, at the top of main()
+    with hook_metrics.phase("dir_scan"):
+        ...
+
+phase() is a no-op until start() has been called (and start() is a no-op
+unless metrics are enabled), so library code can mark phases freely. The
+record is written at exit, including sys.exit() paths.
+
+CLI:
+    python hook_metrics.py                 # p50/p95/p99 per hook and phase
+    python hook_metrics.py --hook session_start --days 7
+"""
+
+import atexit
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
+METRICS_PATH = HOOKS_STATE_DIR / "hook_metrics.jsonl"
+
+
+def enabled() -> bool:
+    return os.environ.get("MOTHER_CLAUDE_HOOK_METRICS", "") not in ("", "0")
+
+
+class _Run:
+    def __init__(self, hook: str, fields: dict):
+        self.hook = hook
+        self.fields = fields
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    def add(self, name: str, elapsed_ms: float):
+        # A phase can run more than once per hook (e.g. one file_read per handoff)
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed_ms
+
+
+class _Phase:
+    def __init__(self, run: _Run, name: str):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.run.add(self.name, (time.perf_counter() - self.t0) * 1000)
+        return False
+
+
+class _NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_PHASE = _NoPhase()
+_current: _Run | None = None
+_atexit_registered = False
+
+
+def start(hook: str, **fields):
+    """Begin timing a hook run. Extra fields (e.g. trigger) are stored on the record."""
+    global _current, _atexit_registered
+    if not enabled():
+        return
+    _current = _Run(hook, fields)
+    if not _atexit_registered:
+        atexit.register(finish)
+        _atexit_registered = True
+
+
+def phase(name: str):
+    """Context manager timing one phase of the current run."""
+    if _current is None:
+        return _NO_PHASE
+    return _Phase(_current, name)
+
+
+def finish():
+    """Write the current run's record. Safe to call more than once."""
+    global _current
+    run, _current = _current, None
+    if run is None:
+        return
+    record = {
+        "hook": run.hook,
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "total_ms": round((time.perf_counter() - run.started) * 1000, 3),
+        "phases": {name: round(ms, 3) for name, ms in run.phases.items()},
+    }
+    record.update(run.fields)
+    try:
+        HOOKS_STATE_DIR.mkdir(parents=True, exist_ok=True)
+        # One write() on an O_APPEND file: concurrent hooks can't interleave lines
+        fd = os.open(METRICS_PATH, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            os.write(fd, (json.dumps(record) + "\n").encode("utf-8"))
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def load_records(hook: str | None = None, days: float | None = None) -> list[dict]:
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat(timespec="seconds") if days else None
+    records = []
+    try:
+        with open(METRICS_PATH, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if hook and record.get("hook") != hook:
+                    continue
+                if cutoff and record.get("ts", "") < cutoff:
+                    continue
+                records.append(record)
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Hook timing percentiles")
+    parser.add_argument("--hook", help="only this hook (e.g. session_start)")
+    parser.add_argument("--days", type=float, help="only runs from the last N days")
+    args = parser.parse_args()
+
+    records = load_records(args.hook, args.days)
+    if not records:
+        print(f"No metrics in {METRICS_PATH}")
+        if not enabled():
+            print("Enable collection with MOTHER_CLAUDE_HOOK_METRICS=1")
+        sys.exit(0)
+
+    # hook -> phase -> samples; "total" is the whole run
+    samples: dict[str, dict[str, list[float]]] = {}
+    for record in records:
+        by_phase = samples.setdefault(record.get("hook", "?"), {})
+        by_phase.setdefault("total", []).append(record.get("total_ms", 0.0))
+        for name, ms in record.get("phases", {}).items():
+            by_phase.setdefault(name, []).append(ms)
+
+    print(f"{'hook':<18} {'phase':<18} {'runs':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 74)
+    for hook in sorted(samples):
+        phases = samples[hook]
+        for name in ["total"] + sorted(p for p in phases if p != "total"):
+            values = sorted(phases[name])
+            print(f"{hook:<18} {name:<18} {len(values):>6} "
+                  f"{percentile(values, 50):>9.1f} {percentile(values, 95):>9.1f} {percentile(values, 99):>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Hook Runtime
+
+What every hook needs at startup, in one place. A hook is a new Python
+process for every event, so anything it imports or reads before doing its
+job is paid again on every session start, prompt and compaction.
+
+- utf8_stdout():             the Windows cp1252 stdout fix
+- project_config(cwd):       .claude/project.json, parsed once per process
+                             (re-read if the file changes, for the
+                             long-lived worker and daemon)
+- find_handoff_directory():  where the project's handoffs live, discovered
+                             once per process
+- load_anthropic():          the anthropic SDK, imported on first use —
+                             it pulls in httpx and pydantic, several hundred
+                             milliseconds that a skipped or queued handoff
+                             never needs (anthropic_installed() checks for
+                             it without importing)
+- anthropic_client(key):     a client for the hooks' API calls, pointed at
+                             ANTHROPIC_BASE_URL_HOOKS when that is set (e.g.
+                             api_standin.py for offline timing runs)
+
+Hooks import their other siblings where they are used, not at module load,
+when only some runs need them. hook_bench.py checks that each hook's cold
+start stays within its budget.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+# Checked in this order when project.json doesn't say
+HANDOFF_DIR_CANDIDATES = ("docs/session_handoffs", "session_handoffs", ".claude/session_handoffs")
+DEFAULT_HANDOFF_DIR = "docs/session_handoffs"
+
+_configs = {}
+_handoff_dirs = {}
+_anthropic = None
+
+
+def utf8_stdout():
+    """Force UTF-8 stdout. Windows defaults to cp1252, which crashes on the
+    Unicode in handoff markdown (dashes, arrows); a crashing hook looks like
+    Claude freezing."""
+    if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
+        try:
+            sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+        except (AttributeError, OSError):
+            pass
+
+
+def project_config(cwd: str) -> dict:
+    """The project's .claude/project.json, or {} if missing or unreadable."""
+    path = os.path.join(cwd, ".claude", "project.json")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        _configs.pop(path, None)
+        return {}
+    cached = _configs.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except (json.JSONDecodeError, IOError, UnicodeDecodeError):
+        config = {}
+    if not isinstance(config, dict):
+        config = {}
+    _configs[path] = (mtime, config)
+    return config
+
+
+def find_handoff_directory(cwd: str, create: bool = False) -> Path | None:
+    """The project's session_handoffs directory.
+
+    "handoffs_path" in project.json wins, then the usual locations. With
+    `create` (when writing a handoff) a missing directory is created —
+    the configured one, or docs/session_handoffs — instead of returning None.
+    """
+    key = (cwd, create)
+    cached = _handoff_dirs.get(key)
+    if cached is not None and cached.is_dir():
+        return cached
+
+    cwd_path = Path(cwd)
+    found = None
+    custom = project_config(cwd).get("handoffs_path")
+    if isinstance(custom, str) and custom:
+        custom_path = cwd_path / custom
+        if create:
+            custom_path.mkdir(parents=True, exist_ok=True)
+        if custom_path.exists():
+            found = custom_path
+    if found is None:
+        found = next((cwd_path / p for p in HANDOFF_DIR_CANDIDATES if (cwd_path / p).exists()), None)
+    if found is None and create:
+        found = cwd_path / DEFAULT_HANDOFF_DIR
+        found.mkdir(parents=True, exist_ok=True)
+
+    if found is not None:
+        _handoff_dirs[key] = found
+    return found
+
+
+def anthropic_installed() -> bool:
+    """Whether the SDK can be imported, without importing it."""
+    if _anthropic is not None:
+        return True
+    import importlib.util
+
+    return importlib.util.find_spec("anthropic") is not None
+
+
+def load_anthropic():
+    """The anthropic module, imported on first call; None if not installed."""
+    global _anthropic
+    if _anthropic is None:
+        try:
+            import anthropic
+        except ImportError:
+            return None
+        _anthropic = anthropic
+    return _anthropic
+
+
+def anthropic_client(api_key: str):
+    """An Anthropic client for hook API calls.
+
+    ANTHROPIC_BASE_URL_HOOKS redirects the hooks alone: Claude Code reads
+    ANTHROPIC_BASE_URL too, and hooks inherit its environment. The SDK's own
+    retries are off, since handoff_policy.py does the retrying.
+    """
+    base_url = os.environ.get("ANTHROPIC_BASE_URL_HOOKS") or None
+    return load_anthropic().Anthropic(api_key=api_key, max_retries=0, base_url=base_url)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Hook State Store
+
+One small SQLite database (WAL mode) for per-session state that hooks keep
+between runs, in place of one JSON file per session. Those files were only
+removed on the SessionEnd path, so every crashed or killed session leaked
+one forever, and two hook processes writing the same file at once (worker
+sessions from team-up.sh, the handoff worker next to a live hook) could
+tear it.
+
+- Rows are (namespace, key) -> JSON value, with an expiry time. Lookup is
+  by primary key.
+- update() is a read-modify-write inside one IMMEDIATE transaction, so
+  concurrent writers serialize instead of losing each other's fields.
+- Every row carries a TTL (DEFAULT_TTL unless the caller says otherwise).
+  Expired rows are never returned, and are deleted at most once per
+  EVICT_INTERVAL by whichever writer comes along.
+
+Any SQLite error reads as "no state" and drops the write — state only saves
+work (skipping a repeat handoff, parsing incrementally), it never changes
+what a hook decides.
+
+STORE: ~/.claude/hooks/.state/hook_state.sqlite
+
+CLI:
+    python hook_state.py            # rows per namespace
+    python hook_state.py --evict    # delete expired rows now
+    python hook_state.py --clear    # drop everything
+"""
+
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
+STORE_PATH = HOOKS_STATE_DIR / "hook_state.sqlite"
+
+# A session's state outlives any real session; long after that it's a leak
+DEFAULT_TTL = 7 * 24 * 3600
+
+# Writers sweep expired rows at most this often
+EVICT_INTERVAL = 3600
+
+_conn = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        HOOKS_STATE_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(STORE_PATH), timeout=2.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "updated REAL NOT NULL, expires REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS state_expires ON state(expires)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value REAL NOT NULL)")
+        _conn = conn
+    return _conn
+
+
+def _maybe_evict(conn, now: float):
+    row = conn.execute("SELECT value FROM meta WHERE name = 'evicted'").fetchone()
+    if row is not None and now - row[0] < EVICT_INTERVAL:
+        return
+    conn.execute("DELETE FROM state WHERE expires <= ?", (now,))
+    conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('evicted', ?)", (now,))
+
+
+def get(namespace: str, key: str) -> dict | None:
+    """The stored value, or None if missing, expired or unreadable."""
+    try:
+        row = _connect().execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ? AND expires > ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+    except (sqlite3.Error, json.JSONDecodeError):
+        return None
+
+
+def put(namespace: str, key: str, value: dict, ttl: float = DEFAULT_TTL):
+    """Insert or replace a value, expiring `ttl` seconds from now."""
+    try:
+        conn = _connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO state (namespace, key, value, updated, expires) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), now, now + ttl),
+            )
+            _maybe_evict(conn, now)
+    except sqlite3.Error:
+        pass
+
+
+def update(namespace: str, key: str, fn, ttl: float = DEFAULT_TTL) -> dict | None:
+    """Atomically replace a value with fn(current value or None).
+
+    If fn returns None the row is left as it was. Returns what was stored.
+    """
+    try:
+        conn = _connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ? AND expires > ?",
+                (namespace, key, now),
+            ).fetchone()
+            try:
+                current = json.loads(row[0]) if row else None
+            except json.JSONDecodeError:
+                current = None
+            value = fn(current)
+            if value is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO state (namespace, key, value, updated, expires) VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value), now, now + ttl),
+                )
+                _maybe_evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return value
+    except sqlite3.Error:
+        return None
+
+
+def delete(namespace: str, key: str):
+    try:
+        conn = _connect()
+        with conn:
+            conn.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+    except sqlite3.Error:
+        pass
+
+
+def evict() -> int:
+    """Delete every expired row now. Returns how many were deleted."""
+    conn = _connect()
+    now = time.time()
+    with conn:
+        deleted = conn.execute("DELETE FROM state WHERE expires <= ?", (now,)).rowcount
+        conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('evicted', ?)", (now,))
+    return deleted
+
+
+def stats() -> dict:
+    """namespace -> (live rows, expired rows)."""
+    now = time.time()
+    rows = _connect().execute(
+        "SELECT namespace, SUM(expires > ?), SUM(expires <= ?) FROM state GROUP BY namespace",
+        (now, now),
+    ).fetchall()
+    return {namespace: (live, expired) for namespace, live, expired in rows}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared hook state store")
+    parser.add_argument("--evict", action="store_true", help="delete expired rows now")
+    parser.add_argument("--clear", action="store_true", help="drop all state")
+    args = parser.parse_args()
+
+    try:
+        if args.clear:
+            conn = _connect()
+            with conn:
+                conn.execute("DELETE FROM state")
+            print("Hook state cleared")
+            return
+        if args.evict:
+            print(f"Evicted {evict()} expired row(s)")
+            return
+        counts = stats()
+    except sqlite3.Error as e:
+        print(f"Error reading {STORE_PATH}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Store: {STORE_PATH}")
+    for namespace, (live, expired) in sorted(counts.items()):
+        print(f"  {namespace:<20} {live:>6} live  {expired:>6} expired")
+    if not counts:
+        print("  (empty)")
+
+
+if __name__ == "__main__":
+    main()
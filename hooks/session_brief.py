@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Mother CLAUDE Session Brief
+
+The part of session_start.py's output that depends on the handoffs — the
+last N handoffs, already packed into the token budget (see
+handoff_packing.py) and joined — rendered ahead of time into
+<handoff_dir>/.index/brief.md.
+
+session_handoff.py writes it right after writing a handoff, so the common
+SessionStart is: one stat of the handoff directory, one file read, print.
+
+The first line of the file is a header recording what the brief was built
+from. It is reused only while:
+- it was built for the same handoffs_to_load and token budget,
+- it holds the handoffs the caller selected (by default: the newest N, as
+  written by session_handoff.py — see handoff_relevance.py),
+- the handoff directory's mtime is unchanged (no handoff added/removed), and
+- the newest handoff hasn't been modified since the brief was written.
+Otherwise session_start falls back to reading the handoffs and rewrites it.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import handoff_index
+import handoff_packing
+
+BRIEF_FILENAME = "brief.md"
+HEADER_PREFIX = "<!-- session-brief: "
+HEADER_SUFFIX = " -->"
+
+
+def token_budget(config: dict, count: int) -> int:
+    """The SessionStart token budget from project config."""
+    budget = config.get("handoff_token_budget")
+    if isinstance(budget, int) and budget > 0:
+        return budget
+    return handoff_packing.DEFAULT_TOKENS_PER_HANDOFF * max(count, 1)
+
+
+def render(handoffs: list[Path], budget: int) -> str:
+    """The handoff section of the SessionStart output, for the given files."""
+    parts = []
+    for i, (handoff_path, content) in enumerate(zip(handoffs, handoff_packing.pack(handoffs, budget))):
+        if i > 0:
+            parts.append(f"\n{'-'*40}\n")
+
+        parts.append(f"Previous handoff: {handoff_path.name}")
+        parts.append(f"{'-'*40}")
+        parts.append(content)
+    return "\n".join(parts)
+
+
+def _brief_path(handoff_dir: Path) -> Path:
+    return handoff_dir / handoff_index.INDEX_DIRNAME / BRIEF_FILENAME
+
+
+def save_brief(handoff_dir: Path, count: int, budget: int, handoffs: list[Path], body: str,
+               selected: bool = False):
+    """Store a rendered brief along with what it was built from.
+
+    `selected` marks a brief built from a relevance selection rather than
+    the newest N, so a plain-recency reader won't reuse it.
+    """
+    header = {
+        "count": count,
+        "budget": budget,
+        "selected": selected,
+        "handoffs": [p.name for p in handoffs],
+        "dir_mtime_ns": handoff_index.dir_mtime(handoff_dir),
+        "written_ns": time.time_ns(),
+    }
+    try:
+        handoff_index.index_dir(handoff_dir)
+        handoff_index.write_atomic(
+            _brief_path(handoff_dir),
+            f"{HEADER_PREFIX}{json.dumps(header)}{HEADER_SUFFIX}\n{body}",
+        )
+    except OSError:
+        pass
+
+
+def write_brief(handoff_dir: Path, count: int, budget: int):
+    """Render and store the brief for the newest `count` handoffs."""
+    handoffs = handoff_index.recent_handoffs(handoff_dir, count)
+    if handoffs:
+        save_brief(handoff_dir, count, budget, handoffs, render(handoffs, budget))
+
+
+def read_brief(handoff_dir: Path, count: int, budget: int, handoffs: list[Path] | None = None) -> str | None:
+    """The stored brief if it is still current, else None.
+
+    Pass `handoffs` to require a brief of exactly those files; without it,
+    only a newest-N brief is accepted.
+    """
+    try:
+        with open(_brief_path(handoff_dir), 'r', encoding='utf-8') as f:
+            header_line = f.readline()
+            if not (header_line.startswith(HEADER_PREFIX) and header_line.rstrip().endswith(HEADER_SUFFIX)):
+                return None
+            header = json.loads(header_line.strip()[len(HEADER_PREFIX):-len(HEADER_SUFFIX)])
+
+            if header.get("count") != count or header.get("budget") != budget or not header.get("handoffs"):
+                return None
+            if handoffs is not None and header["handoffs"] != [p.name for p in handoffs]:
+                return None
+            if handoffs is None and header.get("selected"):
+                return None
+            if header.get("dir_mtime_ns") != handoff_index.dir_mtime(handoff_dir):
+                return None
+            newest = handoff_dir / max(header["handoffs"])
+            if os.stat(newest).st_mtime_ns > header.get("written_ns", 0):
+                return None
+
+            return f.read()
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
@@ -320,7 +320,11 @@ function removeShortTitleLine(content) {
 }
 
 async function generateHandoff(conversation, cwd, trigger, apiKey) {
-  const client = new Anthropic({ apiKey });
+  // ANTHROPIC_BASE_URL_HOOKS points only the hooks elsewhere (api_standin.py)
+  const client = new Anthropic({
+    apiKey,
+    baseURL: process.env.ANTHROPIC_BASE_URL_HOOKS || undefined,
+  });
   const projectName = path.basename(cwd);
   const date = new Date().toISOString().split("T")[0];
 
@@ -5,6 +5,10 @@ Mother CLAUDE Session Handoff Generator
 This hook runs on PreCompact (auto) and SessionEnd events to automatically
 generate session handoff documents using Claude Haiku.
 
+The hook itself only snapshots the recent conversation into a spool and
+returns; handoff_worker.py, started in the background, makes the API call
+and writes the file. Where that isn't available it all happens inline.
+
 Reads the conversation transcript and creates a structured handoff file
 following the Mother CLAUDE session handoff template.
 
@@ -18,27 +22,97 @@ import hashlib
 import json
 import os
 import re
+import signal
 import sys
-from datetime import datetime
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
 from pathlib import Path
 
-# Force UTF-8 stdout — Windows defaults to cp1252, which crashes on Unicode
-# characters in handoff markdown; a crashing hook looks like a hang.
-if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
-    try:
-        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
-    except (AttributeError, OSError):
-        pass
+import handoff_compress
+import handoff_index
+import handoff_packing
+import handoff_policy
+import hook_metrics
+import hook_runtime
+import hook_state
 
-# Directory for tracking session state (prevents duplicate handoffs)
-HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
+hook_runtime.utf8_stdout()
 
-try:
-    import anthropic
-except ImportError:
-    print("Error: anthropic SDK not installed. Run: pip install anthropic", file=sys.stderr)
-    sys.exit(1)
+HOOKS_STATE_DIR = Path.home() / ".claude" / "hooks" / ".state"
 
+# The first model tried; handoff_generation in project.json can change the
+# list (handoff_policy.py)
+HANDOFF_MODEL = handoff_policy.DEFAULT_MODEL
+
+# How much of the conversation the handoff is generated from
+MAX_MESSAGES = 80
+MAX_MESSAGE_CHARS = 3000
+
+# Inline generation (no background worker) must finish inside the hook's
+# 120s timeout, with room left to write the file
+INLINE_BUDGET = 90.0
+
+# Handoffs stream into <handoff_dir>/.index/streaming/ as they are generated.
+# A cut-off generation shorter than MIN_PARTIAL_CHARS isn't worth keeping
+# (the offline handoff is written instead); a stream file untouched for
+# STALE_PARTIAL_SECONDS was left by a killed process
+STREAMING_DIRNAME = "streaming"
+PARTIAL_SUFFIX = ".partial"
+MIN_PARTIAL_CHARS = 400
+STALE_PARTIAL_SECONDS = 300
+
+# Hierarchical mode: older messages are summarized in fixed chunks (aligned
+# from the start of the transcript, so earlier chunks never change and their
+# cached summaries keep hitting), the newest RECENT_CHUNKS chunks plus any
+# partial one are passed verbatim
+CHUNK_MESSAGES = 40
+RECENT_CHUNKS = 2
+MAP_WORKERS = 4
+CHUNK_SUMMARY_MAX_TOKENS = 600
+CHUNK_CACHE_DIR = HOOKS_STATE_DIR / "chunk_summaries"
+CHUNK_CACHE_MAX_AGE_DAYS = 30
+# Under a time budget the chunk summaries share one deadline, this long
+# before the budget runs out so the handoff itself still has time to generate
+REDUCE_RESERVE_SECONDS = 45.0
+
+# One line per generated handoff: mode and token usage (see --usage)
+USAGE_LOG = HOOKS_STATE_DIR / "handoff_usage.jsonl"
+
+# Read size when scanning a transcript backwards for its last messages
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Messages handed to the prompt compressor are cut here (it does the real
+# budgeting; this only bounds memory for pathological messages)
+MAX_RAW_MESSAGE_CHARS = 100_000
+
+# How far back the offline generator reads (tool calls, todos, requests)
+OFFLINE_TAIL_BYTES = 8 * 1024 * 1024
+
+# Bytes just before the saved parse offset that must be unchanged to resume
+# from it (guards against a transcript that was rewritten, not appended to)
+CURSOR_CHECK_BYTES = 4096
+
+# What save_handoff_state keeps of a parse cursor (see parse_transcript)
+CURSOR_FIELDS = ("offset", "check", "lines")
+
+CHUNK_SUMMARY_PROMPT = """
+This is one part of a long coding session between a user and an AI assistant.
+A handoff document for the whole session will be written later from summaries
+like this one, so keep what the next session would need:
+
+- decisions made and WHY (alternatives rejected)
+- files created or changed, with paths
+- problems hit and how they were solved
+- ticket references (PROJ-123, #456)
+- anything left open or unresolved
+
+Bullet points, specific, under 300 words. No preamble.
+
+SESSION PART {part}:
+{conversation}
+"""
 
 HANDOFF_TEMPLATE = """
 You are generating a session handoff document for an AI coding assistant.
@@ -158,14 +232,59 @@ SHORT_TITLE: [2-4 word hyphenated title like "hooks-auto-handoffs" or "api-refac
 - **Working Directory**: {cwd}
 """
 
+# The part of HANDOFF_TEMPLATE that doesn't depend on the conversation
+HANDOFF_STRUCTURE = HANDOFF_TEMPLATE.split("{conversation}\n\n---\n", 1)[1]
+
+# Delta mode: static instructions go in the system prompt, the previous
+# handoff and the new messages in the user turn (see generate_handoff)
+DELTA_SYSTEM_PROMPT = """
+You maintain a running session handoff document for an AI coding assistant.
+You will get the current handoff and the conversation messages added since
+it was written. Return the complete UPDATED document, not a diff:
+
+- keep everything that is still true
+- update statuses, tables and Quick Context to reflect the new messages
+- add new work, decisions (with rationale), discoveries and files
+- remove Next Steps that are now done; add new ones
+- resolve Open Questions that were answered
+
+The document must keep this structure exactly:
+""" + HANDOFF_STRUCTURE
+
+DELTA_PREVIOUS_TEMPLATE = """
+**Project**: {project_name}
+**Trigger**: {trigger}
+**Working Directory**: {cwd}
+**Date**: {date}
+**Platform**: {platform}
+
+CURRENT HANDOFF:
+{previous}
+
+---
+"""
+
+DELTA_NEW_TEMPLATE = """
+NEW MESSAGES SINCE IT WAS WRITTEN:
+{conversation}
+"""
+
+
+def get_api_key() -> str | None:
+    """Get API key from environment variable.
 
-def get_api_key():
-    """Get API key from environment variable."""
+    None (with a warning) when there's no key or no SDK; the handoff is then
+    built offline from the transcript (handoff_offline.py).
+    """
+    if not hook_runtime.anthropic_installed():
+        print("Warning: anthropic SDK not installed (pip install anthropic); writing an offline handoff",
+              file=sys.stderr)
+        return None
     key = os.environ.get("ANTHROPIC_API_KEY_HOOKS") or os.environ.get("ANTHROPIC_API_KEY")
     if not key:
-        print("Error: ANTHROPIC_API_KEY_HOOKS or ANTHROPIC_API_KEY not set", file=sys.stderr)
-        sys.exit(1)
-    return key
+        print("Warning: ANTHROPIC_API_KEY_HOOKS or ANTHROPIC_API_KEY not set; writing an offline handoff",
+              file=sys.stderr)
+    return key or None
 
 
 def get_transcript_size(transcript_path: str) -> int:
@@ -176,141 +295,489 @@ def get_transcript_size(transcript_path: str) -> int:
         return 0
 
 
-def get_state_file(session_id: str) -> Path:
-    """Get the path to the state file for this session."""
-    HOOKS_STATE_DIR.mkdir(parents=True, exist_ok=True)
-    safe_id = hashlib.md5(session_id.encode()).hexdigest()[:16]
-    return HOOKS_STATE_DIR / f"handoff_{safe_id}.json"
+# Session state lives in hook_state's store under this namespace
+STATE_NAMESPACE = "handoff"
+
+
+def _state_key(session_id: str) -> str:
+    return hashlib.md5(session_id.encode()).hexdigest()[:16]
+
+
+def _legacy_state_file(session_id: str) -> Path:
+    """Where state lived before hook_state: one JSON file per session."""
+    return HOOKS_STATE_DIR / f"handoff_{_state_key(session_id)}.json"
 
 
-def save_handoff_state(session_id: str, transcript_size: int):
-    """Save state after generating a handoff (called by PreCompact)."""
-    state_file = get_state_file(session_id)
+def load_handoff_state(session_id: str) -> dict:
+    """State saved by an earlier PreCompact in this session, or {}."""
+    state = hook_state.get(STATE_NAMESPACE, _state_key(session_id))
+    if state is None:
+        # A session that was live across the upgrade: move its file over
+        legacy = _legacy_state_file(session_id)
+        try:
+            with open(legacy, 'r') as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, IOError):
+            return {}
+        if isinstance(state, dict):
+            hook_state.put(STATE_NAMESPACE, _state_key(session_id), state)
+        legacy.unlink(missing_ok=True)
+    return state if isinstance(state, dict) else {}
+
+
+def save_handoff_state(session_id: str, transcript_size: int, cursor: dict | None = None,
+                       digest: str | None = None):
+    """Save state after a PreCompact handoff is written (session_state_after_write).
+
+    `cursor` (from parse_transcript) lets the next run parse only what was
+    appended to the transcript since; `digest` (conversation_digest) lets
+    it skip when no messages were. The last_handoff record (see
+    record_last_handoff) is carried over.
+
+    Only the cursor's position is stored (offset, check, lines), not its
+    message window: the next run reads that back from the transcript.
+    """
     state = {
         "session_id": session_id,
         "transcript_size": transcript_size,
         "timestamp": datetime.now().isoformat()
     }
-    try:
-        with open(state_file, 'w') as f:
-            json.dump(state, f)
-    except IOError:
-        pass
+    if cursor:
+        state["cursor"] = {key: cursor[key] for key in CURSOR_FIELDS}
+    if digest:
+        state["digest"] = digest
+
+    def merge(previous):
+        if previous and "last_handoff" in previous:
+            state["last_handoff"] = previous["last_handoff"]
+        return state
+
+    hook_state.update(STATE_NAMESPACE, _state_key(session_id), merge)
 
 
-def should_skip_handoff(session_id: str, current_transcript_size: int, trigger: str) -> bool:
+def session_state_after_write(job: dict, path: Path, partial: bool):
+    """Update the session's state for a handoff that is now on disk.
+
+    Only here, never when the job is queued: a job that fails for good must
+    not leave behind a digest that makes every later run skip the same
+    conversation, or a cursor past messages no handoff covers. PreCompact
+    saves cursor and digest; SessionEnd cleans up.
     """
-    Check if we should skip generating a handoff.
+    session_id = job["session_id"]
+    state = job.get("state")
+    if not isinstance(state, dict):
+        return
+    if not state.get("save"):
+        cleanup_state(session_id)
+        return
+    save_handoff_state(session_id, state.get("transcript_size", 0), state.get("cursor"), state.get("digest"))
+    # A partial handoff is no base for the next delta
+    if job.get("offset") is not None and not partial:
+        record_last_handoff(session_id, path, job["offset"])
+
+
+def record_last_handoff(session_id: str, path: Path, offset: int):
+    """Note the handoff just written for this session and the transcript
+    offset it covers, so the next one can be a delta from it. Only while
+    the session is live: once SessionEnd has cleaned up, nothing is written."""
+    def merge(state):
+        if not state:
+            return None
+        state["last_handoff"] = {"path": str(path), "offset": offset}
+        return state
+
+    hook_state.update(STATE_NAMESPACE, _state_key(session_id), merge)
 
-    Skip if:
-    - This is SessionEnd trigger
-    - A PreCompact handoff was already generated for this session
-    - The transcript hasn't grown significantly (< 10% larger)
+
+def delta_source(state: dict, cursor: dict | None) -> dict | None:
+    """What a delta handoff needs — the previous handoff's path and the
+    messages added since it — or None if this run has to start from scratch.
+
+    Only valid when the previous handoff covered the transcript exactly up
+    to where this parse resumed, and every message since still fits in the
+    window.
     """
-    if trigger in ("auto", "PreCompact"):
-        return False
+    last = state.get("last_handoff")
+    if not isinstance(last, dict) or not cursor or "added" not in cursor:
+        return None
+    if last.get("offset") != cursor.get("resumed_from"):
+        return None
+    added = cursor["added"]
+    if not 0 < added <= len(cursor["messages"]) or not Path(last.get("path", "")).is_file():
+        return None
+    return {"previous_handoff": last["path"], "messages": "\n\n---\n\n".join(cursor["messages"][-added:])}
 
-    state_file = get_state_file(session_id)
-    if not state_file.exists():
-        return False
 
-    try:
-        with open(state_file, 'r') as f:
-            state = json.load(f)
-        prev_size = state.get("transcript_size", 0)
-        if prev_size > 0:
-            growth = (current_transcript_size - prev_size) / prev_size
-            if growth < 0.10:
-                print(f"SessionEnd: Skipping (transcript grew {growth:.1%} since PreCompact)")
-                return True
-        return False
-    except (json.JSONDecodeError, IOError):
+def conversation_digest(conversation: str) -> str:
+    """Digest of the extracted message window, ignoring whitespace-only differences."""
+    return hashlib.sha1(" ".join(conversation.split()).encode('utf-8')).hexdigest()
+
+
+def should_skip_handoff(state: dict, digest: str, trigger: str) -> bool:
+    """
+    Check if we should skip generating a handoff.
+
+    Skip if a PreCompact already generated a handoff in this session from
+    the same message window (same digest): nothing was said since. Tool
+    output, progress entries and other transcript growth don't count, and
+    any new human/assistant message does, however short.
+    """
+    if state.get("digest") != digest:
         return False
+    event = "PreCompact" if trigger in ("auto", "PreCompact") else "SessionEnd"
+    print(f"{event}: Skipping (no new messages since the last handoff)")
+    return True
 
 
 def cleanup_state(session_id: str):
-    """Clean up state file after session ends."""
+    """Drop this session's state after it ends. Sessions that never reach
+    SessionEnd expire from the store on their own (hook_state.DEFAULT_TTL)."""
+    hook_state.delete(STATE_NAMESPACE, _state_key(session_id))
+    # Also the per-session files crashed sessions left behind before the store
+    cutoff = time.time() - hook_state.DEFAULT_TTL
     try:
-        get_state_file(session_id).unlink(missing_ok=True)
-    except IOError:
+        for path in HOOKS_STATE_DIR.glob("handoff_*.json"):
+            if path == _legacy_state_file(session_id) or path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+    except OSError:
         pass
 
 
-def parse_transcript(transcript_path: str) -> str:
-    """Parse JSONL transcript into readable conversation format."""
-    messages = []
+def extract_message(entry: dict, max_chars: int = MAX_MESSAGE_CHARS) -> str | None:
+    """The USER:/ASSISTANT: text of one transcript entry, or None if it has none."""
+    if entry.get("type") == "human":
+        role = "USER"
+    elif entry.get("type") == "assistant":
+        role = "ASSISTANT"
+    else:
+        return None
+
+    content = entry.get("message", {}).get("content", "")
+    if isinstance(content, list):
+        text_parts = [c.get("text", "") for c in content if c.get("type") == "text"]
+        content = "\n".join(text_parts)
+    if not isinstance(content, str) or not content.strip():
+        return None
+    return f"{role}: {content[:max_chars]}"
+
 
+def _parse_line(line: bytes, max_chars: int = MAX_MESSAGE_CHARS) -> str | None:
+    if not line.strip():
+        return None
     try:
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                try:
-                    entry = json.loads(line)
+        return extract_message(json.loads(line), max_chars)
+    except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+        return None
+
+
+def _reverse_lines(f, end: int):
+    """Lines of an open binary file before byte `end`, last first, read in
+    TAIL_BLOCK_SIZE blocks from the end. The first one yielded is whatever
+    follows the final newline (b"" if the file ends with one)."""
+    pos = end
+    head = b""
+    while pos > 0:
+        size = min(TAIL_BLOCK_SIZE, pos)
+        pos -= size
+        f.seek(pos)
+        lines = (f.read(size) + head).split(b"\n")
+        # lines[0] may continue in the block before this one
+        head = lines[0]
+        yield from reversed(lines[1:])
+    yield head
+
+
+def _window_before(f, end: int, count: int, lines: int | None = None) -> list[tuple[int, str]]:
+    """The last `count` messages in the complete lines before byte `end`.
+
+    `end` must be at a line boundary. Returns (line, message) pairs, oldest
+    first, where line counts back from `end` (-1 is the line just before
+    it). With `lines`, exactly that many lines are read back instead of
+    stopping at the count'th message.
+    """
+    reader = _reverse_lines(f, end)
+    next(reader)  # b"": nothing follows the boundary
+    window = []
+    for back, line in enumerate(reader, 1):
+        if lines is not None and back > lines:
+            break
+        message = _parse_line(line)
+        if message:
+            window.append((-back, message))
+            if lines is None and len(window) == count:
+                break
+    window.reverse()
+    return window[-count:]
+
+
+def tail_messages(f, count: int) -> tuple[list[tuple[int, str]], int]:
+    """The last `count` messages of a transcript, reading it from the end.
+
+    Only the lines needed to find them are read and decoded, so the cost is
+    bounded by the window, not the file. Returns the (line, message) pairs
+    of _window_before and the offset just past the last complete line.
+    """
+    size = os.fstat(f.fileno()).st_size
+    end = size - len(next(_reverse_lines(f, size)))
+    return _window_before(f, end, count), end
 
-                    if entry.get("type") == "human":
-                        content = entry.get("message", {}).get("content", "")
-                        if isinstance(content, list):
-                            text_parts = [c.get("text", "") for c in content if c.get("type") == "text"]
-                            content = "\n".join(text_parts)
-                        if content.strip():
-                            messages.append(f"USER: {content[:3000]}")
-
-                    elif entry.get("type") == "assistant":
-                        content = entry.get("message", {}).get("content", "")
-                        if isinstance(content, list):
-                            text_parts = [c.get("text", "") for c in content if c.get("type") == "text"]
-                            content = "\n".join(text_parts)
-                        if content.strip():
-                            messages.append(f"ASSISTANT: {content[:3000]}")
 
-                except json.JSONDecodeError:
-                    continue
+def _cursor_check(f, offset: int) -> str:
+    """Hash of the bytes just before `offset` in an open binary file."""
+    start = max(0, offset - CURSOR_CHECK_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def _resume_point(f, cursor: dict | None) -> tuple[int, list[tuple[int, str]]]:
+    """(offset, window) to continue from.
+
+    That's the saved cursor if it still fits this file, with its message
+    window read back from the `lines` before it; otherwise the tail of the
+    file, read backwards (a fresh parse only needs the last messages).
+    """
+    if cursor:
+        offset = cursor.get("offset")
+        lines = cursor.get("lines")
+        if (isinstance(offset, int) and isinstance(lines, int) and 0 <= offset <= os.fstat(f.fileno()).st_size
+                and _cursor_check(f, offset) == cursor.get("check")):
+            return offset, _window_before(f, offset, MAX_MESSAGES, lines)
+    window, offset = tail_messages(f, MAX_MESSAGES)
+    return offset, window
+
+
+def parse_transcript(transcript_path: str, cursor: dict | None = None) -> tuple[str, dict | None]:
+    """Parse JSONL transcript into readable conversation format.
+
+    Returns the last MAX_MESSAGES messages and a cursor. Without a cursor
+    the file is read backwards from the end until the window is full (see
+    tail_messages). Pass the cursor back on a later run (save_handoff_state
+    persists it) and only lines appended since are read, plus the lines the
+    previous window spans; if the file no longer matches it, the tail is
+    read again.
+
+    The cursor is the offset parsed up to, a hash of the bytes before it
+    (check), and how many lines back from it the window starts (lines). Its
+    "messages" are this run's window, for delta_source; they aren't saved.
+    """
+    try:
+        with open(transcript_path, 'rb') as f:
+            start, previous = _resume_point(f, cursor)
+            resumed = bool(cursor) and start == cursor.get("offset")
+            # (line, message); line counts from `start`, negative before it
+            window = deque(previous, maxlen=MAX_MESSAGES)
+            offset = start
+            line_no = 0
+            added = 0
+            f.seek(offset)
+            partial = None
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Possibly still being written: use it now, but re-read it next run
+                    partial = line
+                    break
+                offset += len(line)
+                message = _parse_line(line)
+                if message:
+                    window.append((line_no, message))
+                    added += 1
+                line_no += 1
+            messages = deque((message for _, message in window), maxlen=MAX_MESSAGES)
+            new_cursor = {
+                "offset": offset,
+                "check": _cursor_check(f, offset),
+                "lines": line_no - window[0][0] if window else 0,
+                "messages": list(messages),
+            }
+            if resumed:
+                # How many of the messages are new since `cursor` (delta handoffs)
+                new_cursor["resumed_from"] = start
+                new_cursor["added"] = added
+            message = _parse_line(partial) if partial else None
+            if message:
+                messages.append(message)
 
     except FileNotFoundError:
         print(f"Warning: Transcript not found at {transcript_path}", file=sys.stderr)
-        return ""
+        return "", None
     except Exception as e:
         print(f"Warning: Error reading transcript: {e}", file=sys.stderr)
-        return ""
+        return "", None
 
-    # Return last 80 messages for context
-    recent_messages = messages[-80:]
-    return "\n\n---\n\n".join(recent_messages)
+    return "\n\n---\n\n".join(messages), new_cursor
 
 
-def find_handoff_directory(cwd: str) -> Path:
-    """Find or create the session_handoffs directory for this project."""
-    cwd_path = Path(cwd)
+def compress_transcript(transcript_path: str, budget: int) -> tuple[str, handoff_compress.Stats] | None:
+    """The newest messages that fit `budget` tokens once compressed (see
+    handoff_compress.py), read backwards from the end of the transcript."""
+    try:
+        with open(transcript_path, 'rb') as f:
+            lines = _reverse_lines(f, os.fstat(f.fileno()).st_size)
+            messages = (m for m in (_parse_line(line, MAX_RAW_MESSAGE_CHARS) for line in lines) if m)
+            kept, stats = handoff_compress.pack(messages, budget)
+    except OSError as e:
+        print(f"Warning: Error reading transcript: {e}", file=sys.stderr)
+        return None
+    if not kept:
+        return None
+    return handoff_compress.SEPARATOR.join(kept), stats
 
-    # Check for project config first
-    config_path = cwd_path / ".claude" / "project.json"
-    if config_path.exists():
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                if "handoffs_path" in config:
-                    custom_path = cwd_path / config["handoffs_path"]
-                    custom_path.mkdir(parents=True, exist_ok=True)
-                    return custom_path
-        except (json.JSONDecodeError, IOError):
-            pass
-
-    # Auto-detect common locations
-    possible_paths = [
-        cwd_path / "docs" / "session_handoffs",
-        cwd_path / "session_handoffs",
-        cwd_path / ".claude" / "session_handoffs",
-    ]
-
-    for path in possible_paths:
-        if path.exists():
-            return path
-
-    # Default to docs/session_handoffs
-    default_path = cwd_path / "docs" / "session_handoffs"
-    default_path.mkdir(parents=True, exist_ok=True)
-    return default_path
+
+def tail_entries(transcript_path: str, max_bytes: int = OFFLINE_TAIL_BYTES) -> list[dict]:
+    """Raw transcript entries from (about) the last `max_bytes`, oldest first."""
+    entries = []
+    read = 0
+    try:
+        with open(transcript_path, 'rb') as f:
+            for line in _reverse_lines(f, os.fstat(f.fileno()).st_size):
+                read += len(line) + 1
+                if read > max_bytes and entries:
+                    break
+                try:
+                    entry = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if isinstance(entry, dict):
+                    entries.append(entry)
+    except OSError as e:
+        print(f"Warning: Error reading transcript: {e}", file=sys.stderr)
+    entries.reverse()
+    return entries
+
+
+def iter_transcript_messages(transcript_path: str):
+    """Every message in the transcript, oldest first, one line at a time."""
+    with open(transcript_path, 'rb') as f:
+        for line in f:
+            message = _parse_line(line)
+            if message:
+                yield message
+
+
+def _chunk_cache_path(chunk: str) -> Path:
+    key = hashlib.sha1(f"{HANDOFF_MODEL}\0{CHUNK_SUMMARY_PROMPT}\0{chunk}".encode('utf-8')).hexdigest()
+    return CHUNK_CACHE_DIR / f"{key}.md"
+
+
+def _cached_chunk_summary(chunk: str) -> str | None:
+    try:
+        return _chunk_cache_path(chunk).read_text(encoding='utf-8')
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _prune_chunk_cache():
+    cutoff = time.time() - CHUNK_CACHE_MAX_AGE_DAYS * 86400
+    try:
+        with os.scandir(CHUNK_CACHE_DIR) as entries:
+            for entry in entries:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+    except OSError:
+        pass
+
+
+def summarize_chunk(client, part: int, chunk: str, policy: handoff_policy.Policy,
+                    budget: float | None = None) -> str:
+    """Summary of one chunk of messages, from the cache or the API."""
+    cached = _cached_chunk_summary(chunk)
+    if cached is not None:
+        return cached
+    response, _ = handoff_policy.call(client, {
+        "max_tokens": CHUNK_SUMMARY_MAX_TOKENS,
+        "metadata": {"user_id": "mother-claude-hooks"},
+        "messages": [{"role": "user", "content": CHUNK_SUMMARY_PROMPT.format(part=part, conversation=chunk)}],
+    }, policy, "chunk", budget)
+    summary = response.content[0].text.strip()
+    try:
+        CHUNK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        handoff_index.write_atomic(_chunk_cache_path(chunk), summary)
+    except OSError:
+        pass
+    return summary
+
+
+def summarize_hierarchically(transcript_path: str, api_key: str, policy: handoff_policy.Policy,
+                             budget: float | None = None) -> str | None:
+    """The whole session as chunk summaries plus the newest messages verbatim.
+
+    Map: every older chunk is summarized, MAP_WORKERS at a time; chunks
+    summarized on an earlier run come from the cache, so each compaction
+    only pays for what's new. Reduce: the result is the conversation that
+    HANDOFF_TEMPLATE is filled with. None if the session is short enough
+    that the plain window already covers it.
+
+    With a time `budget`, all chunks share one deadline REDUCE_RESERVE_SECONDS
+    before it ends, each call getting only what is left of it when it starts.
+    Chunks not summarized by then are dropped (queued ones never start) and
+    marked unavailable, so the handoff covers what was summarized in time.
+    """
+    deadline = None if budget is None else time.monotonic() + max(budget - REDUCE_RESERVE_SECONDS, 0)
+    chunks = []
+    current = []
+    try:
+        with hook_metrics.phase("transcript_parse"):
+            for message in iter_transcript_messages(transcript_path):
+                current.append(message)
+                if len(current) == CHUNK_MESSAGES:
+                    chunks.append("\n\n---\n\n".join(current))
+                    current = []
+    except OSError as e:
+        print(f"Warning: Error reading transcript: {e}", file=sys.stderr)
+        return None
+
+    older, recent = chunks[:-RECENT_CHUNKS], chunks[-RECENT_CHUNKS:]
+    if not older:
+        return None
+    recent.append("\n\n---\n\n".join(current))
+
+    from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+    client = hook_runtime.anthropic_client(api_key)
+    # Chunks already run MAP_WORKERS at a time; hedging them would double that
+    policy = policy._replace(hedge_after=None)
+
+    def summarize(part: int, chunk: str) -> str:
+        left = None if deadline is None else deadline - time.monotonic()
+        return summarize_chunk(client, part, chunk, policy, left)
+
+    pool = ThreadPoolExecutor(max_workers=MAP_WORKERS)
+    summaries = []
+    missed = 0
+    try:
+        with hook_metrics.phase("api_call"):
+            futures = [pool.submit(summarize, i + 1, chunk) for i, chunk in enumerate(older)]
+            for i, future in enumerate(futures):
+                wait = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    summaries.append(f"[Part {i + 1}]\n{future.result(timeout=wait)}")
+                except FutureTimeout:
+                    missed += 1
+                    summaries.append(f"[Part {i + 1}]\n(Summary unavailable: out of time)")
+                except Exception as e:
+                    summaries.append(f"[Part {i + 1}]\n(Summary unavailable: {e})")
+    finally:
+        # Past the deadline: queued chunks never start, and running ones end
+        # by it (their calls were given no more), so nothing is waited on
+        pool.shutdown(wait=False, cancel_futures=True)
+    if missed:
+        print(f"Warning: {missed} of {len(older)} earlier parts weren't summarized in time", file=sys.stderr)
+    _prune_chunk_cache()
+
+    return (
+        "EARLIER IN THIS SESSION (summaries of each part, oldest first):\n\n"
+        + "\n\n".join(summaries)
+        + "\n\n===\n\nMOST RECENT MESSAGES (verbatim):\n\n"
+        + "\n\n---\n\n".join(part for part in recent if part)
+    )
+
+
+def get_brief_settings(config: dict) -> tuple[int, int]:
+    """(handoffs_to_load, token budget) that session_start uses for this project."""
+    import session_brief
+
+    count = config.get("handoffs_to_load", 1)
+    return count, session_brief.token_budget(config, count)
 
 
 def extract_short_title(content: str) -> str:
@@ -347,43 +814,423 @@ def remove_short_title_line(content: str) -> str:
     return content.strip()
 
 
-def generate_handoff(conversation: str, cwd: str, trigger: str, api_key: str) -> tuple[str, str]:
-    """Use Claude Haiku to generate a session handoff document."""
-    client = anthropic.Anthropic(api_key=api_key)
+def _log_usage(mode: str, usage, elapsed_ms: float, baseline_tokens: int | None = None,
+               extra: dict | None = None):
+    record = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "mode": mode,
+        "input_tokens": getattr(usage, "input_tokens", None) or 0,
+        "cache_read_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_write_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+        "output_tokens": getattr(usage, "output_tokens", None) or 0,
+        "api_ms": round(elapsed_ms, 1),
+    }
+    if baseline_tokens:
+        record["full_estimate_tokens"] = baseline_tokens
+    if extra:
+        record.update(extra)
+    try:
+        HOOKS_STATE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(USAGE_LOG, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError:
+        pass
+    return record
+
+
+class _Terminated(BaseException):
+    """SIGTERM during inline generation: the hook hit its timeout."""
+
+
+def _on_sigterm(signum, frame):
+    # Once only: the salvage that follows must not be interrupted in turn
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    raise _Terminated()
+
+
+class _Superseded(Exception):
+    """Another request for the same handoff finished first."""
+
+
+class HandoffStreams:
+    """The streamed requests behind one handoff.
+
+    Each request (a retry, a hedge, a fallback model) appends its text to
+    its own file in <handoff_dir>/.index/streaming/ as it arrives, so what
+    was generated before a deadline or a kill is still on disk. The
+    finished handoff is written atomically as usual and the stream files
+    are removed.
+    """
+
+    def __init__(self, handoff_dir: Path):
+        self.dir = streaming_dir(handoff_dir)
+        self.paths = []
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def send(self, client, kwargs: dict):
+        """One streamed request: the `send` for handoff_policy.call."""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self.dir / f"{os.getpid()}-{time.time_ns()}{PARTIAL_SUFFIX}"
+        with self._lock:
+            self.paths.append(path)
+        try:
+            with open(path, 'w', encoding='utf-8') as f, client.messages.stream(**kwargs) as stream:
+                for text in stream.text_stream:
+                    if self.done.is_set():
+                        raise _Superseded("another request finished first")
+                    f.write(text)
+                    f.flush()
+                return stream.get_final_message()
+        except _Superseded:
+            path.unlink(missing_ok=True)
+            raise
+
+    def best_partial(self) -> str:
+        """The most text any of the requests got through."""
+        best = ""
+        with self._lock:
+            paths = list(self.paths)
+        for path in paths:
+            try:
+                text = path.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+            if len(text) > len(best):
+                best = text
+        return best
+
+    def finish(self):
+        """Stop requests still streaming and remove every stream file."""
+        self.done.set()
+        with self._lock:
+            paths = list(self.paths)
+        for path in paths:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+
+def streaming_dir(handoff_dir: Path) -> Path:
+    return handoff_dir / handoff_index.INDEX_DIRNAME / STREAMING_DIRNAME
+
+
+def salvage_partial(text: str, reason: str) -> tuple[str, str] | None:
+    """A cut-off generation as a handoff clearly marked partial, or None if
+    too little arrived to be worth keeping."""
+    if len(text.strip()) < MIN_PARTIAL_CHARS:
+        return None
+    # The SHORT_TITLE line only counts once it is complete
+    short_title = extract_short_title(text) if "\n" in text else "session"
+    content = remove_short_title_line(text).strip()
+    notice = (f"> **PARTIAL HANDOFF**: generation was cut off ({reason}) after {len(content)} characters. "
+              f"What is here is as generated; the sections after it are missing.")
+    heading, _, rest = content.partition("\n")
+    if heading.startswith("# "):
+        content = f"{heading}\n\n{notice}\n{rest}"
+    else:
+        content = f"{notice}\n\n{content}"
+    return content + "\n", f"{short_title[:42]}-partial"
+
+
+def stale_partials(handoff_dir: Path) -> list[Path]:
+    """Stream files left by a process that was killed mid-generation."""
+    cutoff = time.time() - STALE_PARTIAL_SECONDS
+    try:
+        return sorted(p for p in streaming_dir(handoff_dir).glob(f"*{PARTIAL_SUFFIX}") if p.stat().st_mtime < cutoff)
+    except OSError:
+        return []
+
+
+def recover_partials(handoff_dir: Path) -> list[Path]:
+    """Save what killed generations streamed as partial handoffs (dated by
+    when they stopped), and clear their stream files."""
+    recovered = []
+    for path in stale_partials(handoff_dir):
+        try:
+            text = path.read_text(encoding='utf-8')
+            stopped = datetime.fromtimestamp(path.stat().st_mtime)
+        except (OSError, UnicodeDecodeError):
+            text, stopped = "", None
+        salvaged = salvage_partial(text, "the hook was killed") if stopped else None
+        if salvaged:
+            content, short_title = salvaged
+            filename = f"{stopped:%Y%m%d-%H%M}-{short_title}.md"
+            try:
+                previous_mtime = handoff_index.dir_mtime(handoff_dir)
+                handoff_index.write_atomic(handoff_dir / filename, content)
+                handoff_index.add_handoff(handoff_dir, filename, previous_mtime)
+                recovered.append(handoff_dir / filename)
+                print(f"Recovered a partial handoff from a killed generation: {handoff_dir / filename}")
+            except OSError:
+                continue
+        path.unlink(missing_ok=True)
+    return recovered
+
+
+def generate_offline(job: dict, reason: str) -> tuple[str, str]:
+    """The handoff built from the transcript alone, in milliseconds."""
+    import handoff_offline
+
+    with hook_metrics.phase("transcript_parse"):
+        entries = tail_entries(job["transcript_path"]) if job.get("transcript_path") else []
+    return handoff_offline.build_handoff(entries, job["cwd"], job["trigger"], reason)
+
+
+def generate_handoff(conversation: str, cwd: str, trigger: str, api_key: str,
+                     policy: handoff_policy.Policy | None = None, budget: float | None = None,
+                     previous_handoff: str | None = None, full_conversation: str | None = None,
+                     log_fields: dict | None = None,
+                     streams: "HandoffStreams | None" = None) -> tuple[str, str] | None:
+    """Use Claude Haiku to generate a session handoff document.
+
+    With `previous_handoff`, this is a delta: `conversation` holds only the
+    messages since that handoff, and the model updates it rather than
+    starting over. `full_conversation` (what a full handoff would have
+    sent) is only used to report the savings. `log_fields` are added to
+    the usage log record.
+
+    The API call follows `policy` (models, deadlines, retries, hedging; see
+    handoff_policy.py), within `budget` seconds if given. With `streams`
+    the response is streamed into files as it arrives (see HandoffStreams).
+    Returns None if every model and try fails.
+    """
+    if policy is None:
+        policy = handoff_policy.load_policy({})
+    client = hook_runtime.anthropic_client(api_key)
     project_name = Path(cwd).name
     date = datetime.now().strftime("%Y-%m-%d")
     platform = sys.platform
+    fields = dict(project_name=project_name, trigger=trigger, cwd=cwd, date=date, platform=platform)
+
+    if previous_handoff is not None:
+        mode = "delta"
+        request = {
+            "system": DELTA_SYSTEM_PROMPT.format(**fields),
+            # The cache breakpoint goes after the previous handoff: the
+            # instructions alone (~1k tokens) are below every model's minimum
+            # cacheable prompt, and with the handoff they can reach it. That
+            # prefix is only sent again when this same delta is: a retry, a
+            # hedge, a fallback to the same model, a rerun worker job. Each
+            # later delta starts from a newer handoff.
+            "messages": [{"role": "user", "content": [
+                {
+                    "type": "text",
+                    "text": DELTA_PREVIOUS_TEMPLATE.format(previous=previous_handoff, **fields),
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {"type": "text", "text": DELTA_NEW_TEMPLATE.format(conversation=conversation)},
+            ]}],
+        }
+        baseline = handoff_packing.estimate_tokens(
+            HANDOFF_TEMPLATE.format(conversation=full_conversation or "", **fields))
+    else:
+        mode = "full"
+        request = {"messages": [{"role": "user", "content": HANDOFF_TEMPLATE.format(conversation=conversation, **fields)}]}
+        baseline = None
 
-    prompt = HANDOFF_TEMPLATE.format(
-        project_name=project_name,
-        trigger=trigger,
-        cwd=cwd,
-        conversation=conversation,
-        date=date,
-        platform=platform
-    )
-
+    started = time.perf_counter()
     try:
-        response = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=4000,
-            metadata={"user_id": "mother-claude-hooks"},
-            messages=[{"role": "user", "content": prompt}]
-        )
+        with hook_metrics.phase("api_call"):
+            response, model = handoff_policy.call(client, dict(
+                max_tokens=4000,
+                metadata={"user_id": "mother-claude-hooks"},
+                **request
+            ), policy, mode, budget, send=streams.send if streams else None)
+    except handoff_policy.GenerationFailed as e:
+        for error in e.errors:
+            print(f"Error calling Claude API: {error}", file=sys.stderr)
+        return None
+    if model != policy.models[0]:
+        print(f"Handoff generated by fallback model {model}")
+
+    usage = _log_usage(mode, getattr(response, "usage", None), (time.perf_counter() - started) * 1000,
+                       baseline, dict(log_fields or {}, model=model))
+    if baseline:
+        sent = usage["input_tokens"] + usage["cache_read_tokens"] + usage["cache_write_tokens"]
+        print(f"Delta handoff: {sent} input tokens ({usage['cache_read_tokens']} from cache) "
+              f"vs ~{baseline} for a full handoff")
 
+    try:
         content = response.content[0].text
-        short_title = extract_short_title(content)
-        content = remove_short_title_line(content)
+    except (AttributeError, IndexError) as e:
+        print(f"Error reading Claude API response: {e}", file=sys.stderr)
+        return None
+    short_title = extract_short_title(content)
+    content = remove_short_title_line(content)
+
+    return content.strip(), short_title
 
-        return content.strip(), short_title
 
+def write_handoff(job: dict, api_key: str, attempts: int = 1, budget: float | None = None) -> Path | None:
+    """Generate the handoff for a job (see main) and write it, plus everything
+    derived from it. Returns the handoff's path, or None if it couldn't be saved.
+
+    Runs in the hook itself (with a time `budget`), or later in
+    handoff_worker.py. `attempts` is the default tries per model.
+    """
+    started = time.monotonic()
+    cwd = job["cwd"]
+    conversation = job["conversation"]
+    config = hook_runtime.project_config(cwd)
+    policy = handoff_policy.load_policy(config, attempts)
+
+    def remaining():
+        return None if budget is None else budget - (time.monotonic() - started)
+
+    with hook_metrics.phase("dir_scan"):
+        handoff_dir = hook_runtime.find_handoff_directory(cwd, create=True)
+    # Whatever a killed generation streamed before it died
+    recover_partials(handoff_dir)
+
+    partial = False
+    mode = config.get("handoff_mode")
+    if mode == "offline" or api_key is None:
+        # Offline mode, or no key/SDK: build it from the transcript alone
+        generated = generate_offline(job, "offline mode" if mode == "offline" else "no API key or SDK")
+    else:
+        streams = HandoffStreams(handoff_dir)
+        cut_off = "the API failed or ran out of time"
+        try:
+            previous = None
+            # Hierarchical mode: cover the whole session, not just the last messages
+            if mode == "hierarchical" and job.get("transcript_path"):
+                conversation = summarize_hierarchically(job["transcript_path"], api_key, policy, remaining()) or conversation
+            # Delta mode: update this session's previous handoff with what's new
+            elif mode == "delta" and job.get("delta"):
+                try:
+                    with open(job["delta"]["previous_handoff"], 'r', encoding='utf-8') as f:
+                        previous = f.read()
+                except (IOError, UnicodeDecodeError):
+                    previous = None
+
+            if previous is not None:
+                generated = generate_handoff(
+                    job["delta"]["messages"], cwd, job["trigger"], api_key, policy, remaining(),
+                    previous_handoff=previous, full_conversation=conversation, streams=streams,
+                )
+            else:
+                generated = generate_handoff(conversation, cwd, job["trigger"], api_key, policy, remaining(),
+                                             log_fields=job.get("compression"), streams=streams)
+        except _Terminated:
+            generated = None
+            cut_off = "the hook timed out"
+        if signal.getsignal(signal.SIGTERM) is _on_sigterm:
+            # Only milliseconds of writing left; finish it
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+        if generated is None:
+            # Keep what the model got through, marked as partial
+            generated = salvage_partial(streams.best_partial(), cut_off)
+            partial = generated is not None
+        streams.finish()
+        if generated is None:
+            # Nothing usable came back: still leave a useful handoff behind
+            generated = generate_offline(job, "API unavailable")
+    handoff_content, short_title = generated
+
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M")
+    filename = f"{timestamp}-{short_title}.md"
+    output_path = handoff_dir / filename
+    previous_mtime = handoff_index.dir_mtime(handoff_dir)
+
+    try:
+        with hook_metrics.phase("file_write"):
+            handoff_index.write_atomic(output_path, handoff_content)
+        print(f"{'Partial session' if partial else 'Session'} handoff saved to: {output_path}")
     except Exception as e:
-        print(f"Error calling Claude API: {e}", file=sys.stderr)
-        fallback = f"# Session Handoff (Auto-generated - API Error)\n\nError: {e}\n\nTrigger: {trigger}\nProject: {project_name}"
-        return fallback, "error"
+        print(f"Error saving handoff: {e}", file=sys.stderr)
+        return None
+
+    session_state_after_write(job, output_path, partial)
+    # A session that resumed while this was being generated picks it up with its next prompt
+    import handoff_worker
+
+    handoff_worker.note_written(job["session_id"], output_path)
+
+    import handoff_archive
+    import handoff_relevance
+    import handoff_search
+    import session_brief
+
+    with hook_metrics.phase("file_write"):
+        handoff_index.add_handoff(handoff_dir, filename, previous_mtime)
+        # Features for relevance selection at session start (branch, tickets, files)
+        handoff_relevance.record_handoff(
+            handoff_dir, filename, handoff_content, handoff_relevance.current_branch(cwd),
+        )
+        count, brief_budget = get_brief_settings(config)
+        # Roll handoffs past archive_after_days into the monthly bundles
+        archive_days = config.get("archive_after_days")
+        if isinstance(archive_days, int) and archive_days > 0:
+            try:
+                archived = handoff_archive.archive_old(handoff_dir, archive_days, keep=count)
+                if archived:
+                    print(f"Archived {len(archived)} handoff(s) older than {archive_days} days")
+            except OSError as e:
+                print(f"Warning: could not archive old handoffs: {e}", file=sys.stderr)
+        # Pre-render what the next SessionStart will print
+        session_brief.write_brief(handoff_dir, count, brief_budget)
+        try:
+            handoff_search.index_handoff(handoff_dir, output_path)
+        except Exception as e:
+            # Search is a convenience; the next query catches up on its own
+            print(f"Warning: could not update handoff search index: {e}", file=sys.stderr)
+
+    return output_path
+
+
+def usage_report(days: int = 30):
+    """Print token usage per handoff mode from USAGE_LOG."""
+    cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+    by_mode = {}
+    try:
+        with open(USAGE_LOG, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("ts", "") >= cutoff:
+                    by_mode.setdefault(record.get("mode", "?"), []).append(record)
+    except FileNotFoundError:
+        print(f"No handoff usage recorded yet ({USAGE_LOG})")
+        handoff_policy.report(days)
+        return
+
+    print(f"Handoff token usage, last {days} days")
+    print(f"{'mode':<8} {'count':>6} {'avg input':>10} {'avg cached':>11} {'avg output':>11} {'avg ms':>8}")
+    for mode, records in sorted(by_mode.items()):
+        n = len(records)
+        sent = sum(r["input_tokens"] + r["cache_read_tokens"] + r["cache_write_tokens"] for r in records) / n
+        cached = sum(r["cache_read_tokens"] for r in records) / n
+        output = sum(r["output_tokens"] for r in records) / n
+        ms = sum(r["api_ms"] for r in records) / n
+        print(f"{mode:<8} {n:>6} {sent:>10.0f} {cached:>11.0f} {output:>11.0f} {ms:>8.0f}")
+
+    compressed = [r for records in by_mode.values() for r in records if r.get("raw_tokens")]
+    if compressed:
+        n = len(compressed)
+        print(f"\nCompressed prompts: {n}, avg {sum(r['messages'] for r in compressed) / n:.0f} messages, "
+              f"{sum(r['raw_tokens'] for r in compressed) / n:.0f} -> {sum(r['tokens'] for r in compressed) / n:.0f} tokens "
+              f"(plain window avg {sum(r.get('window_tokens', 0) for r in compressed) / n:.0f})")
+
+    delta = [r for r in by_mode.get("delta", []) if r.get("full_estimate_tokens")]
+    if delta:
+        full = sum(r["full_estimate_tokens"] for r in delta)
+        sent = sum(r["input_tokens"] + r["cache_read_tokens"] + r["cache_write_tokens"] for r in delta)
+        print(f"\nDelta handoffs sent {sent} input tokens vs ~{full} as full handoffs "
+              f"({1 - sent / full:.0%} saved)")
+
+    handoff_policy.report(days)
 
 
 def main():
+    if "--usage" in sys.argv[1:]:
+        usage_report()
+        return
+
     try:
         hook_input = json.load(sys.stdin)
     except json.JSONDecodeError as e:
@@ -395,43 +1242,76 @@ def main():
     cwd = hook_input.get("cwd", os.getcwd())
     hook_event = hook_input.get("hook_event_name", "unknown")
     trigger = hook_input.get("trigger", hook_event)
+    hook_metrics.start("session_handoff", trigger=trigger)
 
-    # Get transcript size for deduplication logic
     transcript_size = get_transcript_size(transcript_path)
+    is_precompact = trigger in ("auto", "PreCompact")
 
-    # Check if we should skip (SessionEnd after PreCompact with no new work)
-    if should_skip_handoff(session_id, transcript_size, trigger):
-        cleanup_state(session_id)
-        sys.exit(0)
-
-    api_key = get_api_key()
-    conversation = parse_transcript(transcript_path)
+    with hook_metrics.phase("config_load"):
+        state = load_handoff_state(session_id)
+    with hook_metrics.phase("transcript_parse"):
+        conversation, cursor = parse_transcript(transcript_path, state.get("cursor"))
 
     if not conversation:
         print("No conversation content found, skipping handoff generation")
         sys.exit(0)
 
-    handoff_content, short_title = generate_handoff(conversation, cwd, trigger, api_key)
+    # Skip if nothing was said since the last handoff in this session
+    digest = conversation_digest(conversation)
+    if should_skip_handoff(state, digest, trigger):
+        if not is_precompact:
+            cleanup_state(session_id)
+        sys.exit(0)
 
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M")
-    filename = f"{timestamp}-{short_title}.md"
+    api_key = get_api_key()
 
-    handoff_dir = find_handoff_directory(cwd)
-    output_path = handoff_dir / filename
+    # Spend the prompt budget on content: compress, then pack as many recent
+    # messages as fit (handoff_compress.py)
+    config = hook_runtime.project_config(cwd)
+    compression = None
+    budget = handoff_compress.prompt_budget(config)
+    if budget and api_key and config.get("handoff_mode") != "offline":
+        with hook_metrics.phase("transcript_parse"):
+            compressed = compress_transcript(transcript_path, budget)
+        if compressed:
+            window_tokens = handoff_packing.estimate_tokens(conversation)
+            conversation, stats = compressed
+            compression = dict(stats._asdict(), window_tokens=window_tokens)
+            print(f"Handoff prompt: {stats.messages} messages, {stats.raw_tokens} -> {stats.tokens} tokens "
+                  f"compressed (budget {budget}; the plain 80-message window was ~{window_tokens})")
+
+    job = {
+        "session_id": session_id,
+        "trigger": trigger,
+        "cwd": cwd,
+        "transcript_path": transcript_path,
+        "conversation": conversation,
+        "offset": cursor["offset"] if cursor else None,
+        "delta": delta_source(state, cursor),
+        "compression": compression,
+        # Saved by write_handoff once the handoff is on disk (see session_state_after_write)
+        "state": {
+            "save": is_precompact,
+            "transcript_size": transcript_size,
+            "cursor": {key: cursor[key] for key in CURSOR_FIELDS} if cursor else None,
+            "digest": digest,
+        },
+    }
 
-    try:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(handoff_content)
-        print(f"Session handoff saved to: {output_path}")
-    except Exception as e:
-        print(f"Error saving handoff: {e}", file=sys.stderr)
-        sys.exit(1)
+    # Normally: snapshot the job to the spool and return; the background
+    # worker generates and writes the handoff
+    import handoff_worker
 
-    # Save state for deduplication (PreCompact saves, SessionEnd cleans up)
-    if trigger in ("auto", "PreCompact"):
-        save_handoff_state(session_id, transcript_size)
-    else:
-        cleanup_state(session_id)
+    with hook_metrics.phase("file_write"):
+        queued = handoff_worker.enqueue(job)
+    if queued:
+        print(f"Session handoff queued: {queued.name}")
+        return
+
+    # Killed at the hook's timeout, save what was generated so far
+    signal.signal(signal.SIGTERM, _on_sigterm)
+    if write_handoff(job, api_key, budget=INLINE_BUDGET) is None:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
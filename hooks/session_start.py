@@ -5,6 +5,10 @@ Mother CLAUDE Session Start Hook
 Loads the most recent session handoff when starting a new Claude session.
 Outputs to stdout so Claude sees the previous context.
 
+The handoff text normally comes from the brief session_handoff.py
+pre-renders after each write (see session_brief.py), so a typical start is
+a single file read.
+
 Also detects post-compact resumes and prompts Claude to auto-continue,
 so you don't have to type "continue" after context compression.
 
@@ -18,59 +22,21 @@ import os
 import sys
 from pathlib import Path
 
-# Force UTF-8 stdout — Windows defaults to cp1252, which crashes on Unicode
-# characters commonly found in handoff markdown (dashes, arrows, em-dashes).
-# A crashing SessionStart hook presents as Claude "freezing" at session start.
-if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
-    try:
-        sys.stdout.reconfigure(encoding='utf-8', errors='replace')
-    except (AttributeError, OSError):
-        pass
-
-
-def find_handoff_directory(cwd: str) -> Path | None:
-    """Find the session_handoffs directory for this project."""
-    cwd_path = Path(cwd)
-
-    # Check for project config first
-    config_path = cwd_path / ".claude" / "project.json"
-    if config_path.exists():
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                if "handoffs_path" in config:
-                    custom_path = cwd_path / config["handoffs_path"]
-                    if custom_path.exists():
-                        return custom_path
-        except (json.JSONDecodeError, IOError):
-            pass
-
-    # Auto-detect common locations
-    possible_paths = [
-        cwd_path / "docs" / "session_handoffs",
-        cwd_path / "session_handoffs",
-        cwd_path / ".claude" / "session_handoffs",
-    ]
-
-    for path in possible_paths:
-        if path.exists():
-            return path
-
-    return None
+import handoff_index
+import hook_metrics
+import hook_runtime
+import session_brief
 
+hook_runtime.utf8_stdout()
 
-def get_recent_handoffs(handoff_dir: Path, count: int = 1) -> list[Path]:
-    """Get the most recent handoff files."""
-    handoffs = list(handoff_dir.glob("*.md"))
 
-    # Filter out README or template files
-    handoffs = [h for h in handoffs if not h.name.lower().startswith(('readme', 'template'))]
-
-    # Sort by filename (which starts with YYYYMMDD-HHMM timestamp), most recent first
-    # This is more reliable than mtime which can change with edits/syncs
-    handoffs.sort(key=lambda p: p.name, reverse=True)
+def get_recent_handoffs(handoff_dir: Path, count: int = 1) -> list[Path]:
+    """Get the most recent handoff files.
 
-    return handoffs[:count]
+    Served from the handoff index (see handoff_index.py), which is only
+    rebuilt by a directory scan when the directory has changed.
+    """
+    return handoff_index.recent_handoffs(handoff_dir, count)
 
 
 def main():
@@ -83,28 +49,56 @@ def main():
 
     # Check if this is a resume after compact (vs fresh session start)
     is_post_compact = hook_input.get("source") == "compact"
+    hook_metrics.start("session_start", source=hook_input.get("source", ""))
 
     # Find handoff directory
-    handoff_dir = find_handoff_directory(cwd)
+    with hook_metrics.phase("dir_scan"):
+        handoff_dir = hook_runtime.find_handoff_directory(cwd)
+
+    # The handoff for the compaction we're resuming from is usually still
+    # being generated in the background. Don't wait for it: load the previous
+    # one now, and the UserPromptSubmit hook adds the new one once it lands
+    handoff_on_its_way = False
+    if is_post_compact and hook_input.get("session_id"):
+        import handoff_worker
+
+        with hook_metrics.phase("dir_scan"):
+            handoff_on_its_way = handoff_worker.mark_resume(hook_input["session_id"], cwd)
+
     if not handoff_dir:
         sys.exit(0)
 
     # Get config for how many to load (default 1)
-    count = 1
-    config_path = Path(cwd) / ".claude" / "project.json"
-    if config_path.exists():
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                count = config.get("handoffs_to_load", 1)
-        except (json.JSONDecodeError, IOError):
-            pass
-
-    # Get recent handoffs
-    handoffs = get_recent_handoffs(handoff_dir, count)
-
-    if not handoffs:
-        sys.exit(0)
+    with hook_metrics.phase("config_load"):
+        config = hook_runtime.project_config(cwd)
+    count = config.get("handoffs_to_load", 1)
+    budget = session_brief.token_budget(config, count)
+
+    # Pick handoffs relevant to the current branch/changes (None = no git
+    # signal, use the newest)
+    selected = None
+    if config.get("handoff_selection", "relevance") == "relevance":
+        import handoff_relevance
+
+        with hook_metrics.phase("dir_scan"):
+            selected = handoff_relevance.select(handoff_dir, cwd, count)
+
+    # Fast path: the brief session_handoff.py pre-rendered after the last write
+    with hook_metrics.phase("file_read"):
+        brief = session_brief.read_brief(handoff_dir, count, budget, selected)
+
+    if brief is None:
+        # Get recent handoffs
+        with hook_metrics.phase("dir_scan"):
+            handoffs = selected or get_recent_handoffs(handoff_dir, count)
+
+        if not handoffs:
+            sys.exit(0)
+
+        with hook_metrics.phase("file_read"):
+            brief = session_brief.render(handoffs, budget)
+        with hook_metrics.phase("file_write"):
+            session_brief.save_brief(handoff_dir, count, budget, handoffs, brief, selected=selected is not None)
 
     # Output the handoff(s) to stdout - Claude will see this
     project_name = Path(cwd).name
@@ -118,28 +112,16 @@ def main():
         print(f"SESSION CONTEXT: {project_name}")
         print(f"{'='*60}")
 
-    for i, handoff_path in enumerate(handoffs):
-        if i > 0:
-            print(f"\n{'-'*40}\n")
-
-        print(f"Previous handoff: {handoff_path.name}")
-        print(f"{'-'*40}")
-
-        try:
-            with open(handoff_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Limit output to avoid overwhelming context
-                if len(content) > 8000:
-                    content = content[:8000] + "\n\n[... truncated for length ...]"
-                print(content)
-        except IOError as e:
-            print(f"(Could not read: {e})")
+    print(brief)
 
     print(f"\n{'='*60}")
+    if handoff_on_its_way:
+        print("The handoff for this compaction is still being generated; it will be added to")
+        print("the context with your first message after it is written. Until then, the one above is the latest.")
     if is_post_compact:
         print("Context was just compressed. Please continue where we left off.")
     else:
-        print("TIP: Say 'load previous handoffs' if you need more context.")
+        print("TIP: Say 'load previous handoffs about <topic>' if you need more context.")
     print(f"{'='*60}\n")
 
 
@@ -0,0 +1,65 @@
+"""A project's .claude/project.json can tighten the auto-approve policy,
+but only a project the user trusts can widen it."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import approval_policy  # noqa: E402
+
+PROJECT_SAFE = "^make\\s+deploy"
+PROJECT_DANGEROUS = "\\bterraform\\s+apply"
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(approval_policy, "HOOKS_STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(approval_policy, "_loaded", {})
+    project = tmp_path / "repo"
+    (project / ".claude").mkdir(parents=True)
+    (project / ".claude" / "project.json").write_text(json.dumps({
+        "approval_policy": {
+            "safe_bash_patterns": [PROJECT_SAFE],
+            "dangerous_patterns": [PROJECT_DANGEROUS],
+        }
+    }))
+    return project
+
+
+def use_global_policy(tmp_path, monkeypatch, trusted):
+    path = tmp_path / "approval_policy.json"
+    path.write_text(json.dumps({
+        "trusted_projects": trusted,
+        "safe_bash_patterns": ["^ls(\\s|$)"],
+        "dangerous_patterns": ["\\brm\\s+-rf"],
+    }))
+    monkeypatch.setattr(approval_policy, "GLOBAL_POLICY_PATH", path)
+
+
+def test_untrusted_project_cannot_widen(tmp_path, monkeypatch, project, capsys):
+    use_global_policy(tmp_path, monkeypatch, [])
+    policy = approval_policy.load_policy(str(project))
+    assert PROJECT_SAFE not in policy.safe_patterns
+    assert PROJECT_DANGEROUS in policy.dangerous_patterns
+    assert policy.match_safe("make deploy") is None
+    assert "ignoring 1 safe pattern" in capsys.readouterr().err
+
+
+def test_trusted_project_can_widen(tmp_path, monkeypatch, project):
+    use_global_policy(tmp_path, monkeypatch, [str(project)])
+    policy = approval_policy.load_policy(str(project))
+    assert PROJECT_SAFE in policy.safe_patterns
+    assert PROJECT_DANGEROUS in policy.dangerous_patterns
+
+
+def test_trust_covers_subdirectories_only(tmp_path, monkeypatch, project):
+    use_global_policy(tmp_path, monkeypatch, [str(tmp_path)])
+    assert PROJECT_SAFE in approval_policy.load_policy(str(project)).safe_patterns
+
+    use_global_policy(tmp_path, monkeypatch, [str(project / "sub")])
+    monkeypatch.setattr(approval_policy, "_loaded", {})
+    assert PROJECT_SAFE not in approval_policy.load_policy(str(project)).safe_patterns
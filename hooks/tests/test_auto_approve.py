@@ -0,0 +1,102 @@
+"""Regression tests for the auto-approve lexer: quoting it can't follow
+must fail closed, never hide the commands after it."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from approval_policy import GLOBAL_POLICY_PATH, load_policy_file  # noqa: E402
+from auto_approve import ShellSyntaxError, evaluate_bash_command, split_command  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def policy():
+    return load_policy_file(GLOBAL_POLICY_PATH)
+
+
+def heads(command):
+    return [segment.head for segment in split_command(command)]
+
+
+def test_ansi_c_escaped_quote_does_not_swallow_next_lines(policy):
+    command = "echo $'\\''\ntouch /tmp/pwned2\necho '"
+    with pytest.raises(ShellSyntaxError):
+        split_command(command)
+    assert not evaluate_bash_command(command, policy)
+    assert not evaluate_bash_command("echo $'\\''\nrm -rf ~\necho '", policy)
+
+
+def test_ansi_c_quote_is_one_word():
+    assert heads("echo $'it\\'s'; ls") == ["echo", "ls"]
+    assert heads("echo $'a\\nb'\ntouch x") == ["echo", "touch"]
+
+
+def test_ansi_c_quote_unterminated():
+    with pytest.raises(ShellSyntaxError):
+        split_command("echo $'abc\\'")
+
+
+def test_locale_quote(policy):
+    assert heads('echo $"a; b" && ls') == ["echo", "ls"]
+    assert heads('echo $"$(rm -rf x)"') == ["rm", "echo"]
+    assert not evaluate_bash_command('echo $"$(rm -rf x)"', policy)
+    with pytest.raises(ShellSyntaxError):
+        split_command('echo $"abc')
+
+
+def test_embedded_newlines(policy):
+    assert heads("ls\ntouch x") == ["ls", "touch"]
+    assert not evaluate_bash_command("git status\ntouch /tmp/x", policy)
+    # A newline inside quotes is data, not a separator
+    assert heads("echo 'a\nb'; ls") == ["echo", "ls"]
+    assert heads('echo "a\nb"\nls') == ["echo", "ls"]
+
+
+def test_braced_expansions():
+    assert heads("echo ${HOME}/x ${name:-default}") == ["echo"]
+    for command in ("echo ${x:-'}'}\ntouch y", 'echo ${x:-"$(id)"}', "echo $[x[$(id)]]", "echo ${x"):
+        with pytest.raises(ShellSyntaxError):
+            split_command(command)
+
+
+def test_cached_verdict_from_older_evaluator_is_not_served(tmp_path, monkeypatch):
+    import approval_cache
+    import auto_approve
+    from approval_policy import load_policy
+
+    cache = approval_cache.DecisionCache(tmp_path / "cache.sqlite")
+    monkeypatch.setattr(approval_cache, "_cache", cache)
+    monkeypatch.setattr(auto_approve, "get_cache", lambda: cache)
+    command = "echo $'\\''\ntouch /tmp/pwned2\necho '"
+    # An "allow" cached under the policy version alone, as before the lexer fix
+    cache.put(load_policy(None).version, command, True)
+    assert not auto_approve.is_safe_bash_command(command)
+
+
+def test_unquoted_heredoc_body_substitutions_are_checked(policy):
+    for command in ("cat <<EOF\n$(touch /tmp/pwned)\nEOF", "cat <<EOF\n`touch /tmp/pwned`\nEOF",
+                    "cat <<-EOF\n\tx ${HOME} $(touch /tmp/pwned\n)\n\tEOF"):
+        assert "touch" in heads(command)
+        assert not evaluate_bash_command(command, policy)
+    assert heads("cat <<EOF\n$(git status)\nEOF\nls") == ["cat", "git", "ls"]
+    # Quotes and escaped $ are data in the body
+    assert heads("cat <<EOF\nit's \\$(rm x)\nEOF") == ["cat"]
+
+
+def test_quoted_heredoc_body_is_data(policy):
+    for delimiter in ("'EOF'", '"EOF"', "\\EOF", "E'O'F"):
+        command = f"cat <<{delimiter}\n$(touch /tmp/pwned) `rm x`\nEOF\nls"
+        assert heads(command) == ["cat", "ls"]
+        assert evaluate_bash_command(command, policy)
+
+
+def test_arithmetic_is_not_a_command(policy):
+    assert heads("echo $((1+2)) $((2*(3+1)))") == ["echo"]
+    assert evaluate_bash_command("echo $((1+2))", policy)
+    assert heads("echo $(($(rm x)+`id`))") == ["rm", "id", "echo"]
+    for command in ("echo $((a) (b))", "echo $((1+2)", "echo $(('1'))"):
+        with pytest.raises(ShellSyntaxError):
+            split_command(command)
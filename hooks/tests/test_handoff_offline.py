@@ -0,0 +1,27 @@
+"""The offline handoff fills every section of the handoff template."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from handoff_offline import build_handoff  # noqa: E402
+
+REQUEST = {"type": "user", "message": {"content": "fix the flaky login test please"}}
+
+
+def section(content, heading):
+    return content.split(f"## {heading}\n", 1)[1].split("\n---", 1)[0].strip()
+
+
+def test_technical_discoveries_extracted():
+    reply = {"type": "assistant", "message": {"content": [
+        {"type": "text", "text": "It turns out the fixture reused a stale session cookie across tests."}]}}
+    content, _ = build_handoff([REQUEST, reply], "/tmp", "manual", "test")
+    assert section(content, "Technical Discoveries") == \
+        "- It turns out the fixture reused a stale session cookie across tests."
+
+
+def test_technical_discoveries_present_when_empty():
+    content, _ = build_handoff([REQUEST], "/tmp", "manual", "test")
+    assert section(content, "Technical Discoveries") == "- None recorded (offline handoff)"
@@ -0,0 +1,65 @@
+"""A session that resumed before its handoff was written gets that
+handoff — its own, not the project's newest — once it lands."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import handoff_worker  # noqa: E402
+import hook_state  # noqa: E402
+
+
+@pytest.fixture
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(hook_state, "HOOKS_STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(hook_state, "STORE_PATH", tmp_path / "state" / "hook_state.sqlite")
+    monkeypatch.setattr(hook_state, "_conn", None)
+    monkeypatch.setattr(handoff_worker, "SPOOL_DIR", tmp_path / "spool")
+    (tmp_path / "spool").mkdir()
+    return tmp_path
+
+
+def spooled(cwd, session_id):
+    path = handoff_worker.SPOOL_DIR / (
+        f"{handoff_worker.project_key(cwd)}-{handoff_worker.session_key(session_id)}-1.json")
+    path.write_text("{}")
+    return path
+
+
+def test_resume_gets_its_own_handoff(spool):
+    cwd = str(spool)
+    job1, job2 = spooled(cwd, "s1"), spooled(cwd, "s2")
+    assert handoff_worker.mark_resume("s1", cwd)
+    assert handoff_worker.resumed_handoff("s1") is None  # still generating
+
+    mine, other = spool / "20261018-0900-mine.md", spool / "20261018-0901-other.md"
+    mine.write_text("# mine\n")
+    handoff_worker.note_written("s1", mine)
+    job1.unlink()
+    # Another session in the same project writes a newer handoff
+    other.write_text("# other\n")
+    handoff_worker.note_written("s2", other)
+    job2.unlink()
+
+    assert handoff_worker.resumed_handoff("s1") == mine
+    assert handoff_worker.resumed_handoff("s1") is None
+    assert handoff_worker.resumed_handoff("s2") is None
+
+
+def test_no_marker_without_a_spooled_job(spool):
+    cwd = str(spool)
+    spooled(cwd, "s2")
+    assert not handoff_worker.mark_resume("s1", cwd)
+    assert hook_state.get(handoff_worker.RESUME_NAMESPACE, handoff_worker.session_key("s1")) is None
+
+
+def test_failed_job_drops_the_marker(spool):
+    cwd = str(spool)
+    job = spooled(cwd, "s1")
+    assert handoff_worker.mark_resume("s1", cwd)
+    job.unlink()  # moved to failed/, nothing written
+    assert handoff_worker.resumed_handoff("s1") is None
+    assert hook_state.get(handoff_worker.RESUME_NAMESPACE, handoff_worker.session_key("s1")) is None
@@ -0,0 +1,118 @@
+"""Resuming a transcript parse from a saved cursor gives the same window
+as parsing the whole file, without storing the window; session state only
+moves once a handoff is written."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import session_handoff  # noqa: E402
+from session_handoff import CURSOR_FIELDS, MAX_MESSAGES, parse_transcript  # noqa: E402
+
+
+def append(path, start, count):
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(start, start + count):
+            role = "human" if i % 2 == 0 else "assistant"
+            f.write(json.dumps({"type": role, "message": {"content": f"message {i}"}}) + "\n")
+            # Tool output and progress lines sit between messages
+            f.write(json.dumps({"type": "progress", "data": i}) + "\n")
+
+
+def saved(cursor):
+    """What save_handoff_state keeps."""
+    return json.loads(json.dumps({key: cursor[key] for key in CURSOR_FIELDS}))
+
+
+def test_cursor_resume_matches_full_parse(tmp_path):
+    path = tmp_path / "transcript.jsonl"
+    append(path, 0, 150)
+    _, cursor = parse_transcript(str(path))
+    assert "messages" not in saved(cursor)
+
+    append(path, 150, 7)
+    resumed, cursor = parse_transcript(str(path), saved(cursor))
+    full, _ = parse_transcript(str(path))
+    assert resumed == full
+    assert cursor["added"] == 7
+    assert resumed.count("message ") == MAX_MESSAGES
+
+    # A second resume rebuilds from the new cursor's line count
+    append(path, 157, 3)
+    resumed, cursor = parse_transcript(str(path), saved(cursor))
+    assert resumed == parse_transcript(str(path))[0]
+    assert cursor["added"] == 3
+
+
+def test_short_transcript_resume(tmp_path):
+    path = tmp_path / "transcript.jsonl"
+    append(path, 0, 3)
+    _, cursor = parse_transcript(str(path))
+    append(path, 3, 2)
+    resumed, cursor = parse_transcript(str(path), saved(cursor))
+    assert resumed == parse_transcript(str(path))[0]
+    assert resumed.count("message ") == 5
+
+
+def test_rewritten_transcript_falls_back_to_tail(tmp_path):
+    path = tmp_path / "transcript.jsonl"
+    append(path, 0, 20)
+    _, cursor = parse_transcript(str(path))
+    path.write_text("")
+    append(path, 100, 20)
+    resumed, cursor = parse_transcript(str(path), saved(cursor))
+    assert "message 0\n" not in resumed and "added" not in cursor
+    assert resumed == parse_transcript(str(path))[0]
+
+
+def test_delta_source_uses_in_memory_window(tmp_path):
+    path = tmp_path / "transcript.jsonl"
+    append(path, 0, 10)
+    _, cursor = parse_transcript(str(path))
+    previous = tmp_path / "handoff.md"
+    previous.write_text("# Session Handoff\n")
+    state = {"last_handoff": {"path": str(previous), "offset": cursor["offset"]}}
+    append(path, 10, 2)
+    _, cursor = parse_transcript(str(path), saved(cursor))
+    delta = session_handoff.delta_source(state, cursor)
+    assert delta["messages"].startswith("USER: message 10")
+
+
+@pytest.fixture
+def state_store(tmp_path, monkeypatch):
+    import hook_state
+
+    monkeypatch.setattr(hook_state, "HOOKS_STATE_DIR", tmp_path / "state")
+    monkeypatch.setattr(hook_state, "STORE_PATH", tmp_path / "state" / "hook_state.sqlite")
+    monkeypatch.setattr(hook_state, "_conn", None)
+    monkeypatch.setattr(session_handoff, "HOOKS_STATE_DIR", tmp_path / "state")
+
+
+def test_state_is_saved_only_once_the_handoff_is_written(tmp_path, monkeypatch, state_store):
+    import io
+
+    import handoff_worker
+
+    path = tmp_path / "transcript.jsonl"
+    append(path, 0, 10)
+    queued = []
+    monkeypatch.setattr(handoff_worker, "enqueue", lambda job: queued.append(job) or tmp_path / "job.json")
+    monkeypatch.setattr(sys, "argv", ["session_handoff.py"])
+    monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps({
+        "session_id": "s1", "transcript_path": str(path), "cwd": str(tmp_path), "trigger": "auto",
+    })))
+    session_handoff.main()
+
+    # Queued, not written: a job that later fails must not make the next run skip
+    assert session_handoff.load_handoff_state("s1") == {}
+
+    job = queued[0]
+    session_handoff.session_state_after_write(job, tmp_path / "handoff.md", partial=False)
+    state = session_handoff.load_handoff_state("s1")
+    assert state["digest"] == job["state"]["digest"]
+    assert state["cursor"] == job["state"]["cursor"]
+    assert state["last_handoff"]["path"] == str(tmp_path / "handoff.md")
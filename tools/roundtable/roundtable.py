@@ -35,6 +35,8 @@ Customize (all via .env -- no code changes -- unless noted):
     N AI turns with no human).
   * The look       -> edit static/style.css (colors, the roster pills) and refresh.
   * Access         -> ROOM_CODE; reach it over your LAN, an ngrok URL, or a Tailscale IP.
+  * Offline Claude -> ANTHROPIC_BASE_URL=http://127.0.0.1:8765 talks to the local stand-in
+    (hooks/api_standin.py: canned or replayed answers, injected latency and errors).
 
 Run:
   pip install -r requirements.txt